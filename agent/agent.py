@@ -1,16 +1,61 @@
-from typing import List
+import time
+from typing import Iterator, List, Optional, Tuple
 
-from agent.prompts import SYSTEM_PROMPT
+from agent.prompt_builder import Conversation
+from agent.prompts import PROMPT_VERSION, SYSTEM_PROMPT
 from agent.rag import retrieve_docs
-from agent.llm import generate_answer
+from agent.llm import is_configured, stream_answer
+from agent.response_cache import CachedAnswer, cache_scope, get_response_cache
+from config.settings import settings
 
 
-def answer_question(question: str) -> str:
+def cached_answer(
+    question: str,
+    context_docs: List[str],
+    conversation: Optional[Conversation] = None,
+) -> Tuple[Optional[CachedAnswer], Optional[str]]:
+    """Return (cached answer or None, cache scope or None when not caching)."""
+    cache = get_response_cache()
+    # The fallback text echoes the question, so it must never be cached.
+    if cache is None or not is_configured():
+        return None, None
+    scope = cache_scope(
+        PROMPT_VERSION,
+        SYSTEM_PROMPT,
+        settings.LLM_MODEL,
+        context_docs,
+        conversation.fingerprint() if conversation else "",
+    )
+    return cache.lookup(question, scope), scope
+
+
+def store_answer(question: str, scope: Optional[str], answer: str, latency_ms: float) -> None:
+    if scope is not None and answer:
+        get_response_cache().store(question, scope, answer, latency_ms)
+
+
+def answer_question(question: str, conversation: Optional[Conversation] = None) -> str:
     """
     Full RAG pipeline:
-    1. Retrieve relevant chunks
-    2. Call LLM with system prompt + context
+    1. Retrieve relevant chunks (hybrid search, capped by RAG_CONTEXT_TOKENS)
+    2. Reuse a cached answer for the same (or a very similar) question
+    3. Otherwise call LLM with system prompt + conversation + context,
+       packed into PROMPT_TOKEN_BUDGET
     """
-    context_docs: List[str] = retrieve_docs(question, k=4)
-    answer = generate_answer(SYSTEM_PROMPT, question, context_docs)
-    return answer
+    return "".join(stream_answer_question(question, conversation))
+
+
+def stream_answer_question(question: str, conversation: Optional[Conversation] = None) -> Iterator[str]:
+    """Same pipeline as answer_question, yielding the answer as it is generated."""
+    context_docs: List[str] = retrieve_docs(question)
+    hit, scope = cached_answer(question, context_docs, conversation)
+    if hit is not None:
+        yield hit.answer
+        return
+
+    start = time.perf_counter()
+    parts: List[str] = []
+    for piece in stream_answer(SYSTEM_PROMPT, question, context_docs, conversation):
+        parts.append(piece)
+        yield piece
+    store_answer(question, scope, "".join(parts), (time.perf_counter() - start) * 1000)
@@ -0,0 +1,86 @@
+"""
+In-process inverted index with Okapi BM25 scoring.
+
+Complements dense retrieval on exact terms that embeddings blur: SQL
+keywords (``GROUP BY``, ``DCL``) and identifiers (``fato_marketing``).
+Identifiers are indexed whole and split on underscores, so both
+``fato_marketing`` and ``fato`` match.
+"""
+import math
+import re
+from collections import Counter
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from agent.embeddings import normalize_text
+
+
+_TOKEN = re.compile(r"\w+")
+
+# Very frequent Portuguese words that carry no topical signal (accent-folded).
+STOPWORDS = frozenset(
+    normalize_text(word)
+    for word in """
+    a o as os um uma uns umas de do da dos das em no na nos nas por pelo pela
+    para com sem e ou que se como qual quais quando onde porque entre sobre ao
+    aos à às é ser são foi era isso isto esse essa este esta eu voce você me
+    meu minha mais menos muito muita já não sim
+    """.split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    tokens: List[str] = []
+    for word in _TOKEN.findall(normalize_text(text)):
+        if word in STOPWORDS:
+            continue
+        tokens.append(word)
+        if "_" in word:
+            tokens.extend(part for part in word.split("_") if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    def __init__(self, documents: Sequence[str], k1: float = 1.5, b: float = 0.75) -> None:
+        self.k1 = k1
+        self.b = b
+        self.size = len(documents)
+        lengths = np.zeros(self.size, dtype=np.float32)
+        postings: Dict[str, List[Tuple[int, int]]] = {}
+        for doc, text in enumerate(documents):
+            counts = Counter(tokenize(text))
+            lengths[doc] = sum(counts.values())
+            for term, tf in counts.items():
+                postings.setdefault(term, []).append((doc, tf))
+
+        avg = float(lengths.mean()) if self.size else 0.0
+        # Per-document length normalization, precomputed once.
+        self._norm = self.k1 * (1 - self.b + self.b * lengths / avg) if avg else lengths
+        self._postings: Dict[str, Tuple[np.ndarray, np.ndarray, float]] = {}
+        for term, entries in postings.items():
+            docs = np.fromiter((d for d, _ in entries), dtype=np.int32, count=len(entries))
+            tfs = np.fromiter((t for _, t in entries), dtype=np.float32, count=len(entries))
+            df = len(entries)
+            idf = math.log(1 + (self.size - df + 0.5) / (df + 0.5))
+            self._postings[term] = (docs, tfs, idf)
+
+    def scores(self, query: str) -> np.ndarray:
+        scores = np.zeros(self.size, dtype=np.float32)
+        for term in set(tokenize(query)):
+            posting = self._postings.get(term)
+            if posting is None:
+                continue
+            docs, tfs, idf = posting
+            scores[docs] += idf * tfs * (self.k1 + 1) / (tfs + self._norm[docs])
+        return scores
+
+    def search(self, query: str, k: int = 10) -> List[Tuple[int, float]]:
+        """Top-``k`` (document position, score) pairs with a positive score."""
+        scores = self.scores(query)
+        k = min(k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(int(i), float(scores[i])) for i in top]
@@ -0,0 +1,106 @@
+"""
+Token-bounded chunking of the course modules for retrieval.
+
+Each heading ("subtitulo"/"titulo") starts a section; a section's text and
+code are packed into chunks of at most ``max_tokens`` tokens, consecutive
+chunks sharing ``overlap`` tokens so an idea cut at a boundary still appears
+whole in one of them. Every chunk is prefixed with its module and section so
+it reads on its own inside a prompt.
+"""
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Tuple
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+_encoding = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Tokens in ``text``: exact with tiktoken installed, otherwise estimated
+    as one token per ~4 characters of each word.
+    """
+    global _encoding
+    if tiktoken is not None:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    return sum(math.ceil(len(word) / 4) for word in text.split())
+
+
+@dataclass(frozen=True)
+class Chunk:
+    id: str
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+# Markdown emphasis/inline code and arrows; code blocks are kept verbatim.
+_MARKUP = re.compile(r"\*\*|`|➡")
+
+
+def _clean(text: str) -> str:
+    return " ".join(_MARKUP.sub("", text).split())
+
+
+def _sections(module: Dict[str, Any]) -> Iterable[Tuple[str, str]]:
+    """(section title, plain text) pairs; text before the first heading is the intro."""
+    title, parts = "Introdução", []
+    for kind, content in module["blocos"]:
+        if kind in ("subtitulo", "titulo"):
+            if parts:
+                yield title, " ".join(parts)
+            title, parts = _clean(content), []
+        elif kind == "codigo":
+            parts.append(" ".join(content.split()))
+        else:
+            parts.append(_clean(content))
+    if parts:
+        yield title, " ".join(parts)
+
+
+def _windows(words: List[str], max_tokens: int, overlap: int) -> Iterable[List[str]]:
+    costs = [count_tokens(w) for w in words]
+    start = 0
+    while start < len(words):
+        end, used = start, 0
+        while end < len(words) and (used + costs[end] <= max_tokens or end == start):
+            used += costs[end]
+            end += 1
+        yield words[start:end]
+        if end >= len(words):
+            break
+        # Step back until ``overlap`` tokens are repeated, always moving forward.
+        back, carried = end, 0
+        while back > start + 1 and carried + costs[back - 1] <= overlap:
+            back -= 1
+            carried += costs[back]
+        start = back
+
+
+def chunk_modules(
+    modules: List[Dict[str, Any]],
+    max_tokens: int = 120,
+    overlap: int = 24,
+) -> List[Chunk]:
+    chunks: List[Chunk] = []
+    for module in modules:
+        module_title = _clean(module["titulo"])
+        for s, (section, text) in enumerate(_sections(module)):
+            header = f"{module_title} › {section}: "
+            budget = max(16, max_tokens - count_tokens(header))
+            for n, window in enumerate(_windows(text.split(), budget, overlap)):
+                chunks.append(
+                    Chunk(
+                        id=f"modulo{module['id']}:{s}:{n}",
+                        text=header + " ".join(window),
+                        metadata={"module": module_title, "section": section},
+                    )
+                )
+    return chunks
@@ -0,0 +1,187 @@
+"""
+Embedding backends for retrieval.
+
+``HashingEmbedder`` runs fully offline: words and character n-grams are
+hashed into a fixed number of signed buckets (the "hashing trick"), so the
+same text always maps to the same vector without a vocabulary or a network
+call. ``OpenAIEmbedder`` calls the embeddings API in batches. Both return
+L2-normalized float32 rows, so cosine similarity is a plain dot product.
+
+Question embeddings go through a small LRU (``embed_query``), so a repeated
+question never reaches the backend twice.
+"""
+import re
+import threading
+import unicodedata
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from openai import OpenAI
+except ImportError:
+    OpenAI = None  # type: ignore
+
+from config.settings import settings
+
+
+_WORD = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """Lowercase and strip accents, so 'Dimensão' and 'dimensao' match."""
+    if text.isascii():
+        return text.lower()
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+@dataclass
+class EmbeddingStats:
+    # Backend invocations (one per API request for OpenAI) and texts embedded.
+    calls: int = 0
+    texts: int = 0
+    query_hits: int = 0
+    query_misses: int = 0
+
+    @property
+    def query_hit_rate(self) -> float:
+        total = self.query_hits + self.query_misses
+        return self.query_hits / total if total else 0.0
+
+
+_stats_lock = threading.Lock()
+_stats = EmbeddingStats()
+
+
+def _record_call(texts: int) -> None:
+    with _stats_lock:
+        _stats.calls += 1
+        _stats.texts += texts
+
+
+def embedding_stats() -> EmbeddingStats:
+    with _stats_lock:
+        return EmbeddingStats(**vars(_stats))
+
+
+def _l2_normalize(matrix: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return (matrix / norms).astype(np.float32, copy=False)
+
+
+class HashingEmbedder:
+    """
+    Deterministic local embeddings: word unigrams plus character n-grams of
+    each word, hashed with CRC32 into ``dim`` buckets with a hash-derived sign.
+    Bucket counts are dampened with ``log(1 + |tf|)`` before normalizing.
+    """
+
+    def __init__(self, dim: int = 512, ngram: int = 3) -> None:
+        self.dim = dim
+        self.ngram = ngram
+        self.name = f"hashing-{dim}-{ngram}"
+
+    def _features(self, text: str) -> List[str]:
+        features: List[str] = []
+        for word in _WORD.findall(normalize_text(text)):
+            features.append(word)
+            padded = f"<{word}>"
+            if len(padded) > self.ngram:
+                features.extend(
+                    "#" + padded[i : i + self.ngram] for i in range(len(padded) - self.ngram + 1)
+                )
+        return features
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        _record_call(len(texts))
+        matrix = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                h = zlib.crc32(feature.encode("utf-8"))
+                matrix[row, h % self.dim] += 1.0 if (h >> 31) & 1 else -1.0
+        return _l2_normalize(np.sign(matrix) * np.log1p(np.abs(matrix)))
+
+
+class OpenAIEmbedder:
+    """Embeddings from the OpenAI API, requested in batches."""
+
+    def __init__(self, model: str = "text-embedding-3-small", batch_size: int = 256) -> None:
+        self.model = model
+        self.batch_size = batch_size
+        self.name = f"openai-{model}"
+        self._client = OpenAI(api_key=settings.OPENAI_API_KEY)
+
+    def embed(self, texts: Sequence[str]) -> np.ndarray:
+        rows: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            response = self._client.embeddings.create(
+                model=self.model, input=list(texts[start : start + self.batch_size])
+            )
+            _record_call(len(response.data))
+            rows.extend(item.embedding for item in response.data)
+        return _l2_normalize(np.asarray(rows, dtype=np.float32).reshape(len(texts), -1))
+
+
+_embedder = None
+
+
+def get_embedder():
+    """
+    The process-wide embedder chosen by settings.EMBEDDING_BACKEND:
+    "openai", "hashing", or "auto" (OpenAI when configured, else hashing).
+    """
+    global _embedder
+    if _embedder is None:
+        backend = settings.EMBEDDING_BACKEND
+        if backend == "auto":
+            backend = "openai" if OpenAI is not None and settings.OPENAI_API_KEY else "hashing"
+        if backend == "openai":
+            _embedder = OpenAIEmbedder()
+        else:
+            _embedder = HashingEmbedder(dim=settings.EMBEDDING_DIM)
+    return _embedder
+
+
+class QueryEmbeddingCache:
+    """LRU of question vectors keyed by embedder and normalized text."""
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple[str, str], np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def embed(self, embedder, text: str) -> np.ndarray:
+        key = (embedder.name, " ".join(normalize_text(text).split()))
+        with self._lock:
+            vector = self._entries.get(key)
+            if vector is not None:
+                self._entries.move_to_end(key)
+        with _stats_lock:
+            if vector is not None:
+                _stats.query_hits += 1
+            else:
+                _stats.query_misses += 1
+        if vector is not None:
+            return vector
+
+        vector = embedder.embed([text])[0]
+        vector.setflags(write=False)
+        with self._lock:
+            self._entries[key] = vector
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return vector
+
+
+_query_cache = QueryEmbeddingCache(settings.QUERY_EMBEDDING_CACHE_SIZE)
+
+
+def embed_query(text: str) -> np.ndarray:
+    """Embed a question with the process-wide embedder, through the LRU."""
+    return _query_cache.embed(get_embedder(), text)
@@ -0,0 +1,164 @@
+"""
+Chat guardrail: screens student messages against a list of blocked terms.
+
+Rules live in a text file (GUARDRAIL_RULES_PATH): one term or phrase per
+line, ``#`` comments, and ``[categoria]`` headers that group the rules below
+them. Matching ignores case and accents, and strips invisible format
+characters (zero-width spaces and the like). Underscores count as spaces,
+so ``system_prompt`` matches ``system prompt``. Terms match whole words:
+``hacker`` does not match inside ``hackers``; write ``hacker*`` to match any
+word starting with it. The words of a phrase may be separated by any run of
+spaces or punctuation.
+
+All rules compile into one regex shaped as a trie (rules sharing a prefix
+share its branch). A message is scanned once, and the cost per position is
+bounded by the longest rule, not by the number of rules.
+"""
+import os
+import re
+import threading
+import unicodedata
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from agent.embeddings import normalize_text
+from config.settings import settings
+
+
+_END = ""
+
+_SEPARATOR = re.compile(r"[\W_]+")
+
+
+def normalize(text: str) -> str:
+    text = normalize_text(text)
+    if not text.isascii():
+        text = "".join(ch for ch in text if unicodedata.category(ch) != "Cf")
+    # "_" is a regex word character; as a separator it would hide
+    # identifiers like ignore_previous from the word boundaries.
+    return text.replace("_", " ")
+
+
+def _canonical(term: str) -> str:
+    return " ".join(_SEPARATOR.sub(" ", normalize(term)).split())
+
+
+@dataclass(frozen=True)
+class Rule:
+    term: str
+    category: str
+    prefix: bool = False
+
+
+@dataclass(frozen=True)
+class GuardrailMatch:
+    rule: Rule
+    # Matched text, in normalized form.
+    text: str
+
+
+def parse_rules(lines: Iterable[str], default_category: str = "geral") -> List[Rule]:
+    rules: List[Rule] = []
+    category = default_category
+    for raw in lines:
+        line = raw.split("#", 1)[0].strip()
+        if not line:
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            category = line[1:-1].strip() or default_category
+            continue
+        prefix = line.endswith("*")
+        term = _canonical(line.rstrip("*"))
+        if term:
+            rules.append(Rule(term=term, category=category, prefix=prefix))
+    return rules
+
+
+def load_rules(path: str) -> List[Rule]:
+    with open(path, encoding="utf-8") as f:
+        return parse_rules(f)
+
+
+def _trie_pattern(node: dict) -> str:
+    """Regex for a character trie; ``_END`` marks where a rule ends."""
+    terminal = node.get(_END)
+    branches = []
+    for char in sorted(k for k in node if k != _END):
+        atom = r"\W+" if char == " " else re.escape(char)
+        branches.append(atom + _trie_pattern(node[char]))
+    if not branches:
+        return r"\w*" if terminal == "prefix" else ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if terminal == "prefix":
+        # Longer phrases first; otherwise the rest of the word, whatever it is.
+        return f"(?:{body}|\\w*)"
+    if terminal == "word":
+        return f"(?:{body})?"
+    return body
+
+
+class Guardrail:
+    def __init__(self, rules: Iterable[Rule]) -> None:
+        self.rules: List[Rule] = list(rules)
+        trie: dict = {}
+        self._exact: Dict[str, Rule] = {}
+        self._prefixes: List[Rule] = []
+        for rule in self.rules:
+            node = trie
+            for char in rule.term:
+                node = node.setdefault(char, {})
+            if rule.prefix:
+                node[_END] = "prefix"
+                self._prefixes.append(rule)
+            else:
+                node.setdefault(_END, "word")
+                self._exact.setdefault(rule.term, rule)
+        # Longest prefix first, so a match reports the most specific rule.
+        self._prefixes.sort(key=lambda r: len(r.term), reverse=True)
+        self._pattern: Optional["re.Pattern[str]"] = None
+        if self.rules:
+            self._pattern = re.compile(r"(?<!\w)" + _trie_pattern(trie) + r"(?!\w)")
+
+    @classmethod
+    def from_file(cls, path: str) -> "Guardrail":
+        return cls(load_rules(path))
+
+    def _rule_for(self, text: str) -> Rule:
+        canonical = " ".join(_SEPARATOR.sub(" ", text).split())
+        rule = self._exact.get(canonical)
+        if rule is not None:
+            return rule
+        for rule in self._prefixes:
+            if canonical.startswith(rule.term):
+                return rule
+        raise LookupError(text)  # unreachable: every match comes from a rule
+
+    def check(self, message: str) -> Optional[GuardrailMatch]:
+        """First blocked term in ``message``, or None when it is allowed."""
+        if self._pattern is None:
+            return None
+        found = self._pattern.search(normalize(message))
+        if found is None:
+            return None
+        return GuardrailMatch(rule=self._rule_for(found.group()), text=found.group())
+
+    def is_blocked(self, message: str) -> bool:
+        return self.check(message) is not None
+
+
+_guardrail: Optional[Tuple[str, float, Guardrail]] = None
+_guardrail_lock = threading.Lock()
+
+
+def get_guardrail() -> Guardrail:
+    """The guardrail for GUARDRAIL_RULES_PATH, recompiled when the file changes."""
+    global _guardrail
+    path = settings.GUARDRAIL_RULES_PATH
+    mtime = os.path.getmtime(path)
+    cached = _guardrail
+    if cached is not None and cached[0] == path and cached[1] == mtime:
+        return cached[2]
+    with _guardrail_lock:
+        if _guardrail is None or _guardrail[:2] != (path, mtime):
+            _guardrail = (path, mtime, Guardrail.from_file(path))
+        return _guardrail[2]
@@ -1,46 +1,211 @@
-from typing import List
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Iterator, List, Optional
 
 try:
-    from openai import OpenAI
+    from openai import AsyncOpenAI, OpenAI
 except ImportError:
+    AsyncOpenAI = None  # type: ignore
     OpenAI = None  # type: ignore
 
+try:
+    import httpx
+except ImportError:
+    httpx = None  # type: ignore
+
+from agent.prompt_builder import Conversation, build_prompt
 from config.settings import settings
 
 
-def generate_answer(system_prompt: str, user_message: str, context_docs: List[str]) -> str:
+@dataclass
+class LLMStats:
+    calls: int = 0
+    # Time to first token / to the end of the answer, in milliseconds.
+    ttft_ms: float = 0.0
+    total_ms: float = 0.0
+    last_ttft_ms: float = 0.0
+    last_total_ms: float = 0.0
+
+    @property
+    def avg_ttft_ms(self) -> float:
+        return self.ttft_ms / self.calls if self.calls else 0.0
+
+    @property
+    def avg_total_ms(self) -> float:
+        return self.total_ms / self.calls if self.calls else 0.0
+
+
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+_stats_lock = threading.Lock()
+_stats = LLMStats()
+
+
+def is_configured() -> bool:
+    return OpenAI is not None and bool(settings.OPENAI_API_KEY)
+
+
+def _client_kwargs() -> dict:
+    return {
+        "api_key": settings.OPENAI_API_KEY,
+        "base_url": settings.OPENAI_BASE_URL,
+        "timeout": settings.LLM_TIMEOUT_SECONDS,
+    }
+
+
+def _limits():
+    return httpx.Limits(
+        max_connections=settings.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.LLM_MAX_CONNECTIONS,
+    )
+
+
+def get_client():
+    """
+    One OpenAI client per process. The client keeps an HTTP connection pool,
+    so consecutive questions reuse warm TLS connections instead of opening
+    a new one each time. Returns None when OpenAI is not configured.
+    """
+    global _client
+    if not is_configured():
+        return None
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                kwargs = _client_kwargs()
+                if httpx is not None:
+                    kwargs["http_client"] = httpx.Client(limits=_limits(), timeout=settings.LLM_TIMEOUT_SECONDS)
+                _client = OpenAI(**kwargs)
+    return _client
+
+
+def get_async_client():
+    """
+    Async counterpart of get_client, for agent.service. It must only be used
+    from the service's event loop, which owns its connections.
+    """
+    global _async_client
+    if not is_configured() or AsyncOpenAI is None:
+        return None
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                kwargs = _client_kwargs()
+                if httpx is not None:
+                    kwargs["http_client"] = httpx.AsyncClient(limits=_limits(), timeout=settings.LLM_TIMEOUT_SECONDS)
+                _async_client = AsyncOpenAI(**kwargs)
+    return _async_client
+
+
+def llm_stats() -> LLMStats:
+    with _stats_lock:
+        return LLMStats(**vars(_stats))
+
+
+def _record(ttft: Optional[float], total: float) -> None:
+    ttft = total if ttft is None else ttft
+    with _stats_lock:
+        _stats.calls += 1
+        _stats.ttft_ms += ttft * 1000
+        _stats.total_ms += total * 1000
+        _stats.last_ttft_ms = ttft * 1000
+        _stats.last_total_ms = total * 1000
+
+
+def _fallback(user_message: str, context_docs: List[str]) -> str:
+    context_text = "\n\n".join(context_docs) if context_docs else "(sem contexto)"
+    return (
+        "O agente IA não está configurado (OPENAI_API_KEY ausente ou dependências faltando).\n\n"
+        "Pergunta do aluno:\n"
+        f"{user_message}\n\n"
+        "Contexto disponível:\n"
+        f"{context_text}"
+    )
+
+
+def stream_answer(
+    system_prompt: str,
+    user_message: str,
+    context_docs: List[str],
+    conversation: Optional[Conversation] = None,
+) -> Iterator[str]:
+    """
+    Yield the answer piece by piece as the model produces it. The prompt,
+    conversation included, is packed into PROMPT_TOKEN_BUDGET by build_prompt.
+    If OpenAI or API key is not available, yields a fallback message.
+    """
+    client = get_client()
+    if client is None:
+        yield _fallback(user_message, context_docs)
+        return
+
+    start = time.perf_counter()
+    first: Optional[float] = None
+    try:
+        stream = client.chat.completions.create(
+            model=settings.LLM_MODEL,
+            messages=build_prompt(system_prompt, user_message, context_docs, conversation).messages,
+            temperature=0.2,
+            stream=True,
+        )
+        for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first is None:
+                    first = time.perf_counter() - start
+                yield delta
+    finally:
+        _record(first, time.perf_counter() - start)
+
+
+def generate_answer(
+    system_prompt: str,
+    user_message: str,
+    context_docs: List[str],
+    conversation: Optional[Conversation] = None,
+) -> str:
     """
     Call OpenAI Chat API with a structured prompt.
     If OpenAI or API key is not available, returns a fallback message.
     """
-    if OpenAI is None or not settings.OPENAI_API_KEY:
-        context_text = "\n\n".join(context_docs) if context_docs else "(sem contexto)"
-        return (
-            "O agente IA não está configurado (OPENAI_API_KEY ausente ou dependências faltando).\n\n"
-            "Pergunta do aluno:\n"
-            f"{user_message}\n\n"
-            "Contexto disponível:\n"
-            f"{context_text}"
-        )
+    return "".join(stream_answer(system_prompt, user_message, context_docs, conversation))
 
-    client = OpenAI(api_key=settings.OPENAI_API_KEY)
-
-    context_block = ""
-    if context_docs:
-        joined_docs = "\n\n---\n\n".join(context_docs)
-        context_block = f"Use as informações abaixo como contexto adicional:\n{joined_docs}"
-
-    messages = [
-        {"role": "system", "content": system_prompt},
-        {
-            "role": "user",
-            "content": f"{context_block}\n\nPergunta do aluno:\n{user_message}",
-        },
-    ]
-
-    completion = client.chat.completions.create(
-        model="gpt-4.1-mini",
-        messages=messages,
-        temperature=0.2,
-    )
-    return completion.choices[0].message.content
+
+async def astream_answer(
+    system_prompt: str,
+    user_message: str,
+    context_docs: List[str],
+    conversation: Optional[Conversation] = None,
+) -> AsyncIterator[str]:
+    """
+    Async version of stream_answer: waiting on the model holds no thread, so
+    many questions can be in flight at once.
+    """
+    client = get_async_client()
+    if client is None:
+        yield _fallback(user_message, context_docs)
+        return
+
+    start = time.perf_counter()
+    first: Optional[float] = None
+    try:
+        stream = await client.chat.completions.create(
+            model=settings.LLM_MODEL,
+            messages=build_prompt(system_prompt, user_message, context_docs, conversation).messages,
+            temperature=0.2,
+            stream=True,
+        )
+        async for chunk in stream:
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                if first is None:
+                    first = time.perf_counter() - start
+                yield delta
+    finally:
+        _record(first, time.perf_counter() - start)
@@ -0,0 +1,182 @@
+"""
+Token-budgeted prompt assembly.
+
+A prompt is the system prompt, the conversation so far, the retrieved
+passages and the question, packed into PROMPT_TOKEN_BUDGET tokens. The
+system prompt and the question always go in. The conversation then gets up
+to PROMPT_HISTORY_TOKENS: its rolling summary first, then the most recent
+turns, newest first. The passages fill whatever is left, in rank order.
+
+``Conversation`` keeps the last turns verbatim. Older turns are folded into
+a short extractive summary (the first sentence of each question and answer).
+The summary itself rolls: once it exceeds PROMPT_SUMMARY_TOKENS, its oldest
+lines are dropped. So the prompt stays the same size however long the
+session gets, and folding costs no extra model call.
+"""
+import hashlib
+import re
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from agent.chunking import count_tokens
+from config.settings import settings
+
+
+# Role tokens and separators the chat format adds around each message.
+_MESSAGE_OVERHEAD = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+_ROLES = {"user": "user", "agent": "assistant"}
+
+_CONTEXT_HEADER = "Use as informações abaixo como contexto adicional:"
+_DOC_SEPARATOR = "\n\n---\n\n"
+
+
+def _gist(text: str, max_tokens: int) -> str:
+    """First sentence of ``text``, cut to ``max_tokens``."""
+    first = _SENTENCE_END.split(" ".join(text.split()), maxsplit=1)[0]
+    words: List[str] = []
+    used = 0
+    for word in first.split():
+        used += count_tokens(word)
+        if used > max_tokens:
+            return " ".join(words) + "…"
+        words.append(word)
+    return " ".join(words)
+
+
+@dataclass
+class Conversation:
+    """Rolling summary plus the most recent (sender, text) turns of one chat."""
+
+    summary_lines: List[str] = field(default_factory=list)
+    turns: List[Tuple[str, str]] = field(default_factory=list)
+    # Turns folded into the summary so far.
+    folded: int = 0
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(self.summary_lines)
+
+    def add(
+        self,
+        sender: str,
+        text: str,
+        recent_tokens: Optional[int] = None,
+        summary_tokens: Optional[int] = None,
+    ) -> None:
+        summary_tokens = settings.PROMPT_SUMMARY_TOKENS if summary_tokens is None else summary_tokens
+        if recent_tokens is None:
+            # Summary and recent turns share the prompt's history budget.
+            recent_tokens = max(0, settings.PROMPT_HISTORY_TOKENS - summary_tokens)
+        self.turns.append((sender, text))
+        self._fold(recent_tokens, summary_tokens)
+
+    def _fold(self, recent_tokens: int, summary_tokens: int) -> None:
+        # Keep at least the last exchange verbatim.
+        while len(self.turns) > 2 and sum(count_tokens(t) for _, t in self.turns) > recent_tokens:
+            sender, text = self.turns.pop(0)
+            line = f"{'Aluno' if sender == 'user' else 'Agente'}: {_gist(text, 30)}"
+            if sender == "user" and self.turns and self.turns[0][0] == "agent":
+                _, reply = self.turns.pop(0)
+                line += f" → Agente: {_gist(reply, 30)}"
+                self.folded += 1
+            self.summary_lines.append(line)
+            self.folded += 1
+        while len(self.summary_lines) > 1 and count_tokens(self.summary) > summary_tokens:
+            self.summary_lines.pop(0)
+
+    def copy(self) -> "Conversation":
+        return Conversation(list(self.summary_lines), list(self.turns), self.folded)
+
+    def fingerprint(self) -> str:
+        """Stable hash of what a prompt built from this conversation would contain."""
+        digest = hashlib.sha1(self.summary.encode("utf-8"))
+        for sender, text in self.turns:
+            digest.update(b"\x00" + sender.encode("utf-8") + b"\x00" + text.encode("utf-8"))
+        return digest.hexdigest()
+
+    def __bool__(self) -> bool:
+        return bool(self.turns or self.summary_lines)
+
+
+@dataclass
+class PromptPlan:
+    messages: List[dict]
+    tokens: int
+    context_docs: List[str]
+    turns: int
+    dropped_docs: int
+    dropped_turns: int
+    summary_used: bool
+
+
+def _user_content(question: str, context_docs: Sequence[str]) -> str:
+    context_block = ""
+    if context_docs:
+        context_block = f"{_CONTEXT_HEADER}\n{_DOC_SEPARATOR.join(context_docs)}"
+    return f"{context_block}\n\nPergunta do aluno:\n{question}"
+
+
+def _summary_message(summary: str) -> dict:
+    return {"role": "system", "content": f"Resumo da conversa até aqui:\n{summary}"}
+
+
+def build_prompt(
+    system_prompt: str,
+    question: str,
+    context_docs: Sequence[str],
+    conversation: Optional[Conversation] = None,
+    max_tokens: Optional[int] = None,
+    history_tokens: Optional[int] = None,
+) -> PromptPlan:
+    max_tokens = settings.PROMPT_TOKEN_BUDGET if max_tokens is None else max_tokens
+    history_tokens = settings.PROMPT_HISTORY_TOKENS if history_tokens is None else history_tokens
+
+    used = count_tokens(system_prompt) + count_tokens(_user_content(question, ())) + 2 * _MESSAGE_OVERHEAD
+    history_budget = max(0, min(history_tokens, max_tokens - used))
+
+    # Conversation: the summary first, then as many recent turns as fit, newest first.
+    history: List[dict] = []
+    summary_used = False
+    history_used = 0
+    turns = conversation.turns if conversation else []
+    if conversation and conversation.summary_lines:
+        message = _summary_message(conversation.summary)
+        cost = count_tokens(message["content"]) + _MESSAGE_OVERHEAD
+        if cost <= history_budget:
+            history.append(message)
+            history_used += cost
+            summary_used = True
+    kept: List[dict] = []
+    for sender, text in reversed(turns):
+        cost = count_tokens(text) + _MESSAGE_OVERHEAD
+        if history_used + cost > history_budget:
+            break
+        kept.append({"role": _ROLES.get(sender, "user"), "content": text})
+        history_used += cost
+    history.extend(reversed(kept))
+    used += history_used
+
+    # Passages fill the rest in rank order; one that does not fit is skipped.
+    docs: List[str] = []
+    for doc in context_docs:
+        # The first passage also pays for the context header, the others for a separator.
+        cost = count_tokens(doc) + count_tokens(_DOC_SEPARATOR if docs else _CONTEXT_HEADER)
+        if used + cost > max_tokens:
+            continue
+        docs.append(doc)
+        used += cost
+
+    messages = [{"role": "system", "content": system_prompt}, *history]
+    messages.append({"role": "user", "content": _user_content(question, docs)})
+    return PromptPlan(
+        messages=messages,
+        tokens=used,
+        context_docs=docs,
+        turns=len(kept),
+        dropped_docs=len(context_docs) - len(docs),
+        dropped_turns=len(turns) - len(kept),
+        summary_used=summary_used,
+    )
@@ -1,3 +1,7 @@
+# Bump when the prompt or how it is assembled changes: cached answers are
+# scoped by this version.
+PROMPT_VERSION = "2"
+
 SYSTEM_PROMPT = (
     "Você é um instrutor especialista em SQL, modelagem dimensional e arquitetura de dados. "
     "Explique conceitos de forma clara, didática e objetiva, para alunos iniciantes. "
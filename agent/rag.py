@@ -1,4 +1,12 @@
-from typing import List, Optional
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Callable, List, Optional, Tuple
 
 try:
     import chromadb
@@ -7,7 +15,43 @@ except ImportError:
     chromadb = None
     embedding_functions = None
 
+from agent.bm25 import BM25Index, tokenize
+from agent.chunking import Chunk, chunk_modules, count_tokens
+from agent.embeddings import OpenAIEmbedder, embed_query, get_embedder
+from agent.vector_index import SearchHit, VectorIndex, content_hash, sync_index
 from config.settings import settings
+from utils.course_content import get_course_modules
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetrievalStats:
+    # Building the client/collection and syncing the knowledge base.
+    startups: int = 0
+    startup_ms: float = 0.0
+    queries: int = 0
+    query_ms: float = 0.0
+    last_query_ms: float = 0.0
+    # Last knowledge base sync: chunks embedded, reused by content hash, deleted.
+    embedded: int = 0
+    reused: int = 0
+    deleted: int = 0
+
+    @property
+    def avg_query_ms(self) -> float:
+        return self.query_ms / self.queries if self.queries else 0.0
+
+
+# One store handle (Chroma collection or NumPy index) per process, shared by
+# every session. It is rebuilt only when the backend, the store location, the
+# embedder or the knowledge base content changes.
+_lock = threading.Lock()
+_handle: Optional[Tuple[Tuple[str, ...], Any]] = None
+_stats = RetrievalStats()
+
+_CHROMA_EMBEDDING_MODEL = "text-embedding-3-small"
 
 
 def _create_collection():
@@ -23,7 +67,7 @@ def _create_collection():
     client = chromadb.PersistentClient(path=settings.VECTOR_PATH)
     embed_fn = embedding_functions.OpenAIEmbeddingFunction(
         api_key=settings.OPENAI_API_KEY,
-        model_name="text-embedding-3-small",
+        model_name=_CHROMA_EMBEDDING_MODEL,
     )
     collection = client.get_or_create_collection(
         name="sql_course_kb",
@@ -67,26 +111,271 @@ def _get_initial_docs() -> dict:
     }
 
 
-def _ensure_loaded(collection) -> None:
-    """Load initial documents into the collection if it's empty."""
+@lru_cache(maxsize=1)
+def _course_chunks(max_tokens: int, overlap: int) -> Tuple[Chunk, ...]:
+    return tuple(chunk_modules(get_course_modules(), max_tokens=max_tokens, overlap=overlap))
+
+
+def get_knowledge_base() -> List[Chunk]:
+    """
+    Everything the agent can retrieve: the short reference notes above plus
+    the course modules (utils.course_content), chunked by section.
+    """
+    notes = [
+        Chunk(id=doc_id, text=text, metadata={"module": "Notas de referência", "section": doc_id})
+        for doc_id, text in _get_initial_docs().items()
+    ]
+    return notes + list(_course_chunks(settings.RAG_CHUNK_TOKENS, settings.RAG_CHUNK_OVERLAP))
+
+
+def kb_version(chunks: List[Chunk]) -> str:
+    """Content hash of the knowledge base; changes whenever any chunk does."""
+    payload = json.dumps(
+        [(c.id, c.text, c.metadata) for c in chunks], sort_keys=True, ensure_ascii=False
+    ).encode("utf-8")
+    return hashlib.sha1(payload).hexdigest()
+
+
+def _ensure_loaded(collection, chunks: List[Chunk], version: str) -> None:
+    """
+    Bring the collection in line with ``chunks`` unless it already holds this
+    knowledge base version (recorded in the collection metadata). Only
+    chunks whose content hash changed are re-embedded.
+    """
+    docs = {c.id: c for c in chunks}
     if collection is None:
         return
-    if collection.count() > 0:
+    if (collection.metadata or {}).get("kb_version") == version and collection.count() > 0:
         return
-    docs = _get_initial_docs()
-    ids = list(docs.keys())
-    documents = list(docs.values())
-    collection.add(ids=ids, documents=documents)
+    existing = collection.get(include=["metadatas"])
+    stored = {
+        doc_id: (meta or {}).get("content_hash")
+        for doc_id, meta in zip(existing["ids"], existing["metadatas"] or [])
+    }
+    stale = set(stored) - set(docs)
+    if stale:
+        collection.delete(ids=sorted(stale))
+    changed = [doc_id for doc_id, c in docs.items() if stored.get(doc_id) != content_hash(c.text)]
+    if changed:
+        collection.upsert(
+            ids=changed,
+            documents=[docs[i].text for i in changed],
+            metadatas=[{**docs[i].metadata, "content_hash": content_hash(docs[i].text)} for i in changed],
+        )
+    collection.modify(metadata={"kb_version": version})
+    _stats.embedded, _stats.reused, _stats.deleted = len(changed), len(docs) - len(changed), len(stale)
+
+
+def _shared(key: Tuple[str, ...], factory: Callable[[], Any]) -> Any:
+    """Return the process-wide handle for ``key``, building it at most once."""
+    global _handle
+    handle = _handle
+    if handle is not None and handle[0] == key:
+        return handle[1]
+    with _lock:
+        if _handle is not None and _handle[0] == key:
+            return _handle[1]
+        start = time.perf_counter()
+        value = factory()
+        _handle = (key, value)
+        elapsed = (time.perf_counter() - start) * 1000
+        _stats.startups += 1
+        _stats.startup_ms += elapsed
+        logger.info("Vector store pronto em %.1f ms (%s).", elapsed, ", ".join(key[:2]))
+        return value
+
+
+def get_collection():
+    """
+    Return the shared Chroma collection (None when unavailable), creating
+    and syncing it on first use or after VECTOR_PATH or the knowledge base
+    changed.
+    """
+    chunks = get_knowledge_base()
+    version = kb_version(chunks)
+
+    def build():
+        collection = _create_collection()
+        _ensure_loaded(collection, chunks, version)
+        return collection
+
+    return _shared(("chroma", settings.VECTOR_PATH, version), build)
+
+
+def _index_dir() -> str:
+    return os.path.join(settings.VECTOR_PATH, "numpy_index")
+
+
+def get_index() -> VectorIndex:
+    """
+    Return the shared NumPy index, memory-mapped from disk when the saved
+    one matches the knowledge base and embedder. Otherwise it is synced from
+    the saved one, embedding only new or edited chunks, and saved again.
+    """
+    chunks = get_knowledge_base()
+    version = kb_version(chunks)
+    embedder = get_embedder()
+    info = {"kb_version": version, "embedder": embedder.name}
+
+    def build() -> VectorIndex:
+        saved = VectorIndex.load(_index_dir())
+        if saved is not None and saved.info == info:
+            _stats.embedded, _stats.reused, _stats.deleted = 0, len(saved), 0
+            return saved
+        if saved is not None and saved.info.get("embedder") != embedder.name:
+            saved = None
+        index, report = sync_index(
+            saved,
+            [c.id for c in chunks],
+            [c.text for c in chunks],
+            embedder.embed,
+            metadatas=[c.metadata for c in chunks],
+            info=info,
+        )
+        index.save(_index_dir())
+        _stats.embedded, _stats.reused, _stats.deleted = report.embedded, report.reused, report.deleted
+        return index
+
+    return _shared(("numpy", settings.VECTOR_PATH, version, embedder.name), build)
+
+
+def retrieval_stats() -> RetrievalStats:
+    with _lock:
+        return RetrievalStats(**vars(_stats))
+
+
+# Candidates taken from each retriever before fusion, and the RRF constant.
+_CANDIDATES = 20
+_RRF_K = 60
+
+
+@lru_cache(maxsize=1)
+def _bm25(version: str) -> Tuple[BM25Index, Tuple[Chunk, ...]]:
+    chunks = tuple(get_knowledge_base())
+    return BM25Index([c.text for c in chunks]), chunks
+
+
+def _lexical(question: str, n: int) -> List[SearchHit]:
+    chunks = get_knowledge_base()
+    index, indexed = _bm25(kb_version(chunks))
+    return [
+        SearchHit(indexed[i].id, indexed[i].text, score, indexed[i].metadata)
+        for i, score in index.search(question, n)
+    ]
+
+
+def _dense(question: str, n: int) -> List[SearchHit]:
+    if settings.VECTOR_INDEX == "chroma":
+        col = get_collection()
+        if col is None:
+            return []
+        embedder = get_embedder()
+        if isinstance(embedder, OpenAIEmbedder) and embedder.model == _CHROMA_EMBEDDING_MODEL:
+            # Same model as the collection: reuse the cached question vector.
+            result = col.query(query_embeddings=[embed_query(question).tolist()], n_results=n)
+        else:
+            result = col.query(query_texts=[question], n_results=n)
+        return [
+            SearchHit(doc_id, doc, 1.0 - float(dist), meta or {})
+            for doc_id, doc, dist, meta in zip(
+                result["ids"][0], result["documents"][0], result["distances"][0], result["metadatas"][0]
+            )
+        ]
+    return get_index().search(embed_query(question), n)[0]
+
+
+def _bigrams(tokens: List[str]) -> frozenset:
+    return frozenset(zip(tokens, tokens[1:]))
 
 
-def retrieve_docs(question: str, k: int = 4) -> List[str]:
+@lru_cache(maxsize=4096)
+def _passage_terms(text: str) -> Tuple[frozenset, frozenset]:
+    terms = tokenize(text)
+    return frozenset(terms), _bigrams(terms)
+
+
+def rerank(question: str, rankings: List[List[SearchHit]]) -> List[SearchHit]:
     """
-    Query the vector store for the most relevant documents.
-    Returns an empty list if vector store is not available.
+    Fuse ranked lists with reciprocal-rank fusion, then re-score the fused
+    candidates by how much of the question they cover: the share of query
+    terms present in the passage and of query bigrams (``group by``) present
+    in order. Cheap enough to run on every question, no model involved.
     """
-    col = _create_collection()
-    if col is None:
+    fused: dict = {}
+    by_id: dict = {}
+    for ranking in rankings:
+        for rank, hit in enumerate(ranking):
+            fused[hit.id] = fused.get(hit.id, 0.0) + 1.0 / (_RRF_K + rank + 1)
+            by_id.setdefault(hit.id, hit)
+    if not fused:
         return []
-    _ensure_loaded(col)
-    result = col.query(query_texts=[question], n_results=k)
-    return result.get("documents", [[]])[0] or []
+
+    query_terms = tokenize(question)
+    query_set, query_bigrams = set(query_terms), _bigrams(query_terms)
+    best = max(fused.values())
+    scored = []
+    for doc_id, rrf in fused.items():
+        hit = by_id[doc_id]
+        terms, bigrams = _passage_terms(hit.document)
+        coverage = len(query_set & terms) / len(query_set) if query_set else 0.0
+        phrase = len(query_bigrams & bigrams) / len(query_bigrams) if query_bigrams else 0.0
+        score = rrf / best + 0.5 * coverage + 0.25 * phrase
+        scored.append(SearchHit(hit.id, hit.document, score, hit.metadata))
+    scored.sort(key=lambda h: h.score, reverse=True)
+    return scored
+
+
+def retrieve(
+    question: str,
+    k: Optional[int] = None,
+    max_tokens: Optional[int] = None,
+    mode: Optional[str] = None,
+) -> List[SearchHit]:
+    """
+    The passages most relevant to ``question``, best first, with their
+    module and section. Passages are added while they fit in ``max_tokens``
+    (settings.RAG_CONTEXT_TOKENS) and, when given, up to ``k`` of them.
+
+    ``mode`` (settings.RAG_MODE): "hybrid" fuses BM25 and vector results and
+    re-ranks them, dropping passages scoring below RAG_MIN_RELATIVE_SCORE of
+    the best one; "dense" and "bm25" use a single retriever.
+    """
+    mode = mode or settings.RAG_MODE
+    max_tokens = settings.RAG_CONTEXT_TOKENS if max_tokens is None else max_tokens
+
+    start = time.perf_counter()
+    if mode == "dense":
+        ranked = _dense(question, _CANDIDATES)
+    elif mode == "bm25":
+        ranked = _lexical(question, _CANDIDATES)
+    else:
+        ranked = rerank(question, [_dense(question, _CANDIDATES), _lexical(question, _CANDIDATES)])
+        if ranked:
+            floor = ranked[0].score * settings.RAG_MIN_RELATIVE_SCORE
+            ranked = [hit for hit in ranked if hit.score >= floor]
+
+    selected: List[SearchHit] = []
+    used = 0
+    for hit in ranked:
+        if k is not None and len(selected) >= k:
+            break
+        cost = count_tokens(hit.document)
+        if selected and used + cost > max_tokens:
+            continue
+        selected.append(hit)
+        used += cost
+
+    elapsed = (time.perf_counter() - start) * 1000
+    with _lock:
+        _stats.queries += 1
+        _stats.query_ms += elapsed
+        _stats.last_query_ms = elapsed
+    return selected
+
+
+def retrieve_docs(question: str, k: Optional[int] = None) -> List[str]:
+    """
+    Query the knowledge base for the most relevant passages, within the
+    context token budget. Returns an empty list if nothing is available.
+    """
+    return [hit.document for hit in retrieve(question, k)]
@@ -0,0 +1,227 @@
+"""
+Response cache in front of the LLM.
+
+Entries are scoped by prompt version, system prompt, model, a hash of the
+retrieved context and, for follow-ups, a hash of the conversation. A cached
+answer is therefore only reused when the model would have seen the same
+instructions, passages and chat history. Within a scope a
+question hits on its text (case and whitespace folded) first, then on
+embedding similarity above RESPONSE_CACHE_SIMILARITY among entries with the
+same numbers and operators. Entries expire after a TTL and the least
+recently used ones are evicted beyond RESPONSE_CACHE_MAX_ENTRIES. Stored in a
+local SQLite file so the cache survives restarts and is shared by workers.
+"""
+import hashlib
+import re
+import threading
+import time
+from dataclasses import dataclass
+from typing import List, Optional
+
+import numpy as np
+
+from agent.embeddings import embed_query, get_embedder
+from config.settings import settings
+from db.connection import ConnectionPool, get_pool
+from db.migrations import run_script
+
+
+RESPONSE_CACHE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS response_cache (
+    id INTEGER PRIMARY KEY,
+    scope TEXT NOT NULL,
+    question TEXT NOT NULL,
+    answer TEXT NOT NULL,
+    embedder TEXT NOT NULL,
+    embedding BLOB NOT NULL,
+    latency_ms REAL NOT NULL,
+    created_at REAL NOT NULL,
+    last_hit_at REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0,
+    UNIQUE (scope, question)
+);
+
+CREATE INDEX IF NOT EXISTS idx_response_cache_lru ON response_cache (last_hit_at);
+"""
+
+
+# Numbers and operators: questions that differ in them (``preco > 5`` vs
+# ``preco < 5``) must never share an answer, however similar they embed.
+_SIGNIFICANT = re.compile(r"\d+(?:[.,]\d+)*|[<>=!]=?|<>|[-+*/%|]")
+
+
+def normalize_question(question: str) -> str:
+    """Exact-match key: case and whitespace folded, punctuation and operators kept."""
+    return " ".join(question.lower().split())
+
+
+def _signature(question: str) -> List[str]:
+    return _SIGNIFICANT.findall(question)
+
+
+def cache_scope(
+    prompt_version: str,
+    system_prompt: str,
+    model: str,
+    context_docs: List[str],
+    conversation: str = "",
+) -> str:
+    """``conversation`` is a fingerprint of the chat so far; follow-ups only match within it."""
+    digest = hashlib.sha1()
+    for part in (prompt_version, system_prompt, model, *context_docs):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\x00")
+    if conversation:
+        digest.update(b"conversation\x00" + conversation.encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class CachedAnswer:
+    answer: str
+    # "exact" or "semantic"
+    match: str
+    similarity: float
+    # Generation time the hit avoided.
+    saved_ms: float
+
+
+@dataclass
+class ResponseCacheStats:
+    lookups: int = 0
+    exact_hits: int = 0
+    semantic_hits: int = 0
+    stores: int = 0
+    evictions: int = 0
+    saved_ms: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return (self.exact_hits + self.semantic_hits) / self.lookups if self.lookups else 0.0
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        ttl_seconds: float = 7 * 24 * 3600,
+        max_entries: int = 5000,
+        similarity: float = 0.92,
+    ) -> None:
+        self.pool = pool
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self._stats = ResponseCacheStats()
+        self._lock = threading.Lock()
+        with pool.write() as conn:
+            run_script(conn, RESPONSE_CACHE_SCHEMA)
+
+    def stats(self) -> ResponseCacheStats:
+        with self._lock:
+            return ResponseCacheStats(**vars(self._stats))
+
+    def _touch(self, entry_id: int) -> None:
+        with self.pool.write() as conn:
+            conn.execute(
+                "UPDATE response_cache SET hits = hits + 1, last_hit_at = ? WHERE id = ?;",
+                (time.time(), entry_id),
+            )
+
+    def lookup(self, question: str, scope: str) -> Optional[CachedAnswer]:
+        fresh_after = time.time() - self.ttl_seconds
+        normalized = normalize_question(question)
+        with self._lock:
+            self._stats.lookups += 1
+
+        with self.pool.read() as conn:
+            row = conn.execute(
+                "SELECT id, answer, latency_ms FROM response_cache "
+                "WHERE scope = ? AND question = ? AND created_at > ?;",
+                (scope, normalized, fresh_after),
+            ).fetchone()
+            match, similarity = "exact", 1.0
+            if row is None:
+                embedder = get_embedder()
+                candidates = conn.execute(
+                    "SELECT id, answer, latency_ms, embedding, question FROM response_cache "
+                    "WHERE scope = ? AND embedder = ? AND created_at > ?;",
+                    (scope, embedder.name, fresh_after),
+                ).fetchall()
+                signature = _signature(normalized)
+                candidates = [c for c in candidates if _signature(c[4]) == signature]
+                if candidates:
+                    matrix = np.stack([np.frombuffer(c[3], dtype=np.float32) for c in candidates])
+                    scores = matrix @ embed_query(question)
+                    best = int(np.argmax(scores))
+                    if scores[best] >= self.similarity:
+                        row = candidates[best][:3]
+                        match, similarity = "semantic", float(scores[best])
+        if row is None:
+            return None
+
+        self._touch(row[0])
+        with self._lock:
+            if match == "exact":
+                self._stats.exact_hits += 1
+            else:
+                self._stats.semantic_hits += 1
+            self._stats.saved_ms += row[2]
+        return CachedAnswer(answer=row[1], match=match, similarity=similarity, saved_ms=row[2])
+
+    def store(self, question: str, scope: str, answer: str, latency_ms: float) -> None:
+        now = time.time()
+        vector = np.asarray(embed_query(question), dtype=np.float32)
+        with self.pool.write() as conn:
+            conn.execute(
+                "INSERT INTO response_cache "
+                "(scope, question, answer, embedder, embedding, latency_ms, created_at, last_hit_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT (scope, question) DO UPDATE SET "
+                "answer = excluded.answer, embedder = excluded.embedder, embedding = excluded.embedding, "
+                "latency_ms = excluded.latency_ms, created_at = excluded.created_at, "
+                "last_hit_at = excluded.last_hit_at;",
+                (
+                    scope,
+                    normalize_question(question),
+                    answer,
+                    get_embedder().name,
+                    vector.tobytes(),
+                    latency_ms,
+                    now,
+                    now,
+                ),
+            )
+            expired = conn.execute(
+                "DELETE FROM response_cache WHERE created_at <= ?;", (now - self.ttl_seconds,)
+            ).rowcount
+            overflow = conn.execute(
+                "DELETE FROM response_cache WHERE id IN ("
+                "  SELECT id FROM response_cache ORDER BY last_hit_at DESC LIMIT -1 OFFSET ?"
+                ");",
+                (self.max_entries,),
+            ).rowcount
+        with self._lock:
+            self._stats.stores += 1
+            self._stats.evictions += expired + overflow
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> Optional[ResponseCache]:
+    """The process-wide cache, or None when disabled (RESPONSE_CACHE_ENABLED=false)."""
+    global _cache
+    if not settings.RESPONSE_CACHE_ENABLED:
+        return None
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = ResponseCache(
+                    get_pool(settings.RESPONSE_CACHE_PATH),
+                    ttl_seconds=settings.RESPONSE_CACHE_TTL_SECONDS,
+                    max_entries=settings.RESPONSE_CACHE_MAX_ENTRIES,
+                    similarity=settings.RESPONSE_CACHE_SIMILARITY,
+                )
+    return _cache
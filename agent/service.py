@@ -0,0 +1,277 @@
+"""
+Async agent service shared by every chat session.
+
+All questions run on one event loop in a background thread. A question that
+is waiting on the model is a suspended coroutine, not a blocked thread, so
+many sessions can wait at once. The service also:
+
+* caps upstream calls in flight at AGENT_MAX_CONCURRENCY;
+* gives each question AGENT_DEADLINE_SECONDS to finish;
+* retries transient API errors with exponential backoff and jitter;
+* coalesces identical questions. When a question arrives while the same
+  question is already being answered, it follows that stream instead of
+  making a second upstream call.
+
+Sessions use the blocking ``stream``/``ask`` API from their own threads.
+"""
+import asyncio
+import atexit
+import concurrent.futures
+import logging
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from agent.agent import cached_answer, store_answer
+from agent.llm import astream_answer
+from agent.prompt_builder import Conversation
+from agent.prompts import SYSTEM_PROMPT
+from agent.rag import retrieve_docs
+from agent.response_cache import normalize_question
+from config.settings import settings
+
+try:
+    import openai
+
+    # Timeouts (APITimeoutError) are a subclass of APIConnectionError.
+    _RETRYABLE: tuple = (
+        openai.APIConnectionError,
+        openai.RateLimitError,
+        openai.InternalServerError,
+        ConnectionError,
+    )
+except ImportError:
+    _RETRYABLE = (ConnectionError,)
+
+
+logger = logging.getLogger(__name__)
+
+Generate = Callable[[str, List[str], Optional[Conversation]], AsyncIterator[str]]
+Retrieve = Callable[[str], List[str]]
+
+
+class AgentUnavailable(Exception):
+    """The question could not be answered (upstream errors after retries)."""
+
+
+class AgentTimeout(AgentUnavailable):
+    """The question did not finish within the deadline."""
+
+
+@dataclass
+class ServiceStats:
+    requests: int = 0
+    coalesced: int = 0
+    upstream_calls: int = 0
+    retries: int = 0
+    timeouts: int = 0
+    failures: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+
+
+def _generate(question: str, context_docs: List[str], conversation: Optional[Conversation]) -> AsyncIterator[str]:
+    return astream_answer(SYSTEM_PROMPT, question, context_docs, conversation)
+
+
+_END = object()
+
+
+class _Flight:
+    """One answer being produced and every caller waiting on it (loop thread only)."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop) -> None:
+        self.parts: List[str] = []
+        self.sinks: List[queue.Queue] = []
+        self.result: asyncio.Future = loop.create_future()
+        self.task: Optional[asyncio.Task] = None
+
+    def publish(self, piece: str) -> None:
+        self.parts.append(piece)
+        for sink in self.sinks:
+            sink.put(piece)
+
+    def subscribe(self, sink: queue.Queue) -> None:
+        # Late joiners first get what has been produced so far.
+        for piece in self.parts:
+            sink.put(piece)
+        if self.result.done():
+            sink.put(self.result.exception() or _END)
+        else:
+            self.sinks.append(sink)
+
+    def finish(self, error: Optional[BaseException] = None) -> None:
+        if error is None:
+            self.result.set_result("".join(self.parts))
+        else:
+            self.result.set_exception(error)
+            # Mark the exception as retrieved; stream() callers get it via their sink.
+            self.result.exception()
+        for sink in self.sinks:
+            sink.put(error or _END)
+        self.sinks.clear()
+
+
+class AgentService:
+    def __init__(
+        self,
+        max_concurrency: int = 16,
+        deadline_seconds: float = 90,
+        max_retries: int = 2,
+        backoff_seconds: float = 0.5,
+        generate: Generate = _generate,
+        retrieve: Retrieve = retrieve_docs,
+    ) -> None:
+        self.max_concurrency = max(1, max_concurrency)
+        self.deadline_seconds = deadline_seconds
+        self.max_retries = max(0, max_retries)
+        self.backoff_seconds = backoff_seconds
+        self.generate = generate
+        self.retrieve = retrieve
+        self._stats = ServiceStats()
+        self._flights: Dict[str, _Flight] = {}
+
+        self._loop = asyncio.new_event_loop()
+        # Retrieval and the SQLite response cache are short blocking calls;
+        # a few threads are enough because the model calls themselves are async.
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=4, thread_name_prefix="agent-io")
+        self._loop.set_default_executor(self._executor)
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="agent-service", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Event loop side
+    # ------------------------------------------------------------------
+    def _join(self, question: str, conversation: Optional[Conversation], sink: Optional[queue.Queue]) -> _Flight:
+        # A follow-up only coalesces with the same question in the same conversation.
+        key = normalize_question(question)
+        if conversation:
+            key += "\x00" + conversation.fingerprint()
+        self._stats.requests += 1
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = self._flights[key] = _Flight(self._loop)
+            flight.task = self._loop.create_task(self._run(key, question, conversation, flight))
+        else:
+            self._stats.coalesced += 1
+        if sink is not None:
+            flight.subscribe(sink)
+        return flight
+
+    async def _run(self, key: str, question: str, conversation: Optional[Conversation], flight: _Flight) -> None:
+        self._stats.in_flight += 1
+        self._stats.peak_in_flight = max(self._stats.peak_in_flight, self._stats.in_flight)
+        try:
+            await asyncio.wait_for(self._answer(question, conversation, flight), self.deadline_seconds)
+            flight.finish()
+        except asyncio.TimeoutError:
+            self._stats.timeouts += 1
+            flight.finish(AgentTimeout(f"Sem resposta em {self.deadline_seconds:g}s."))
+        except Exception as e:
+            self._stats.failures += 1
+            logger.exception("Falha ao responder a pergunta do agente.")
+            error = AgentUnavailable(str(e))
+            error.__cause__ = e
+            flight.finish(error)
+        finally:
+            self._stats.in_flight -= 1
+            # Later askers go through the response cache, not this flight.
+            if self._flights.get(key) is flight:
+                del self._flights[key]
+
+    async def _answer(self, question: str, conversation: Optional[Conversation], flight: _Flight) -> None:
+        loop = asyncio.get_running_loop()
+        context_docs = await loop.run_in_executor(None, self.retrieve, question)
+        hit, scope = await loop.run_in_executor(None, cached_answer, question, context_docs, conversation)
+        if hit is not None:
+            flight.publish(hit.answer)
+            return
+
+        start = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            try:
+                async with self._semaphore:
+                    self._stats.upstream_calls += 1
+                    async for piece in self.generate(question, context_docs, conversation):
+                        flight.publish(piece)
+                break
+            except _RETRYABLE as e:
+                # Once text has reached the caller a retry would repeat it.
+                if flight.parts or attempt == self.max_retries:
+                    raise
+                self._stats.retries += 1
+                delay = self.backoff_seconds * 2 ** attempt * (0.5 + random.random())
+                logger.warning("Erro transitório do LLM (%s); nova tentativa em %.2fs.", e, delay)
+                await asyncio.sleep(delay)
+
+        latency_ms = (time.perf_counter() - start) * 1000
+        await loop.run_in_executor(None, store_answer, question, scope, "".join(flight.parts), latency_ms)
+
+    async def _wait(self, question: str, conversation: Optional[Conversation]) -> str:
+        return await asyncio.shield(self._join(question, conversation, None).result)
+
+    # ------------------------------------------------------------------
+    # Public API (any thread)
+    # ------------------------------------------------------------------
+    def stream(self, question: str, conversation: Optional[Conversation] = None) -> Iterator[str]:
+        """Yield the answer as it is generated; raises AgentUnavailable on failure."""
+        sink: queue.Queue = queue.Queue()
+        # The caller keeps adding turns to its conversation; answer from a snapshot.
+        snapshot = conversation.copy() if conversation else None
+        self._loop.call_soon_threadsafe(self._join, question, snapshot, sink)
+        # The flight enforces the deadline; this only guards against a stalled loop.
+        patience = self.deadline_seconds + 5
+        while True:
+            try:
+                item = sink.get(timeout=patience)
+            except queue.Empty:
+                raise AgentTimeout(f"Sem resposta em {self.deadline_seconds:g}s.") from None
+            if item is _END:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def submit(self, question: str, conversation: Optional[Conversation] = None) -> "concurrent.futures.Future[str]":
+        """Start answering ``question``; the future resolves to the full answer."""
+        snapshot = conversation.copy() if conversation else None
+        return asyncio.run_coroutine_threadsafe(self._wait(question, snapshot), self._loop)
+
+    def ask(self, question: str, conversation: Optional[Conversation] = None, timeout: Optional[float] = None) -> str:
+        return self.submit(question, conversation).result(timeout)
+
+    def stats(self) -> ServiceStats:
+        # Counters are only written on the loop thread; this is a snapshot.
+        return ServiceStats(**vars(self._stats))
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._executor.shutdown(wait=False)
+        self._loop.close()
+
+
+_service: Optional[AgentService] = None
+_service_lock = threading.Lock()
+
+
+def get_agent_service() -> AgentService:
+    """Return the process-wide agent service, creating it on first use."""
+    global _service
+    if _service is None:
+        with _service_lock:
+            if _service is None:
+                _service = AgentService(
+                    max_concurrency=settings.AGENT_MAX_CONCURRENCY,
+                    deadline_seconds=settings.AGENT_DEADLINE_SECONDS,
+                    max_retries=settings.AGENT_MAX_RETRIES,
+                    backoff_seconds=settings.AGENT_RETRY_BACKOFF_SECONDS,
+                )
+                atexit.register(_service.close)
+    return _service
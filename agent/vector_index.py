@@ -0,0 +1,178 @@
+"""
+In-process vector index: one normalized float32 matrix, searched with a
+single matrix product and ``argpartition`` for top-k.
+
+Persisted as ``vectors.npy`` (opened memory-mapped, so startup does not read
+the whole matrix) next to ``meta.json`` with ids, documents, content hashes
+and the embedder/knowledge-base versions the vectors were built from.
+"""
+import hashlib
+import json
+import os
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+@dataclass(frozen=True)
+class SearchHit:
+    id: str
+    document: str
+    score: float
+    metadata: Dict[str, Any]
+
+
+class VectorIndex:
+    def __init__(
+        self,
+        ids: Sequence[str],
+        documents: Sequence[str],
+        vectors: np.ndarray,
+        metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+        info: Optional[Dict[str, Any]] = None,
+        hashes: Optional[Sequence[str]] = None,
+    ) -> None:
+        if len(ids) != len(documents) or len(ids) != len(vectors):
+            raise ValueError("ids, documents e vetores precisam ter o mesmo tamanho.")
+        self.ids = list(ids)
+        self.documents = list(documents)
+        self.metadatas = list(metadatas) if metadatas is not None else [{} for _ in self.ids]
+        self.hashes = list(hashes) if hashes is not None else [content_hash(d) for d in self.documents]
+        self.vectors = vectors
+        # Free-form build information (embedder name, knowledge base version...).
+        self.info = dict(info or {})
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def search(self, queries: np.ndarray, k: int = 4) -> List[List[SearchHit]]:
+        """
+        Top-``k`` documents for each row of ``queries`` (normalized vectors),
+        best first. Only the k best scores per row are sorted.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        n = len(self.ids)
+        k = min(k, n)
+        if k <= 0:
+            return [[] for _ in range(len(queries))]
+
+        scores = queries @ self.vectors.T
+        if k < n:
+            top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        else:
+            top = np.broadcast_to(np.arange(n), (len(queries), n))
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1, kind="stable")
+        top = np.take_along_axis(top, order, axis=1)
+
+        return [
+            [
+                SearchHit(self.ids[i], self.documents[i], float(scores[row, i]), self.metadatas[i])
+                for i in top[row]
+            ]
+            for row in range(len(queries))
+        ]
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def save(self, directory: str) -> None:
+        """
+        Each file is replaced atomically; a reader catching one old and one
+        new file gets a size mismatch from ``load`` and rebuilds.
+        """
+        os.makedirs(directory, exist_ok=True)
+        vectors_tmp = os.path.join(directory, "vectors.npy.tmp")
+        meta_tmp = os.path.join(directory, "meta.json.tmp")
+        with open(vectors_tmp, "wb") as f:
+            np.save(f, np.ascontiguousarray(self.vectors, dtype=np.float32))
+        with open(meta_tmp, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "ids": self.ids,
+                    "documents": self.documents,
+                    "metadatas": self.metadatas,
+                    "hashes": self.hashes,
+                    "info": self.info,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(vectors_tmp, os.path.join(directory, "vectors.npy"))
+        os.replace(meta_tmp, os.path.join(directory, "meta.json"))
+
+    @classmethod
+    def load(cls, directory: str, mmap: bool = True) -> Optional["VectorIndex"]:
+        """Open a saved index, or return None when there is none (or it is unreadable)."""
+        try:
+            with open(os.path.join(directory, "meta.json"), encoding="utf-8") as f:
+                meta = json.load(f)
+            vectors = np.load(os.path.join(directory, "vectors.npy"), mmap_mode="r" if mmap else None)
+            return cls(
+                meta["ids"],
+                meta["documents"],
+                vectors,
+                meta.get("metadatas"),
+                meta.get("info"),
+                meta.get("hashes"),
+            )
+        except (OSError, ValueError, KeyError):
+            return None
+
+
+@dataclass(frozen=True)
+class SyncReport:
+    embedded: int
+    reused: int
+    deleted: int
+
+
+def sync_index(
+    previous: Optional[VectorIndex],
+    ids: Sequence[str],
+    documents: Sequence[str],
+    embed,
+    metadatas: Optional[Sequence[Dict[str, Any]]] = None,
+    info: Optional[Dict[str, Any]] = None,
+) -> "tuple[VectorIndex, SyncReport]":
+    """
+    Build an index for ``documents`` reusing ``previous`` vectors by content
+    hash: only new or edited texts go to ``embed`` (in a single batch), and
+    entries whose text disappeared are dropped.
+    """
+    hashes = [content_hash(d) for d in documents]
+    known: Dict[str, int] = {}
+    if previous is not None:
+        known = {h: row for row, h in enumerate(previous.hashes)}
+
+    missing = sorted({h: d for h, d in zip(hashes, documents) if h not in known}.items())
+    fresh: Dict[str, np.ndarray] = {}
+    if missing:
+        vectors = embed([d for _, d in missing])
+        fresh = {h: vectors[i] for i, (h, _) in enumerate(missing)}
+
+    if fresh:
+        dim = len(next(iter(fresh.values())))
+    else:
+        dim = previous.vectors.shape[1] if previous is not None else 0
+    matrix = np.empty((len(documents), dim), dtype=np.float32)
+    reused = 0
+    for row, h in enumerate(hashes):
+        if h in fresh:
+            matrix[row] = fresh[h]
+        else:
+            matrix[row] = previous.vectors[known[h]]
+            reused += 1
+
+    kept = set(hashes)
+    report = SyncReport(
+        embedded=len(missing),
+        reused=reused,
+        deleted=sum(1 for h in known if h not in kept),
+    )
+    return VectorIndex(ids, documents, matrix, metadatas, info, hashes), report
@@ -1,7 +1,6 @@
 import streamlit as st
 
-from db.connection import get_connection
-from db.init_db import initialize_db
+from db.init_db import bootstrap_database
 
 from ui.course import render_course_tab
 from ui.sandbox import render_sandbox_tab
@@ -22,9 +21,8 @@ def main() -> None:
     # Initialize XP and other state
     _ensure_state()
 
-    # Database connection
-    conn = get_connection()
-    initialize_db(conn)
+    # Database: migrations run once per process, then this is a dict lookup
+    pool = bootstrap_database()
 
     st.title("🎓 Curso Interativo de SQL")
 
@@ -41,11 +39,12 @@ def main() -> None:
     with tab_curso:
         render_course_tab()
 
+    # The tabs borrow a pooled reader per query, not for the whole render.
     with tab_sandbox:
-        render_sandbox_tab(conn)
+        render_sandbox_tab(pool)
 
     with tab_desafios:
-        render_challenges_tab(conn)
+        render_challenges_tab(pool)
 
     with tab_progresso:
         render_progress_tab()
@@ -0,0 +1,84 @@
+"""
+Concurrency benchmark for the async agent service.
+
+Simulates many chat sessions (one thread each, like Streamlit) asking
+questions at the same time, some of them identical, against a model with a
+fixed first-token delay and per-token delay. Reports throughput, latency
+percentiles, and how many upstream calls coalescing saved.
+
+Usage:
+    python -m benchmarks.bench_agent_service
+    python -m benchmarks.bench_agent_service --users 500 --distinct 50 --concurrency 32
+"""
+import argparse
+import asyncio
+import statistics
+import threading
+import time
+from typing import AsyncIterator, List, Optional
+
+from agent.prompt_builder import Conversation
+from agent.service import AgentService
+
+
+def _simulated_model(first_token_ms: float, token_ms: float, tokens: int):
+    async def generate(question: str, context_docs: List[str], conversation: Optional[Conversation]) -> AsyncIterator[str]:
+        await asyncio.sleep(first_token_ms / 1000)
+        for i in range(tokens):
+            if i:
+                await asyncio.sleep(token_ms / 1000)
+            yield f"t{i} "
+
+    return generate
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark do serviço assíncrono do agente.")
+    parser.add_argument("--users", type=int, default=200, help="sessões simultâneas")
+    parser.add_argument("--distinct", type=int, default=40, help="perguntas distintas entre as sessões")
+    parser.add_argument("--concurrency", type=int, default=16, help="chamadas ao modelo em paralelo")
+    parser.add_argument("--first-token-ms", type=float, default=300)
+    parser.add_argument("--token-ms", type=float, default=10)
+    parser.add_argument("--tokens", type=int, default=20)
+    args = parser.parse_args()
+
+    service = AgentService(
+        max_concurrency=args.concurrency,
+        generate=_simulated_model(args.first_token_ms, args.token_ms, args.tokens),
+        retrieve=lambda question: [],
+    )
+    latencies: List[float] = []
+    lock = threading.Lock()
+    barrier = threading.Barrier(args.users)
+
+    def session(i: int) -> None:
+        barrier.wait()
+        start = time.perf_counter()
+        answer = "".join(service.stream(f"Pergunta número {i % args.distinct}?"))
+        elapsed = (time.perf_counter() - start) * 1000
+        assert answer.startswith("t0 ")
+        with lock:
+            latencies.append(elapsed)
+
+    threads = [threading.Thread(target=session, args=(i,)) for i in range(args.users)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    service.close()
+
+    stats = service.stats()
+    latencies.sort()
+    print(f"{args.users} sessões, {args.distinct} perguntas distintas, até {args.concurrency} chamadas em paralelo")
+    print(f"tempo total       {wall:8.2f} s")
+    print(f"vazão             {args.users / wall:8.1f} respostas/s")
+    print(f"latência p50      {statistics.median(latencies):8.0f} ms")
+    print(f"latência p95      {latencies[int(len(latencies) * 0.95) - 1]:8.0f} ms")
+    print(f"chamadas ao LLM   {stats.upstream_calls:8d}  (coalescidas: {stats.coalesced})")
+    print(f"pico em andamento {stats.peak_in_flight:8d}")
+
+
+if __name__ == "__main__":
+    main()
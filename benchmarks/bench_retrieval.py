@@ -0,0 +1,104 @@
+"""
+Retrieval quality/latency benchmark over labelled course questions.
+
+Compares dense-only, BM25-only and hybrid (RRF + re-ranking) retrieval:
+hit@1, recall@3 and MRR against the passages each question should find,
+plus passages/tokens sent to the prompt and per-question latency.
+
+Usage:
+    python -m benchmarks.bench_retrieval
+    EMBEDDING_BACKEND=openai python -m benchmarks.bench_retrieval
+"""
+import argparse
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Sequence, Tuple
+
+from agent import rag
+from agent.chunking import count_tokens
+from config.settings import settings
+
+
+# (question, ids or id prefixes of the passages that answer it)
+LABELLED: Sequence[Tuple[str, Sequence[str]]] = [
+    ("O que é DCL?", ["modulo3:3"]),
+    ("Para que serve o GROUP BY?", ["sql_basics"]),
+    ("Quais métricas ficam na fato_marketing?", ["modulo5:3", "dim_fato", "course_context"]),
+    ("O que acontece na camada prata?", ["modulo4:2", "medallion"]),
+    ("O que é a camada bronze?", ["modulo4:1", "medallion"]),
+    ("A camada ouro serve para quê?", ["modulo4:3", "medallion"]),
+    ("Diferença entre star schema e snowflake", ["modulo4:4", "modulo4:5", "star_schema", "snowflake_schema"]),
+    ("Exemplos de dados semiestruturados", ["modulo2:1"]),
+    ("Fotos e vídeos são que tipo de dado?", ["modulo2:2"]),
+    ("Como criar uma tabela com CREATE TABLE?", ["modulo3:0"]),
+    ("Como usar COMMIT e ROLLBACK em transações?", ["modulo3:4"]),
+    ("O que guarda a dimensão produto?", ["modulo5:1"]),
+    ("Quais canais ficam na dimensão campanha?", ["modulo5:2"]),
+    ("O que é um banco de dados?", ["modulo1:"]),
+    ("Comandos INSERT e UPDATE", ["modulo3:1"]),
+    ("Qual é o cenário do curso?", ["course_context", "modulo5:0"]),
+    ("O que é JOIN entre tabelas?", ["sql_basics"]),
+    ("GRANT e REVOKE", ["modulo3:3"]),
+]
+
+MODES = ("dense", "bm25", "hybrid")
+
+
+def _relevant(hit_id: str, labels: Sequence[str]) -> bool:
+    return any(hit_id == label or hit_id.startswith(label) for label in labels)
+
+
+def _evaluate(mode: str, repeat: int) -> Dict[str, float]:
+    hits_at_1, recall_at_3, reciprocal = [], [], []
+    passages, tokens, latencies = [], [], []
+    for question, labels in LABELLED:
+        ranked = rag.retrieve(question, k=10, max_tokens=10**9, mode=mode)
+        ranks = [i for i, hit in enumerate(ranked) if _relevant(hit.id, labels)]
+        hits_at_1.append(1.0 if ranks and ranks[0] == 0 else 0.0)
+        # Share of the labels that some passage in the top 3 belongs to.
+        found = {label for hit in ranked[:3] for label in labels if _relevant(hit.id, [label])}
+        recall_at_3.append(len(found) / len(labels))
+        reciprocal.append(1.0 / (ranks[0] + 1) if ranks else 0.0)
+
+        for _ in range(repeat):
+            start = time.perf_counter()
+            context = rag.retrieve(question, mode=mode)
+            latencies.append((time.perf_counter() - start) * 1000)
+        passages.append(len(context))
+        tokens.append(sum(count_tokens(hit.document) for hit in context))
+
+    latencies.sort()
+    return {
+        "hit@1": statistics.mean(hits_at_1),
+        "recall@3": statistics.mean(recall_at_3),
+        "MRR": statistics.mean(reciprocal),
+        "passagens": statistics.mean(passages),
+        "tokens": statistics.mean(tokens),
+        "p50 ms": latencies[len(latencies) // 2],
+        "p95 ms": latencies[int(len(latencies) * 0.95) - 1],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark de recuperação (RAG).")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    # Build a throwaway index instead of touching data/vector_store.
+    with tempfile.TemporaryDirectory() as tmp:
+        settings.VECTOR_PATH = tmp
+        settings.VECTOR_INDEX = "numpy"
+        rag.retrieve("aquecimento")
+
+        results: List[Tuple[str, Dict[str, float]]] = [(m, _evaluate(m, args.repeat)) for m in MODES]
+
+    columns = list(results[0][1])
+    print(f"{len(LABELLED)} perguntas rotuladas, {len(rag.get_knowledge_base())} passagens indexadas\n")
+    print(f"{'modo':<8}" + "".join(f"{c:>11}" for c in columns))
+    for mode, metrics in results:
+        print(f"{mode:<8}" + "".join(f"{metrics[c]:>11.3f}" for c in columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Before/after benchmark for the star-schema indexes and dim_tempo.
+
+"Before" drops the fact/date indexes and filters/rolls up on the TEXT date;
+"after" restores the indexes and uses the integer id_tempo keys.
+
+Usage:
+    python -m benchmarks.bench_star_schema --facts 2000000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+from typing import Dict, List, Tuple
+
+from db.generator import INDEXED_TABLES, _drop_indexes, generate
+from db.init_db import bootstrap_database
+from utils.challenges import get_challenges
+
+
+BEFORE_ONLY = {
+    "filtro por mês": """
+        SELECT SUM(vendas), SUM(gastos)
+        FROM fato_marketing
+        WHERE data BETWEEN '2024-03-01' AND '2024-03-31'
+    """,
+    "rollup mensal": """
+        SELECT substr(data, 1, 7) AS mes, SUM(vendas)
+        FROM fato_marketing
+        GROUP BY substr(data, 1, 7)
+    """,
+}
+
+AFTER_ONLY = {
+    "filtro por mês": """
+        SELECT SUM(vendas), SUM(gastos)
+        FROM fato_marketing
+        WHERE id_tempo BETWEEN 20240301 AND 20240331
+    """,
+    "rollup mensal": """
+        SELECT t.id_mes, SUM(f.vendas)
+        FROM fato_marketing f
+        JOIN dim_tempo t ON t.id_tempo = f.id_tempo
+        GROUP BY t.id_mes
+    """,
+}
+
+
+def _time_query(conn: sqlite3.Connection, sql: str, repeat: int) -> float:
+    samples: List[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        conn.execute(sql).fetchall()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples) * 1000
+
+
+def _run(conn: sqlite3.Connection, queries: Dict[str, str], repeat: int) -> Dict[str, float]:
+    return {name: _time_query(conn, sql, repeat) for name, sql in queries.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--facts", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_star_")
+    db_path = os.path.join(workdir, "bench.db")
+    pool = bootstrap_database(db_path)
+    with pool.write() as conn:
+        report = generate(conn, facts=args.facts, products=200, campaigns=60, reset=True)
+    print(f"Dados: {report.facts:,} fatos gerados em {report.seconds:.1f}s")
+
+    challenge_queries = {f"desafio {c['id']}": c["expected_query"] for c in get_challenges()}
+
+    with pool.write() as conn:
+        index_ddl = _drop_indexes(conn, INDEXED_TABLES)
+        conn.commit()
+        conn.execute("ANALYZE;")
+        before = _run(conn, {**challenge_queries, **BEFORE_ONLY}, args.repeat)
+
+        conn.execute("BEGIN;")
+        for ddl in index_ddl:
+            conn.execute(ddl)
+        conn.commit()
+        conn.execute("ANALYZE;")
+        after = _run(conn, {**challenge_queries, **AFTER_ONLY}, args.repeat)
+
+    rows: List[Tuple[str, float, float]] = [(name, before[name], after[name]) for name in before]
+    width = max(len(name) for name, _, _ in rows)
+    print(f"{'consulta'.ljust(width)}  {'antes (ms)':>11}  {'depois (ms)':>11}  {'ganho':>7}")
+    for name, b, a in rows:
+        print(f"{name.ljust(width)}  {b:11.1f}  {a:11.1f}  {b / a if a else float('inf'):6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,10 +9,85 @@ class Settings:
     """Central place for configuration."""
 
     OPENAI_API_KEY: str | None = os.getenv("OPENAI_API_KEY")
+    # Alternative OpenAI-compatible endpoint (e.g. agent.fake_llm_server for tests)
+    OPENAI_BASE_URL: str | None = os.getenv("OPENAI_BASE_URL")
+    LLM_MODEL: str = os.getenv("LLM_MODEL", "gpt-4.1-mini")
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_MAX_CONNECTIONS: int = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
 
     # Paths (can be overridden in .env)
     DB_PATH: str = os.getenv("DB_PATH", "data/marketing_bebidas.db")
     VECTOR_PATH: str = os.getenv("VECTOR_PATH", "data/vector_store")
+    # Optional prebuilt database copied to DB_PATH on first start instead of seeding
+    DB_IMAGE_PATH: str | None = os.getenv("DB_IMAGE_PATH")
+
+    # Connection pool
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "8"))
+    DB_POOL_TIMEOUT: float = float(os.getenv("DB_POOL_TIMEOUT", "5"))
+    DB_POOL_HEALTHCHECK_SECONDS: float = float(os.getenv("DB_POOL_HEALTHCHECK_SECONDS", "30"))
+
+    # Paginated query execution (sandbox / chat)
+    QUERY_PAGE_SIZE: int = int(os.getenv("QUERY_PAGE_SIZE", "500"))
+    QUERY_MAX_ROWS: int = int(os.getenv("QUERY_MAX_ROWS", "10000"))
+    QUERY_MAX_BYTES: int = int(os.getenv("QUERY_MAX_BYTES", str(16 * 1024 * 1024)))
+    QUERY_COUNT_CAP: int = int(os.getenv("QUERY_COUNT_CAP", "100000"))
+
+    # Budgets for student SQL (sandbox, challenges, chat)
+    QUERY_TIMEOUT_MS: int = int(os.getenv("QUERY_TIMEOUT_MS", "5000"))
+    QUERY_MAX_STEPS: int = int(os.getenv("QUERY_MAX_STEPS", "500000000"))
+
+    # Result cache for read-only queries
+    RESULT_CACHE_MAX_ENTRIES: int = int(os.getenv("RESULT_CACHE_MAX_ENTRIES", "256"))
+    RESULT_CACHE_MAX_BYTES: int = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+
+    # Challenge grading: "auto" | "hash" (fingerprints) | "sql" (in-database diff)
+    GRADING_MODE: str = os.getenv("GRADING_MODE", "auto")
+    GRADING_IN_DB_MIN_ROWS: int = int(os.getenv("GRADING_IN_DB_MIN_ROWS", "10000"))
+
+    # Student progress (XP / completed challenges), kept apart from the course data
+    PROGRESS_DB_PATH: str = os.getenv("PROGRESS_DB_PATH", "data/progress.db")
+    PROGRESS_BATCH_SIZE: int = int(os.getenv("PROGRESS_BATCH_SIZE", "100"))
+    PROGRESS_FLUSH_MS: float = float(os.getenv("PROGRESS_FLUSH_MS", "200"))
+
+    # Retrieval: "numpy" (in-process, memory-mapped) or "chroma" (needs OPENAI_API_KEY)
+    VECTOR_INDEX: str = os.getenv("VECTOR_INDEX", "numpy")
+    # Embeddings for the NumPy index: "auto" (OpenAI when configured), "openai" or "hashing"
+    EMBEDDING_BACKEND: str = os.getenv("EMBEDDING_BACKEND", "auto")
+    EMBEDDING_DIM: int = int(os.getenv("EMBEDDING_DIM", "512"))
+    QUERY_EMBEDDING_CACHE_SIZE: int = int(os.getenv("QUERY_EMBEDDING_CACHE_SIZE", "1024"))
+    # Course modules are indexed in chunks of at most this many tokens
+    RAG_CHUNK_TOKENS: int = int(os.getenv("RAG_CHUNK_TOKENS", "120"))
+    RAG_CHUNK_OVERLAP: int = int(os.getenv("RAG_CHUNK_OVERLAP", "24"))
+    # Retrieval: "hybrid" (BM25 + vectors, re-ranked), "dense" or "bm25"
+    RAG_MODE: str = os.getenv("RAG_MODE", "hybrid")
+    # Token budget for the passages retrieved for one question
+    RAG_CONTEXT_TOKENS: int = int(os.getenv("RAG_CONTEXT_TOKENS", "600"))
+    RAG_MIN_RELATIVE_SCORE: float = float(os.getenv("RAG_MIN_RELATIVE_SCORE", "0.5"))
+
+    # Agent response cache (exact + semantic matches)
+    RESPONSE_CACHE_ENABLED: bool = os.getenv("RESPONSE_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+    RESPONSE_CACHE_PATH: str = os.getenv("RESPONSE_CACHE_PATH", "data/response_cache.db")
+    RESPONSE_CACHE_TTL_SECONDS: float = float(os.getenv("RESPONSE_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    RESPONSE_CACHE_MAX_ENTRIES: int = int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "5000"))
+    RESPONSE_CACHE_SIMILARITY: float = float(os.getenv("RESPONSE_CACHE_SIMILARITY", "0.92"))
+
+    # Prompt assembly: total budget, share for the conversation, rolling summary
+    PROMPT_TOKEN_BUDGET: int = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+    PROMPT_HISTORY_TOKENS: int = int(os.getenv("PROMPT_HISTORY_TOKENS", "800"))
+    PROMPT_SUMMARY_TOKENS: int = int(os.getenv("PROMPT_SUMMARY_TOKENS", "200"))
+    # Chat messages kept on screen; older ones live on in the summary
+    CHAT_HISTORY_MAX_MESSAGES: int = int(os.getenv("CHAT_HISTORY_MAX_MESSAGES", "40"))
+
+    # Chat guardrail rules (one term per line; see agent/guardrail.py)
+    GUARDRAIL_RULES_PATH: str = os.getenv(
+        "GUARDRAIL_RULES_PATH", os.path.join(os.path.dirname(__file__), "guardrail_rules.txt")
+    )
+
+    # Agent service: concurrent LLM calls, per-question deadline and retries
+    AGENT_MAX_CONCURRENCY: int = int(os.getenv("AGENT_MAX_CONCURRENCY", "16"))
+    AGENT_DEADLINE_SECONDS: float = float(os.getenv("AGENT_DEADLINE_SECONDS", "90"))
+    AGENT_MAX_RETRIES: int = int(os.getenv("AGENT_MAX_RETRIES", "2"))
+    AGENT_RETRY_BACKOFF_SECONDS: float = float(os.getenv("AGENT_RETRY_BACKOFF_SECONDS", "0.5"))
 
 
 settings = Settings()
@@ -1,17 +1,323 @@
+import itertools
 import os
+import queue
 import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.request import pathname2url
+
 from config.settings import settings
 
 
-def get_connection() -> sqlite3.Connection:
-    """
-    Create a SQLite connection and ensure directories exist.
-    """
-    db_path = settings.DB_PATH
+def _ensure_parent_dir(db_path: str) -> None:
     db_dir = os.path.dirname(db_path)
     if db_dir and not os.path.exists(db_dir):
         os.makedirs(db_dir, exist_ok=True)
 
-    conn = sqlite3.connect(db_path)
-    conn.execute("PRAGMA foreign_keys = ON;")
+
+# ----------------------------------------------------------------------
+# Data versions
+# ----------------------------------------------------------------------
+# A per-file epoch that moves whenever data may have changed: on every
+# local write, and whenever a connection's ``PRAGMA data_version`` (commits by
+# other connections/processes) or ``total_changes`` (its own writes, even
+# outside ``ConnectionPool.write``) differs from what it reported last time.
+_versions_lock = threading.Lock()
+_epochs: Dict[str, int] = {}
+_seen: Dict[int, Tuple[str, int, int]] = {}
+# In-memory databases are private to their connection, so each one gets its
+# own key. Tracked in-memory connections are kept alive until
+# forget_connection, so their id() cannot be reused by another connection.
+_memory: Dict[int, sqlite3.Connection] = {}
+_memory_ids = itertools.count(1)
+
+
+def _conn_path(conn: sqlite3.Connection) -> str:
+    row = conn.execute("PRAGMA database_list;").fetchone()
+    if row and row[2]:
+        return os.path.abspath(row[2])
+    return f":memory:{next(_memory_ids)}"
+
+
+def note_write(db_path: str) -> None:
+    """Record that data in ``db_path`` changed."""
+    path = os.path.abspath(db_path)
+    with _versions_lock:
+        _epochs[path] = _epochs.get(path, 0) + 1
+
+
+def data_version(conn: sqlite3.Connection) -> Tuple[str, int]:
+    """
+    Return ``(db_path, epoch)`` for the data visible through ``conn``.
+    The epoch only ever grows; equal epochs mean unchanged data.
+    """
+    state = (conn.execute("PRAGMA data_version;").fetchone()[0], conn.total_changes)
+    with _versions_lock:
+        seen = _seen.get(id(conn))
+    path = seen[0] if seen else _conn_path(conn)
+    with _versions_lock:
+        if seen is None or seen[1:] != state:
+            # First sight of a connection is treated as a change: we cannot
+            # know what was committed before it started observing.
+            _epochs[path] = _epochs.get(path, 0) + 1
+            _seen[id(conn)] = (path, *state)
+            if path.startswith(":memory:"):
+                _memory[id(conn)] = conn
+        return path, _epochs.get(path, 0)
+
+
+def forget_connection(conn: sqlite3.Connection) -> None:
+    with _versions_lock:
+        _seen.pop(id(conn), None)
+        _memory.pop(id(conn), None)
+
+
+def connect_readonly(db_path: str, timeout: float = 5.0) -> sqlite3.Connection:
+    """
+    Open ``db_path`` read-only (``mode=ro`` + ``query_only``). The connection
+    may be handed between threads, one user at a time.
+    """
+    uri = f"file:{pathname2url(os.path.abspath(db_path))}?mode=ro"
+    conn = sqlite3.connect(uri, uri=True, check_same_thread=False, timeout=timeout)
+    conn.execute("PRAGMA query_only = ON;")
     return conn
+
+
+class PoolTimeout(sqlite3.OperationalError):
+    """Raised when no pooled connection becomes available in time."""
+
+
+@dataclass
+class PoolStats:
+    db_path: str
+    max_size: int
+    open_readers: int
+    idle_readers: int
+    in_use: int
+    checkouts: int
+    waits: int
+    wait_time_ms: float
+    health_check_failures: int
+    writes: int
+
+
+class ConnectionPool:
+    """
+    Process-wide pool of SQLite connections for a single database file.
+
+    Readers are opened read-only (``mode=ro``) and shared across threads, one
+    borrower at a time, so ``check_same_thread`` is disabled on purpose.
+    Writes go through a single dedicated connection guarded by a lock, which
+    also switches the file to WAL so readers never block on the writer.
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        max_size: int = 8,
+        timeout: float = 5.0,
+        healthcheck_seconds: float = 30.0,
+    ) -> None:
+        _ensure_parent_dir(db_path)
+        self.db_path = db_path
+        self.max_size = max(1, max_size)
+        self.timeout = timeout
+        self.healthcheck_seconds = healthcheck_seconds
+
+        # LIFO keeps the most recently used (warm page cache) connections in play.
+        self._idle: "queue.LifoQueue[tuple[sqlite3.Connection, float]]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._open_readers = 0
+        self._checkouts = 0
+        self._waits = 0
+        self._wait_time = 0.0
+        self._health_failures = 0
+
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writes = 0
+
+        # Opening the writer first creates the file and enables WAL before
+        # any read-only connection tries to attach to it.
+        with self._write_lock:
+            self._get_writer()
+
+    # ------------------------------------------------------------------
+    # Connection factories
+    # ------------------------------------------------------------------
+    def _open_reader(self) -> sqlite3.Connection:
+        return connect_readonly(self.db_path, self.timeout)
+
+    def _get_writer(self) -> sqlite3.Connection:
+        if self._writer is None:
+            conn = sqlite3.connect(self.db_path, check_same_thread=False, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode = WAL;")
+            conn.execute("PRAGMA synchronous = NORMAL;")
+            conn.execute("PRAGMA foreign_keys = ON;")
+            self._writer = conn
+        return self._writer
+
+    # ------------------------------------------------------------------
+    # Read path
+    # ------------------------------------------------------------------
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1;").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _acquire(self) -> sqlite3.Connection:
+        while True:
+            try:
+                conn, last_used = self._idle.get_nowait()
+            except queue.Empty:
+                with self._lock:
+                    can_open = self._open_readers < self.max_size
+                    if can_open:
+                        self._open_readers += 1
+                if can_open:
+                    try:
+                        return self._open_reader()
+                    except Exception:
+                        with self._lock:
+                            self._open_readers -= 1
+                        raise
+
+                start = time.perf_counter()
+                try:
+                    conn, last_used = self._idle.get(timeout=self.timeout)
+                except queue.Empty:
+                    raise PoolTimeout(
+                        f"Nenhuma conexão disponível após {self.timeout:.1f}s "
+                        f"(pool com {self.max_size} conexões)."
+                    ) from None
+                finally:
+                    with self._lock:
+                        self._waits += 1
+                        self._wait_time += time.perf_counter() - start
+
+            if time.monotonic() - last_used < self.healthcheck_seconds or self._is_healthy(conn):
+                return conn
+
+            with self._lock:
+                self._health_failures += 1
+                self._open_readers -= 1
+            forget_connection(conn)
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    def _release(self, conn: sqlite3.Connection) -> None:
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            with self._lock:
+                self._open_readers -= 1
+            forget_connection(conn)
+            conn.close()
+            return
+        self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection for the duration of the block."""
+        conn = self._acquire()
+        with self._lock:
+            self._checkouts += 1
+        try:
+            yield conn
+        finally:
+            self._release(conn)
+
+    # ------------------------------------------------------------------
+    # Write path
+    # ------------------------------------------------------------------
+    @contextmanager
+    def write(self) -> Iterator[sqlite3.Connection]:
+        """
+        Serialize writers on the dedicated write connection.
+        Commits on success and rolls back on error.
+        """
+        with self._write_lock:
+            conn = self._get_writer()
+            try:
+                yield conn
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            finally:
+                self._writes += 1
+                note_write(self.db_path)
+
+    # ------------------------------------------------------------------
+    # Introspection / lifecycle
+    # ------------------------------------------------------------------
+    def stats(self) -> PoolStats:
+        with self._lock:
+            idle = self._idle.qsize()
+            return PoolStats(
+                db_path=self.db_path,
+                max_size=self.max_size,
+                open_readers=self._open_readers,
+                idle_readers=idle,
+                in_use=self._open_readers - idle,
+                checkouts=self._checkouts,
+                waits=self._waits,
+                wait_time_ms=self._wait_time * 1000,
+                health_check_failures=self._health_failures,
+                writes=self._writes,
+            )
+
+    def close(self) -> None:
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            forget_connection(conn)
+            conn.close()
+            with self._lock:
+                self._open_readers -= 1
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
+
+
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: Optional[str] = None) -> ConnectionPool:
+    """
+    Return the process-wide pool for ``db_path`` (defaults to settings.DB_PATH).
+    """
+    path = os.path.abspath(db_path or settings.DB_PATH)
+    pool = _pools.get(path)
+    if pool is not None:
+        return pool
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None:
+            pool = ConnectionPool(
+                path,
+                max_size=settings.DB_POOL_SIZE,
+                timeout=settings.DB_POOL_TIMEOUT,
+                healthcheck_seconds=settings.DB_POOL_HEALTHCHECK_SECONDS,
+            )
+            _pools[path] = pool
+        return pool
+
+
+def pool_stats() -> list[PoolStats]:
+    """Statistics for every pool opened in this process."""
+    with _pools_lock:
+        pools = list(_pools.values())
+    return [p.stats() for p in pools]
@@ -0,0 +1,73 @@
+import sqlite3
+from datetime import date, timedelta
+from typing import Iterator, Tuple
+
+
+# Default calendar loaded by the migration; loaders extend it as needed.
+CALENDAR_START = date(2020, 1, 1)
+CALENDAR_END = date(2030, 12, 31)
+
+NOMES_MES = [
+    "Janeiro", "Fevereiro", "Março", "Abril", "Maio", "Junho",
+    "Julho", "Agosto", "Setembro", "Outubro", "Novembro", "Dezembro",
+]
+NOMES_DIA = ["Segunda", "Terça", "Quarta", "Quinta", "Sexta", "Sábado", "Domingo"]
+
+
+def date_key(d: date) -> int:
+    """Integer surrogate key in YYYYMMDD form."""
+    return d.year * 10000 + d.month * 100 + d.day
+
+
+def calendar_rows(start: date, end: date) -> Iterator[Tuple]:
+    d = start
+    one_day = timedelta(days=1)
+    while d <= end:
+        iso_year, iso_week, iso_weekday = d.isocalendar()
+        trimestre = (d.month - 1) // 3 + 1
+        yield (
+            date_key(d),
+            d.isoformat(),
+            d.year,
+            trimestre,
+            d.year * 10 + trimestre,
+            d.month,
+            d.year * 100 + d.month,
+            NOMES_MES[d.month - 1],
+            iso_year * 100 + iso_week,
+            iso_week,
+            d.day,
+            iso_weekday,
+            NOMES_DIA[iso_weekday - 1],
+            1 if iso_weekday >= 6 else 0,
+        )
+        d += one_day
+
+
+def ensure_calendar(conn: sqlite3.Connection, start: date, end: date) -> None:
+    """Insert any missing dim_tempo rows between start and end (inclusive)."""
+    conn.executemany(
+        "INSERT OR IGNORE INTO dim_tempo ("
+        "id_tempo, data, ano, trimestre, id_trimestre, mes, id_mes, nome_mes, "
+        "id_semana, semana_iso, dia, dia_semana, nome_dia_semana, fim_de_semana"
+        ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);",
+        calendar_rows(start, end),
+    )
+
+
+def load_default_calendar(conn: sqlite3.Connection) -> None:
+    """
+    Fill dim_tempo for the default range plus whatever dates already exist in
+    fato_marketing, then backfill fato_marketing.id_tempo.
+    """
+    ensure_calendar(conn, CALENDAR_START, CALENDAR_END)
+    low, high = conn.execute(
+        "SELECT MIN(date(data)), MAX(date(data)) FROM fato_marketing;"
+    ).fetchone()
+    if low and high:
+        ensure_calendar(conn, date.fromisoformat(low), date.fromisoformat(high))
+    conn.execute(
+        "UPDATE fato_marketing "
+        "SET id_tempo = CAST(strftime('%Y%m%d', data) AS INTEGER) "
+        "WHERE id_tempo IS NULL AND data IS NOT NULL;"
+    )
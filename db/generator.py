@@ -0,0 +1,286 @@
+"""
+Deterministic synthetic data for the star schema.
+
+Usage:
+    python -m db.generator --facts 1000000 --products 200 --campaigns 60 --reset
+"""
+import argparse
+import random
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import date, timedelta
+from itertools import islice
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from config.settings import settings
+from db.dim_tempo import date_key, ensure_calendar
+from db.gold import rebuild_gold, refresh_gold
+from db.init_db import bootstrap_database
+
+
+STAR_TABLES = ("dim_produto", "dim_campanha", "fato_marketing")
+INDEXED_TABLES = STAR_TABLES + ("dim_tempo",)
+
+CATEGORIAS = {
+    "Refrigerante": ["Cola", "Guaraná", "Limão", "Laranja", "Uva", "Tônica"],
+    "Água": ["Mineral", "Com Gás", "Saborizada", "Alcalina"],
+    "Suco": ["Tropical", "Uva", "Laranja", "Maçã", "Manga", "Caju"],
+    "Energético": ["Original", "Zero", "Tropical", "Melancia"],
+    "Chá": ["Mate", "Pêssego", "Limão", "Verde"],
+    "Isotônico": ["Limão", "Morango", "Tangerina"],
+}
+TAMANHOS = ["200ml", "350ml", "500ml", "1L", "2L"]
+CANAIS = ["Instagram", "Facebook", "Google Ads", "TikTok", "YouTube", "LinkedIn", "E-mail"]
+OBJETIVOS = ["Alcance", "Conversão", "Cliques", "Engajamento", "Tráfego"]
+
+
+@dataclass
+class GenerationReport:
+    products: int
+    campaigns: int
+    facts: int
+    seconds: float
+
+    @property
+    def rows(self) -> int:
+        return self.products + self.campaigns + self.facts
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def _batched(rows: Iterable[tuple], size: int) -> Iterator[List[tuple]]:
+    it = iter(rows)
+    while True:
+        batch = list(islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _products(rng: random.Random, start_id: int, count: int) -> Iterator[Tuple]:
+    categorias = list(CATEGORIAS)
+    for i in range(count):
+        categoria = rng.choice(categorias)
+        sabor = rng.choice(CATEGORIAS[categoria])
+        tamanho = rng.choice(TAMANHOS)
+        preco = round(rng.uniform(2.0, 14.0), 2)
+        yield (start_id + i, f"{categoria} {sabor} {tamanho}", categoria, preco)
+
+
+def _campaigns(rng: random.Random, start_id: int, count: int) -> Iterator[Tuple]:
+    for i in range(count):
+        yield (start_id + i, rng.choice(CANAIS), rng.choice(OBJETIVOS))
+
+
+def _facts(
+    rng: random.Random,
+    start_id: int,
+    count: int,
+    product_ids: Sequence[int],
+    campaign_ids: Sequence[int],
+    start_date: date,
+    days: int,
+) -> Iterator[Tuple]:
+    dates = [start_date + timedelta(days=d) for d in range(days)]
+    keys = [(d.isoformat(), date_key(d)) for d in dates]
+    for i in range(count):
+        impressoes = int(rng.lognormvariate(9.5, 1.0))
+        cliques = int(impressoes * rng.uniform(0.005, 0.06))
+        gastos = round(cliques * rng.uniform(0.3, 2.5), 2)
+        vendas = int(cliques * rng.uniform(0.02, 0.2))
+        data, id_tempo = rng.choice(keys)
+        yield (
+            start_id + i,
+            rng.choice(product_ids),
+            rng.choice(campaign_ids),
+            data,
+            id_tempo,
+            impressoes,
+            cliques,
+            gastos,
+            vendas,
+        )
+
+
+def _drop_indexes(conn: sqlite3.Connection, tables: Sequence[str]) -> List[str]:
+    """Drop user indexes on ``tables`` and return their DDL for recreation."""
+    placeholders = ", ".join("?" for _ in tables)
+    rows = conn.execute(
+        f"SELECT name, sql FROM sqlite_master "
+        f"WHERE type = 'index' AND sql IS NOT NULL AND tbl_name IN ({placeholders});",
+        tuple(tables),
+    ).fetchall()
+    for name, _ in rows:
+        conn.execute(f'DROP INDEX IF EXISTS "{name}";')
+    return [sql for _, sql in rows]
+
+
+def _undo_partial_load(
+    conn: sqlite3.Connection,
+    index_ddl: Sequence[str],
+    first_ids: Tuple[int, int, int],
+    reset: bool = False,
+) -> None:
+    """
+    Delete the rows a failed load had already committed (``first_ids``: its
+    first product, campaign and fact id) and recreate the indexes it dropped.
+    After a ``reset`` the wipe of the old rows was committed too, so gold is
+    rebuilt to match the now empty star tables (and its watermark cleared).
+    """
+    first_product, first_campaign, first_fact = first_ids
+    conn.execute("BEGIN;")
+    conn.execute("DELETE FROM fato_marketing WHERE id_fato >= ?;", (first_fact,))
+    conn.execute("DELETE FROM dim_produto WHERE id_produto >= ?;", (first_product,))
+    conn.execute("DELETE FROM dim_campanha WHERE id_campanha >= ?;", (first_campaign,))
+    for ddl in index_ddl:
+        conn.execute(ddl)
+    if reset:
+        rebuild_gold(conn)
+    conn.commit()
+
+
+def _next_id(conn: sqlite3.Connection, table: str, column: str) -> int:
+    return int(conn.execute(f"SELECT COALESCE(MAX({column}), 0) + 1 FROM {table};").fetchone()[0])
+
+
+def generate(
+    conn: sqlite3.Connection,
+    facts: int,
+    products: int = 100,
+    campaigns: int = 30,
+    days: int = 365,
+    start_date: date = date(2024, 1, 1),
+    seed: int = 42,
+    batch_size: int = 50_000,
+    commit_every: int = 1_000_000,
+    reset: bool = False,
+) -> GenerationReport:
+    """
+    Append (or, with ``reset``, replace) deterministic synthetic rows.
+
+    Rows go in through batched ``executemany`` inside explicit transactions
+    of ``commit_every`` rows, with indexes dropped during the load and
+    rebuilt afterwards. The same arguments always produce the same data.
+    """
+    rng = random.Random(seed)
+    started = time.perf_counter()
+
+    if conn.in_transaction:
+        conn.commit()
+    index_ddl: List[str] = []
+    # First ids of this load, once part of it has been committed.
+    committed: Optional[Tuple[int, int, int]] = None
+    conn.execute("PRAGMA synchronous = OFF;")
+    conn.execute("PRAGMA temp_store = MEMORY;")
+    conn.execute("PRAGMA cache_size = -262144;")  # 256 MiB
+    conn.execute("PRAGMA foreign_keys = OFF;")
+
+    try:
+        conn.execute("BEGIN;")
+        if reset:
+            for table in reversed(STAR_TABLES):
+                conn.execute(f"DELETE FROM {table};")
+        index_ddl = _drop_indexes(conn, INDEXED_TABLES)
+        ensure_calendar(conn, start_date, start_date + timedelta(days=days - 1))
+
+        first_product = _next_id(conn, "dim_produto", "id_produto")
+        first_campaign = _next_id(conn, "dim_campanha", "id_campanha")
+        first_fact = _next_id(conn, "fato_marketing", "id_fato")
+
+        conn.executemany(
+            "INSERT INTO dim_produto (id_produto, nome_produto, categoria, preco) VALUES (?, ?, ?, ?);",
+            _products(rng, first_product, products),
+        )
+        conn.executemany(
+            "INSERT INTO dim_campanha (id_campanha, canal, objetivo) VALUES (?, ?, ?);",
+            _campaigns(rng, first_campaign, campaigns),
+        )
+
+        product_ids = range(first_product, first_product + products)
+        campaign_ids = range(first_campaign, first_campaign + campaigns)
+        rows = _facts(rng, first_fact, facts, product_ids, campaign_ids, start_date, days)
+
+        # Dimensions, index drops and the first facts share one transaction;
+        # only a load larger than commit_every commits part of itself.
+        in_txn = 0
+        for batch in _batched(rows, batch_size):
+            conn.executemany(
+                "INSERT INTO fato_marketing ("
+                "id_fato, id_produto, id_campanha, data, id_tempo, "
+                "impressoes, cliques, gastos, vendas"
+                ") VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);",
+                batch,
+            )
+            in_txn += len(batch)
+            if in_txn >= commit_every:
+                conn.commit()
+                committed = (first_product, first_campaign, first_fact)
+                conn.execute("BEGIN;")
+                in_txn = 0
+
+        for ddl in index_ddl:
+            conn.execute(ddl)
+        if reset:
+            rebuild_gold(conn)
+        else:
+            refresh_gold(conn)
+        conn.commit()
+        conn.execute("ANALYZE;")
+    except BaseException:
+        if conn.in_transaction:
+            conn.rollback()
+        # Before the first intermediate commit the rollback undoes everything;
+        # after it, the index drops and some rows are already durable.
+        if committed is not None:
+            _undo_partial_load(conn, index_ddl, committed, reset)
+        raise
+    finally:
+        conn.execute("PRAGMA foreign_keys = ON;")
+        conn.execute("PRAGMA synchronous = NORMAL;")
+
+    return GenerationReport(
+        products=products,
+        campaigns=campaigns,
+        facts=facts,
+        seconds=time.perf_counter() - started,
+    )
+
+
+def main(argv: Optional[Sequence[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Gera dados sintéticos para o star schema.")
+    parser.add_argument("--db", default=settings.DB_PATH, help="arquivo SQLite de destino")
+    parser.add_argument("--facts", type=int, default=100_000)
+    parser.add_argument("--products", type=int, default=100)
+    parser.add_argument("--campaigns", type=int, default=30)
+    parser.add_argument("--days", type=int, default=365)
+    parser.add_argument("--start-date", type=date.fromisoformat, default=date(2024, 1, 1))
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--batch-size", type=int, default=50_000)
+    parser.add_argument("--reset", action="store_true", help="apaga os dados existentes antes")
+    args = parser.parse_args(argv)
+
+    pool = bootstrap_database(args.db)
+    with pool.write() as conn:
+        report = generate(
+            conn,
+            facts=args.facts,
+            products=args.products,
+            campaigns=args.campaigns,
+            days=args.days,
+            start_date=args.start_date,
+            seed=args.seed,
+            batch_size=args.batch_size,
+            reset=args.reset,
+        )
+
+    print(
+        f"{report.facts:,} fatos, {report.products:,} produtos, {report.campaigns:,} campanhas "
+        f"em {report.seconds:.2f}s ({report.rows_per_second:,.0f} linhas/s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,212 @@
+"""
+Gold layer: materialized aggregates over fato_marketing.
+
+Aggregates are additive (plus MAX for cliques), so new facts are folded in
+with an upsert over ``id_fato > watermark`` instead of a full rebuild.
+Updates/deletes of existing facts or dimension edits need ``rebuild_gold``.
+
+Usage:
+    python -m db.gold            # incremental refresh
+    python -m db.gold --rebuild  # full rebuild
+"""
+import argparse
+import sqlite3
+import time
+from dataclasses import dataclass
+
+from config.settings import settings
+
+
+GOLD_TABLES = ("gold_produto", "gold_canal", "gold_diario")
+
+GOLD_SCHEMA = """
+CREATE TABLE IF NOT EXISTS gold_watermark (
+    camada TEXT PRIMARY KEY,
+    ultimo_id_fato INTEGER NOT NULL,
+    atualizado_em TEXT NOT NULL DEFAULT (datetime('now'))
+);
+
+CREATE TABLE IF NOT EXISTS gold_produto (
+    id_produto INTEGER PRIMARY KEY,
+    nome_produto TEXT,
+    categoria TEXT,
+    impressoes INTEGER NOT NULL,
+    cliques INTEGER NOT NULL,
+    gastos REAL NOT NULL,
+    vendas INTEGER NOT NULL,
+    receita REAL NOT NULL,
+    n_fatos INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS gold_canal (
+    canal TEXT PRIMARY KEY,
+    impressoes INTEGER NOT NULL,
+    cliques INTEGER NOT NULL,
+    max_cliques INTEGER,
+    gastos REAL NOT NULL,
+    vendas INTEGER NOT NULL,
+    receita REAL NOT NULL,
+    n_fatos INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS gold_diario (
+    id_tempo INTEGER PRIMARY KEY,
+    data TEXT,
+    impressoes INTEGER NOT NULL,
+    cliques INTEGER NOT NULL,
+    gastos REAL NOT NULL,
+    vendas INTEGER NOT NULL,
+    receita REAL NOT NULL,
+    n_fatos INTEGER NOT NULL
+);
+
+CREATE VIEW IF NOT EXISTS vw_gold_produto AS
+SELECT *,
+       CAST(cliques AS REAL) / NULLIF(impressoes, 0) AS ctr,
+       gastos / NULLIF(cliques, 0) AS cpc,
+       receita / NULLIF(gastos, 0) AS roas
+FROM gold_produto;
+
+CREATE VIEW IF NOT EXISTS vw_gold_canal AS
+SELECT *,
+       CAST(cliques AS REAL) / NULLIF(impressoes, 0) AS ctr,
+       gastos / NULLIF(cliques, 0) AS cpc,
+       receita / NULLIF(gastos, 0) AS roas
+FROM gold_canal;
+
+CREATE VIEW IF NOT EXISTS vw_gold_diario AS
+SELECT *,
+       CAST(cliques AS REAL) / NULLIF(impressoes, 0) AS ctr,
+       gastos / NULLIF(cliques, 0) AS cpc,
+       receita / NULLIF(gastos, 0) AS roas
+FROM gold_diario;
+"""
+
+# SUM over only NULLs is NULL, which the NOT NULL gold columns reject: a
+# product loaded without a price (or a fact without sales) counts as zero.
+_MEASURES = """
+    COALESCE(SUM(f.impressoes), 0), COALESCE(SUM(f.cliques), 0), TOTAL(f.gastos),
+    COALESCE(SUM(f.vendas), 0), TOTAL(f.vendas * p.preco), COUNT(*)
+"""
+
+_ADD_MEASURES = """
+    impressoes = impressoes + excluded.impressoes,
+    cliques = cliques + excluded.cliques,
+    gastos = gastos + excluded.gastos,
+    vendas = vendas + excluded.vendas,
+    receita = receita + excluded.receita,
+    n_fatos = n_fatos + excluded.n_fatos
+"""
+
+_REFRESH_STATEMENTS = (
+    f"""
+    INSERT INTO gold_produto (
+        id_produto, nome_produto, categoria,
+        impressoes, cliques, gastos, vendas, receita, n_fatos
+    )
+    SELECT f.id_produto, p.nome_produto, p.categoria, {_MEASURES}
+    FROM fato_marketing f
+    JOIN dim_produto p ON p.id_produto = f.id_produto
+    WHERE f.id_fato > :low AND f.id_fato <= :high
+    GROUP BY f.id_produto
+    ON CONFLICT (id_produto) DO UPDATE SET
+        nome_produto = excluded.nome_produto,
+        categoria = excluded.categoria,
+        {_ADD_MEASURES};
+    """,
+    f"""
+    INSERT INTO gold_canal (
+        canal, impressoes, cliques, gastos, vendas, receita, n_fatos, max_cliques
+    )
+    SELECT c.canal, {_MEASURES}, MAX(f.cliques)
+    FROM fato_marketing f
+    JOIN dim_campanha c ON c.id_campanha = f.id_campanha
+    JOIN dim_produto p ON p.id_produto = f.id_produto
+    WHERE f.id_fato > :low AND f.id_fato <= :high
+    GROUP BY c.canal
+    ON CONFLICT (canal) DO UPDATE SET
+        max_cliques = MAX(COALESCE(max_cliques, excluded.max_cliques), excluded.max_cliques),
+        {_ADD_MEASURES};
+    """,
+    f"""
+    INSERT INTO gold_diario (
+        id_tempo, data, impressoes, cliques, gastos, vendas, receita, n_fatos
+    )
+    SELECT f.id_tempo, MIN(f.data), {_MEASURES}
+    FROM fato_marketing f
+    JOIN dim_produto p ON p.id_produto = f.id_produto
+    WHERE f.id_fato > :low AND f.id_fato <= :high AND f.id_tempo IS NOT NULL
+    GROUP BY f.id_tempo
+    ON CONFLICT (id_tempo) DO UPDATE SET
+        {_ADD_MEASURES};
+    """,
+)
+
+
+@dataclass
+class RefreshReport:
+    from_id: int
+    to_id: int
+    seconds: float
+
+    @property
+    def skipped(self) -> bool:
+        return self.to_id <= self.from_id
+
+
+def _watermark(conn: sqlite3.Connection) -> int:
+    row = conn.execute("SELECT ultimo_id_fato FROM gold_watermark WHERE camada = 'gold';").fetchone()
+    return int(row[0]) if row else 0
+
+
+def refresh_gold(conn: sqlite3.Connection) -> RefreshReport:
+    """
+    Fold facts with id_fato above the watermark into the gold tables.
+    Runs in the caller's transaction when one is open.
+    """
+    started = time.perf_counter()
+    low = _watermark(conn)
+    high = conn.execute("SELECT COALESCE(MAX(id_fato), 0) FROM fato_marketing;").fetchone()[0]
+    if high > low:
+        params = {"low": low, "high": high}
+        for statement in _REFRESH_STATEMENTS:
+            conn.execute(statement, params)
+        conn.execute(
+            "INSERT INTO gold_watermark (camada, ultimo_id_fato) VALUES ('gold', ?) "
+            "ON CONFLICT (camada) DO UPDATE SET "
+            "ultimo_id_fato = excluded.ultimo_id_fato, atualizado_em = datetime('now');",
+            (high,),
+        )
+    return RefreshReport(from_id=low, to_id=high, seconds=time.perf_counter() - started)
+
+
+def rebuild_gold(conn: sqlite3.Connection) -> RefreshReport:
+    """Empty the gold tables and aggregate the whole fact table again."""
+    for table in GOLD_TABLES:
+        conn.execute(f"DELETE FROM {table};")
+    conn.execute("DELETE FROM gold_watermark WHERE camada = 'gold';")
+    return refresh_gold(conn)
+
+
+def main() -> None:
+    from db.init_db import bootstrap_database
+
+    parser = argparse.ArgumentParser(description="Atualiza a camada Ouro.")
+    parser.add_argument("--db", default=settings.DB_PATH)
+    parser.add_argument("--rebuild", action="store_true", help="reconstrói do zero")
+    args = parser.parse_args()
+
+    pool = bootstrap_database(args.db)
+    with pool.write() as conn:
+        report = rebuild_gold(conn) if args.rebuild else refresh_gold(conn)
+    if report.skipped:
+        print("Camada Ouro já está atualizada.")
+    else:
+        print(
+            f"Camada Ouro atualizada: id_fato {report.from_id + 1}..{report.to_id} "
+            f"em {report.seconds * 1000:.0f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,67 +1,89 @@
+import argparse
+import os
 import sqlite3
+import threading
+from typing import Optional, Set
 
+from config.settings import settings
+from db.connection import ConnectionPool, get_pool
+from db.migrations import LATEST_VERSION, current_version, migrate
 
-def initialize_db(conn: sqlite3.Connection) -> None:
+
+_bootstrapped: Set[str] = set()
+_bootstrap_lock = threading.Lock()
+
+
+def _copy_image(image_path: str, db_path: str) -> None:
+    """
+    Materialize a prebuilt database image at db_path using the SQLite backup
+    API (consistent even if the image is in WAL mode), then swap it in atomically.
+    """
+    db_dir = os.path.dirname(db_path)
+    if db_dir:
+        os.makedirs(db_dir, exist_ok=True)
+    tmp_path = f"{db_path}.tmp-{os.getpid()}"
+    src = sqlite3.connect(f"file:{image_path}?mode=ro", uri=True)
+    dst = sqlite3.connect(tmp_path)
+    try:
+        src.backup(dst)
+    finally:
+        dst.close()
+        src.close()
+    os.replace(tmp_path, db_path)
+
+
+def bootstrap_database(db_path: Optional[str] = None) -> ConnectionPool:
     """
-    Create tables if they do not exist and insert seed data on first run.
+    Prepare the database once per process and return its pool.
+
+    On the first call for a given file: copy the prebuilt image
+    (settings.DB_IMAGE_PATH) if the database does not exist yet, then run
+    pending migrations. Later calls only do a set lookup.
     """
-    cursor = conn.cursor()
-
-    cursor.executescript(
-        """
-        CREATE TABLE IF NOT EXISTS dim_produto (
-            id_produto INTEGER PRIMARY KEY,
-            nome_produto TEXT,
-            categoria TEXT,
-            preco REAL
-        );
-
-        CREATE TABLE IF NOT EXISTS dim_campanha (
-            id_campanha INTEGER PRIMARY KEY,
-            canal TEXT,
-            objetivo TEXT
-        );
-
-        CREATE TABLE IF NOT EXISTS fato_marketing (
-            id_fato INTEGER PRIMARY KEY,
-            id_produto INTEGER,
-            id_campanha INTEGER,
-            data TEXT,
-            impressoes INTEGER,
-            cliques INTEGER,
-            gastos REAL,
-            vendas INTEGER,
-            FOREIGN KEY (id_produto) REFERENCES dim_produto(id_produto),
-            FOREIGN KEY (id_campanha) REFERENCES dim_campanha(id_campanha)
-        );
-        """
-    )
-
-    cursor.execute("SELECT COUNT(*) FROM dim_produto;")
-    row_count = cursor.fetchone()[0]
-
-    if row_count == 0:
-        cursor.executescript(
-            """
-            INSERT INTO dim_produto (id_produto, nome_produto, categoria, preco) VALUES
-            (1, 'Refrigerante Cola', 'Refrigerante', 6.50),
-            (2, 'Água Mineral 500ml', 'Água', 2.50),
-            (3, 'Suco Tropical', 'Suco', 7.90);
-
-            INSERT INTO dim_campanha (id_campanha, canal, objetivo) VALUES
-            (101, 'Instagram', 'Alcance'),
-            (102, 'Facebook', 'Conversão'),
-            (103, 'Google Ads', 'Cliques');
-
-            INSERT INTO fato_marketing (
-                id_fato, id_produto, id_campanha, data,
-                impressoes, cliques, gastos, vendas
-            ) VALUES
-            (1, 1, 101, '2025-01-10', 50000, 1200, 800.00, 150),
-            (2, 1, 102, '2025-01-11', 30000, 800, 600.00, 90),
-            (3, 2, 103, '2025-01-12', 45000, 2000, 1500.00, 300),
-            (4, 3, 101, '2025-01-10', 20000, 400, 300.00, 45),
-            (5, 3, 102, '2025-01-11', 26000, 610, 500.00, 70);
-            """
-        )
-        conn.commit()
+    path = os.path.abspath(db_path or settings.DB_PATH)
+    if path in _bootstrapped:
+        return get_pool(path)
+
+    with _bootstrap_lock:
+        if path not in _bootstrapped:
+            image = settings.DB_IMAGE_PATH
+            if image and not os.path.exists(path) and os.path.exists(image):
+                _copy_image(image, path)
+
+            pool = get_pool(path)
+            with pool.write() as conn:
+                if current_version(conn) < LATEST_VERSION:
+                    migrate(conn)
+            _bootstrapped.add(path)
+    return get_pool(path)
+
+
+def build_image(image_path: str) -> None:
+    """
+    Build a fully migrated, seeded database image to ship with deployments.
+    """
+    if os.path.exists(image_path):
+        os.remove(image_path)
+    conn = sqlite3.connect(image_path)
+    try:
+        migrate(conn)
+        conn.execute("VACUUM;")
+    finally:
+        conn.close()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Schema bootstrap for the course database.")
+    parser.add_argument("--build-image", metavar="PATH", help="write a prebuilt database image")
+    args = parser.parse_args()
+
+    if args.build_image:
+        build_image(args.build_image)
+        print(f"Imagem criada em {args.build_image} (schema v{LATEST_VERSION}).")
+    else:
+        bootstrap_database()
+        print(f"Banco {settings.DB_PATH} no schema v{LATEST_VERSION}.")
+
+
+if __name__ == "__main__":
+    main()
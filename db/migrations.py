@@ -0,0 +1,205 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Callable, List, Sequence, Union
+
+from db.dim_tempo import load_default_calendar
+from db.gold import GOLD_SCHEMA, refresh_gold
+from ingest.schema import INGEST_SCHEMA
+
+
+@dataclass(frozen=True)
+class Migration:
+    version: int
+    description: str
+    apply: Union[str, Callable[[sqlite3.Connection], None]]
+
+
+SCHEMA_VERSION_DDL = """
+CREATE TABLE IF NOT EXISTS schema_version (
+    version INTEGER PRIMARY KEY,
+    description TEXT NOT NULL,
+    applied_at TEXT NOT NULL DEFAULT (datetime('now'))
+);
+"""
+
+
+CREATE_STAR_SCHEMA = """
+CREATE TABLE IF NOT EXISTS dim_produto (
+    id_produto INTEGER PRIMARY KEY,
+    nome_produto TEXT,
+    categoria TEXT,
+    preco REAL
+);
+
+CREATE TABLE IF NOT EXISTS dim_campanha (
+    id_campanha INTEGER PRIMARY KEY,
+    canal TEXT,
+    objetivo TEXT
+);
+
+CREATE TABLE IF NOT EXISTS fato_marketing (
+    id_fato INTEGER PRIMARY KEY,
+    id_produto INTEGER,
+    id_campanha INTEGER,
+    data TEXT,
+    impressoes INTEGER,
+    cliques INTEGER,
+    gastos REAL,
+    vendas INTEGER,
+    FOREIGN KEY (id_produto) REFERENCES dim_produto(id_produto),
+    FOREIGN KEY (id_campanha) REFERENCES dim_campanha(id_campanha)
+);
+"""
+
+
+SEED_DATA = """
+INSERT OR IGNORE INTO dim_produto (id_produto, nome_produto, categoria, preco) VALUES
+(1, 'Refrigerante Cola', 'Refrigerante', 6.50),
+(2, 'Água Mineral 500ml', 'Água', 2.50),
+(3, 'Suco Tropical', 'Suco', 7.90);
+
+INSERT OR IGNORE INTO dim_campanha (id_campanha, canal, objetivo) VALUES
+(101, 'Instagram', 'Alcance'),
+(102, 'Facebook', 'Conversão'),
+(103, 'Google Ads', 'Cliques');
+
+INSERT OR IGNORE INTO fato_marketing (
+    id_fato, id_produto, id_campanha, data,
+    impressoes, cliques, gastos, vendas
+) VALUES
+(1, 1, 101, '2025-01-10', 50000, 1200, 800.00, 150),
+(2, 1, 102, '2025-01-11', 30000, 800, 600.00, 90),
+(3, 2, 103, '2025-01-12', 45000, 2000, 1500.00, 300),
+(4, 3, 101, '2025-01-10', 20000, 400, 300.00, 45),
+(5, 3, 102, '2025-01-11', 26000, 610, 500.00, 70);
+"""
+
+
+DATE_DIMENSION_AND_INDEXES = """
+CREATE TABLE IF NOT EXISTS dim_tempo (
+    id_tempo INTEGER PRIMARY KEY,          -- YYYYMMDD
+    data TEXT NOT NULL UNIQUE,             -- YYYY-MM-DD
+    ano INTEGER NOT NULL,
+    trimestre INTEGER NOT NULL,
+    id_trimestre INTEGER NOT NULL,         -- YYYYQ
+    mes INTEGER NOT NULL,
+    id_mes INTEGER NOT NULL,               -- YYYYMM
+    nome_mes TEXT NOT NULL,
+    id_semana INTEGER NOT NULL,            -- ISO year * 100 + ISO week
+    semana_iso INTEGER NOT NULL,
+    dia INTEGER NOT NULL,
+    dia_semana INTEGER NOT NULL,           -- 1 = segunda ... 7 = domingo
+    nome_dia_semana TEXT NOT NULL,
+    fim_de_semana INTEGER NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_tempo_mes ON dim_tempo (id_mes, id_tempo);
+CREATE INDEX IF NOT EXISTS idx_tempo_semana ON dim_tempo (id_semana, id_tempo);
+CREATE INDEX IF NOT EXISTS idx_tempo_trimestre ON dim_tempo (id_trimestre, id_tempo);
+
+ALTER TABLE fato_marketing ADD COLUMN id_tempo INTEGER;
+
+-- Rows inserted with only the TEXT date get their integer key filled in.
+CREATE TRIGGER IF NOT EXISTS trg_fato_id_tempo
+AFTER INSERT ON fato_marketing
+WHEN NEW.id_tempo IS NULL AND NEW.data IS NOT NULL
+BEGIN
+    UPDATE fato_marketing
+    SET id_tempo = CAST(strftime('%Y%m%d', NEW.data) AS INTEGER)
+    WHERE id_fato = NEW.id_fato;
+END;
+
+-- Covering indexes: FK + the measures, so JOIN/GROUP BY never touch the table.
+CREATE INDEX IF NOT EXISTS idx_fato_produto
+    ON fato_marketing (id_produto, vendas, gastos, cliques, impressoes);
+CREATE INDEX IF NOT EXISTS idx_fato_campanha
+    ON fato_marketing (id_campanha, gastos, cliques, vendas, impressoes);
+CREATE INDEX IF NOT EXISTS idx_fato_tempo
+    ON fato_marketing (id_tempo, id_produto, id_campanha, vendas, gastos, cliques, impressoes);
+"""
+
+
+def _date_dimension_and_indexes(conn: sqlite3.Connection) -> None:
+    run_script(conn, DATE_DIMENSION_AND_INDEXES)
+    load_default_calendar(conn)
+    conn.execute("ANALYZE;")
+
+
+def _gold_layer(conn: sqlite3.Connection) -> None:
+    run_script(conn, GOLD_SCHEMA)
+    refresh_gold(conn)
+
+
+# Append-only: never edit a migration that has shipped, add a new one instead.
+MIGRATIONS: List[Migration] = [
+    Migration(1, "star schema: dim_produto, dim_campanha, fato_marketing", CREATE_STAR_SCHEMA),
+    Migration(2, "seed data for the course scenario", SEED_DATA),
+    Migration(3, "dim_tempo, fato_marketing.id_tempo and covering indexes", _date_dimension_and_indexes),
+    Migration(4, "gold layer aggregates with id_fato watermark", _gold_layer),
+    Migration(5, "bronze/silver staging and load tracking for ingestion", INGEST_SCHEMA),
+]
+
+LATEST_VERSION = MIGRATIONS[-1].version
+
+
+def split_statements(script: str) -> List[str]:
+    """
+    Split a SQL script into complete statements (trigger bodies included).
+    Needed because ``executescript`` would commit our migration transaction.
+    """
+    statements: List[str] = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def run_script(conn: sqlite3.Connection, script: str) -> None:
+    """Run a multi-statement script inside the caller's transaction."""
+    for statement in split_statements(script):
+        conn.execute(statement)
+
+
+def current_version(conn: sqlite3.Connection) -> int:
+    conn.execute(SCHEMA_VERSION_DDL)
+    row = conn.execute("SELECT COALESCE(MAX(version), 0) FROM schema_version;").fetchone()
+    return int(row[0])
+
+
+def migrate(conn: sqlite3.Connection, migrations: Sequence[Migration] = MIGRATIONS) -> List[int]:
+    """
+    Apply pending migrations, each in its own transaction together with its
+    schema_version row. Returns the versions that were applied. Other
+    databases (e.g. the progress store) pass their own ``migrations``.
+    """
+    applied: List[int] = []
+    if conn.in_transaction:
+        conn.commit()
+    version = current_version(conn)
+    conn.commit()
+
+    for migration in migrations:
+        if migration.version <= version:
+            continue
+        conn.execute("BEGIN;")
+        try:
+            if isinstance(migration.apply, str):
+                run_script(conn, migration.apply)
+            else:
+                migration.apply(conn)
+            conn.execute(
+                "INSERT INTO schema_version (version, description) VALUES (?, ?);",
+                (migration.version, migration.description),
+            )
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        applied.append(migration.version)
+    return applied
@@ -0,0 +1,321 @@
+"""
+Persistent student progress (XP and completed challenges) and cohort views.
+
+Progress lives in its own SQLite file (settings.PROGRESS_DB_PATH) so that
+frequent small writes never move the course database's data version, which
+would invalidate result caches and answer keys. Completion events are queued
+and written in small batches by one writer thread per process; triggers keep
+``student_totals`` up to date, so reading a student's progress is a primary
+key lookup instead of an aggregation over every event.
+
+The same triggers maintain ``xp_histogram`` (students per XP value) and
+``challenge_stats`` (completions per challenge). XP only moves in whole
+challenge rewards, so the histogram has a handful of rows however many
+students there are: a student's rank is one primary-key lookup plus a sum
+over the histogram rows above them, never a scan of the students.
+"""
+import atexit
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Set, Tuple
+
+from config.settings import settings
+from db.connection import ConnectionPool, get_pool
+from db.migrations import Migration, migrate
+
+
+logger = logging.getLogger(__name__)
+
+
+_PROGRESS_EVENTS = """
+CREATE TABLE IF NOT EXISTS progress_event (
+    id INTEGER PRIMARY KEY,
+    student_id TEXT NOT NULL,
+    challenge_id INTEGER NOT NULL,
+    xp INTEGER NOT NULL,
+    created_at TEXT NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ', 'now')),
+    UNIQUE (student_id, challenge_id)
+);
+
+CREATE TABLE IF NOT EXISTS student_totals (
+    student_id TEXT PRIMARY KEY,
+    xp INTEGER NOT NULL DEFAULT 0,
+    completed INTEGER NOT NULL DEFAULT 0,
+    updated_at TEXT NOT NULL
+) WITHOUT ROWID;
+
+-- Fires only for events that were actually inserted, so re-submitting a
+-- solved challenge (INSERT OR IGNORE) never double-counts XP.
+CREATE TRIGGER IF NOT EXISTS trg_progress_totals
+AFTER INSERT ON progress_event
+BEGIN
+    INSERT INTO student_totals (student_id, xp, completed, updated_at)
+    VALUES (NEW.student_id, NEW.xp, 1, NEW.created_at)
+    ON CONFLICT (student_id) DO UPDATE SET
+        xp = xp + excluded.xp,
+        completed = completed + 1,
+        updated_at = excluded.updated_at;
+END;
+"""
+
+# The totals trigger is replaced, not created IF NOT EXISTS: stores from
+# version 1 already have one under this name, without the per-challenge
+# upsert. The cohort tables are then rebuilt from the events.
+_COHORT_TABLES = """
+-- Leaderboard order: highest XP first, earliest to get there breaks ties.
+CREATE INDEX IF NOT EXISTS idx_student_totals_rank ON student_totals (xp DESC, updated_at);
+
+CREATE TABLE IF NOT EXISTS xp_histogram (
+    xp INTEGER PRIMARY KEY,
+    students INTEGER NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS challenge_stats (
+    challenge_id INTEGER PRIMARY KEY,
+    completions INTEGER NOT NULL
+);
+
+DROP TRIGGER IF EXISTS trg_progress_totals;
+
+CREATE TRIGGER trg_progress_totals
+AFTER INSERT ON progress_event
+BEGIN
+    INSERT INTO student_totals (student_id, xp, completed, updated_at)
+    VALUES (NEW.student_id, NEW.xp, 1, NEW.created_at)
+    ON CONFLICT (student_id) DO UPDATE SET
+        xp = xp + excluded.xp,
+        completed = completed + 1,
+        updated_at = excluded.updated_at;
+
+    INSERT INTO challenge_stats (challenge_id, completions) VALUES (NEW.challenge_id, 1)
+    ON CONFLICT (challenge_id) DO UPDATE SET completions = completions + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_histogram_new_student
+AFTER INSERT ON student_totals
+BEGIN
+    INSERT INTO xp_histogram (xp, students) VALUES (NEW.xp, 1)
+    ON CONFLICT (xp) DO UPDATE SET students = students + 1;
+END;
+
+CREATE TRIGGER IF NOT EXISTS trg_histogram_move_student
+AFTER UPDATE OF xp ON student_totals
+WHEN OLD.xp <> NEW.xp
+BEGIN
+    UPDATE xp_histogram SET students = students - 1 WHERE xp = OLD.xp;
+    DELETE FROM xp_histogram WHERE xp = OLD.xp AND students <= 0;
+    INSERT INTO xp_histogram (xp, students) VALUES (NEW.xp, 1)
+    ON CONFLICT (xp) DO UPDATE SET students = students + 1;
+END;
+
+DELETE FROM xp_histogram;
+INSERT INTO xp_histogram (xp, students)
+SELECT xp, COUNT(*) FROM student_totals GROUP BY xp;
+
+DELETE FROM challenge_stats;
+INSERT INTO challenge_stats (challenge_id, completions)
+SELECT challenge_id, COUNT(*) FROM progress_event GROUP BY challenge_id;
+"""
+
+# Versioned like the course database (db.migrations), in the progress file's
+# own schema_version table.
+PROGRESS_MIGRATIONS: List[Migration] = [
+    Migration(1, "progress events and per-student totals", _PROGRESS_EVENTS),
+    Migration(2, "leaderboard index, xp histogram and per-challenge completions", _COHORT_TABLES),
+]
+
+_INSERT_EVENT = "INSERT OR IGNORE INTO progress_event (student_id, challenge_id, xp) VALUES (?, ?, ?);"
+
+
+@dataclass(frozen=True)
+class StudentProgress:
+    student_id: str
+    xp: int
+    completed: Set[int]
+
+
+@dataclass(frozen=True)
+class LeaderboardEntry:
+    position: int
+    student_id: str
+    xp: int
+    completed: int
+
+
+@dataclass(frozen=True)
+class StudentRank:
+    # 1 + number of students with strictly more XP (ties share a position).
+    position: int
+    students: int
+    # Share of the cohort with less XP, 0-100.
+    percentile: float
+
+
+@dataclass(frozen=True)
+class CohortStats:
+    students: int
+    # challenge_id -> number of students who completed it
+    completions: Dict[int, int]
+    # xp -> number of students with exactly that XP
+    xp_histogram: Dict[int, int]
+
+
+class ProgressStore:
+    """
+    Queue-fed single writer over a WAL database.
+
+    ``record`` never touches SQLite on the caller's thread: events are
+    batched (up to ``batch_size`` or ``flush_ms``) into one transaction, so
+    many concurrent sessions share a handful of short write transactions
+    instead of fighting over the write lock.
+    """
+
+    def __init__(
+        self,
+        pool: ConnectionPool,
+        batch_size: int = 100,
+        flush_ms: float = 200,
+    ) -> None:
+        self.pool = pool
+        self.batch_size = max(1, batch_size)
+        self.flush_seconds = flush_ms / 1000
+        self._queue: "queue.Queue" = queue.Queue()
+        self.failed_batches = 0
+
+        with pool.write() as conn:
+            migrate(conn, PROGRESS_MIGRATIONS)
+
+        self._thread = threading.Thread(target=self._run, name="progress-writer", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Writer thread
+    # ------------------------------------------------------------------
+    def _write(self, batch: List[Tuple[str, int, int]]) -> None:
+        for attempt in range(5):
+            try:
+                with self.pool.write() as conn:
+                    conn.executemany(_INSERT_EVENT, batch)
+                return
+            except sqlite3.OperationalError as e:
+                # Another process may hold the lock beyond busy_timeout.
+                if "locked" not in str(e) and "busy" not in str(e):
+                    break
+                time.sleep(0.05 * 2 ** attempt)
+        self.failed_batches += 1
+        logger.error("Falha ao gravar %d evento(s) de progresso.", len(batch))
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            batch, acks = [], []
+            deadline = time.monotonic() + self.flush_seconds
+            while True:
+                # An Event is a flush request: commit what we have, then set it.
+                if isinstance(item, threading.Event):
+                    acks.append(item)
+                else:
+                    batch.append(item)
+                if acks or len(batch) >= self.batch_size:
+                    break
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+            if batch:
+                self._write(batch)
+            for ack in acks:
+                ack.set()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def record(self, student_id: str, challenge_id: int, xp: int) -> None:
+        """Queue a completion; completing the same challenge twice is a no-op."""
+        self._queue.put((student_id, int(challenge_id), int(xp)))
+
+    def flush(self, timeout: Optional[float] = 5.0) -> bool:
+        """Block until everything queued so far is committed."""
+        done = threading.Event()
+        self._queue.put(done)
+        return done.wait(timeout)
+
+    def load(self, student_id: str) -> StudentProgress:
+        with self.pool.read() as conn:
+            row = conn.execute(
+                "SELECT xp FROM student_totals WHERE student_id = ?;", (student_id,)
+            ).fetchone()
+            completed = {
+                r[0]
+                for r in conn.execute(
+                    "SELECT challenge_id FROM progress_event WHERE student_id = ?;", (student_id,)
+                )
+            }
+        return StudentProgress(student_id=student_id, xp=int(row[0]) if row else 0, completed=completed)
+
+    def leaderboard(self, limit: int = 10) -> List[LeaderboardEntry]:
+        """Top ``limit`` students, read straight off idx_student_totals_rank."""
+        with self.pool.read() as conn:
+            rows = conn.execute(
+                "SELECT student_id, xp, completed FROM student_totals "
+                "ORDER BY xp DESC, updated_at LIMIT ?;",
+                (limit,),
+            ).fetchall()
+        entries: List[LeaderboardEntry] = []
+        for i, (student_id, xp, completed) in enumerate(rows):
+            position = entries[-1].position if entries and entries[-1].xp == xp else i + 1
+            entries.append(LeaderboardEntry(position, student_id, int(xp), int(completed)))
+        return entries
+
+    def rank(self, student_id: str) -> Optional[StudentRank]:
+        """The student's position in the cohort, or None before their first completion."""
+        with self.pool.read() as conn:
+            row = conn.execute(
+                "SELECT xp FROM student_totals WHERE student_id = ?;", (student_id,)
+            ).fetchone()
+            if row is None:
+                return None
+            above, below, total = conn.execute(
+                "SELECT COALESCE(SUM(CASE WHEN xp > :xp THEN students END), 0), "
+                "COALESCE(SUM(CASE WHEN xp < :xp THEN students END), 0), "
+                "COALESCE(SUM(students), 0) FROM xp_histogram;",
+                {"xp": row[0]},
+            ).fetchone()
+        return StudentRank(
+            position=int(above) + 1,
+            students=int(total),
+            percentile=100.0 * below / total if total else 0.0,
+        )
+
+    def cohort(self) -> CohortStats:
+        with self.pool.read() as conn:
+            histogram = dict(conn.execute("SELECT xp, students FROM xp_histogram;").fetchall())
+            completions = dict(conn.execute("SELECT challenge_id, completions FROM challenge_stats;").fetchall())
+        return CohortStats(
+            students=sum(histogram.values()),
+            completions=completions,
+            xp_histogram=histogram,
+        )
+
+
+_store: Optional[ProgressStore] = None
+_store_lock = threading.Lock()
+
+
+def get_progress_store() -> ProgressStore:
+    """Return the process-wide progress store, creating it on first use."""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = ProgressStore(
+                    get_pool(settings.PROGRESS_DB_PATH),
+                    batch_size=settings.PROGRESS_BATCH_SIZE,
+                    flush_ms=settings.PROGRESS_FLUSH_MS,
+                )
+                atexit.register(_store.flush)
+    return _store
@@ -1,9 +1,505 @@
+import re
 import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
+from typing import Any, Hashable, Iterator, List, Optional, Tuple
+
 import pandas as pd
 
+from config.settings import settings
+from db.connection import data_version
+
+
+class QueryInterrupted(sqlite3.OperationalError):
+    """A query stopped by its time/step budget or by the user."""
+
+    def __init__(self, reason: str, elapsed_ms: float, steps: int, budget: "QueryBudget") -> None:
+        self.reason = reason  # "timeout" | "steps" | "cancelled"
+        self.elapsed_ms = elapsed_ms
+        self.steps = steps
+        self.budget = budget
+        if reason == "timeout":
+            detail = f"tempo limite de {budget.timeout_ms} ms excedido"
+        elif reason == "steps":
+            detail = f"limite de {budget.max_steps:,} passos da VM excedido"
+        else:
+            detail = "cancelada pelo usuário"
+        super().__init__(
+            f"Consulta interrompida: {detail} "
+            f"(após {elapsed_ms:.0f} ms e {steps:,} passos)."
+        )
+
+
+@dataclass
+class QueryBudget:
+    timeout_ms: Optional[int] = None
+    max_steps: Optional[int] = None
+    cancel_event: Optional[threading.Event] = None
+
+    @classmethod
+    def from_settings(cls, cancel_event: Optional[threading.Event] = None) -> "QueryBudget":
+        return cls(
+            timeout_ms=settings.QUERY_TIMEOUT_MS,
+            max_steps=settings.QUERY_MAX_STEPS,
+            cancel_event=cancel_event,
+        )
+
+
+# VM instructions between progress-handler calls.
+_PROGRESS_GRANULARITY = 1000
+
+
+@contextmanager
+def query_budget(conn: sqlite3.Connection, budget: Optional[QueryBudget]) -> Iterator[None]:
+    """
+    Enforce ``budget`` on everything executed (and fetched) on ``conn`` inside
+    the block via SQLite's progress handler. Raises QueryInterrupted.
+    """
+    if budget is None:
+        yield
+        return
+
+    started = time.perf_counter()
+    deadline = started + budget.timeout_ms / 1000 if budget.timeout_ms else None
+    state = {"steps": 0, "reason": None}
+
+    def _handler() -> int:
+        state["steps"] += _PROGRESS_GRANULARITY
+        if budget.cancel_event is not None and budget.cancel_event.is_set():
+            state["reason"] = "cancelled"
+        elif budget.max_steps and state["steps"] > budget.max_steps:
+            state["reason"] = "steps"
+        elif deadline is not None and time.perf_counter() > deadline:
+            state["reason"] = "timeout"
+        return 1 if state["reason"] else 0
+
+    conn.set_progress_handler(_handler, _PROGRESS_GRANULARITY)
+    try:
+        yield
+    except Exception as e:
+        # pandas wraps sqlite3 errors, so rely on the handler's own verdict.
+        if state["reason"] and "interrupt" in str(e).lower():
+            raise QueryInterrupted(
+                state["reason"],
+                (time.perf_counter() - started) * 1000,
+                state["steps"],
+                budget,
+            ) from e
+        raise
+    finally:
+        conn.set_progress_handler(None, _PROGRESS_GRANULARITY)
+
+
+# ----------------------------------------------------------------------
+# Result cache
+# ----------------------------------------------------------------------
+_QUOTED = re.compile(r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])")
+_WHITESPACE = re.compile(r"\s+")
+_CACHEABLE = ("select", "with", "values")
+# Results that change without a write: random values and the current time
+# (date()/time()/datetime()/julianday()/strftime() with 'now'). Matching a
+# quoted 'now' anywhere errs on the side of not caching.
+_NONDETERMINISTIC = re.compile(
+    r"\b(?:random|randomblob)\s*\(|\bcurrent_(?:date|time|timestamp)\b|'now'",
+    re.IGNORECASE,
+)
+
+
+def normalize_sql(query: str) -> str:
+    """
+    Canonical form used as cache key: whitespace collapsed, keywords and
+    identifiers lower-cased, quoted literals/identifiers left untouched.
+    """
+    parts = _QUOTED.split(clean_sql(query))
+    for i in range(0, len(parts), 2):
+        parts[i] = _WHITESPACE.sub(" ", parts[i].lower())
+    return "".join(parts).strip()
+
+
+@dataclass
+class CacheStats:
+    hits: int
+    misses: int
+    evictions: int
+    invalidations: int
+    entries: int
+    bytes: int
+    max_entries: int
+    max_bytes: int
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def _frame_bytes(df: pd.DataFrame) -> int:
+    return int(df.memory_usage(index=True, deep=True).sum())
 
-def run_query(conn: sqlite3.Connection, query: str) -> pd.DataFrame:
+
+class ResultCache:
+    """
+    LRU cache of query results bounded by entry count and by total bytes.
+
+    Keys carry the database's data version; when a newer version shows up,
+    entries of older versions for that database are dropped eagerly.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[Hashable, Tuple[Any, int]]" = OrderedDict()
+        self._versions: dict = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = self._misses = self._evictions = self._invalidations = 0
+
+    def _drop_stale(self, path: str, epoch: int) -> bool:
+        """Advance the known version of ``path``; False if ``epoch`` is outdated."""
+        known = self._versions.get(path)
+        if known is not None and known >= epoch:
+            return known == epoch
+        self._versions[path] = epoch
+        stale = [k for k in self._entries if k[0] == path and k[1] != epoch]
+        for k in stale:
+            self._bytes -= self._entries.pop(k)[1]
+        self._invalidations += len(stale)
+        return True
+
+    def get(self, key: tuple) -> Optional[Any]:
+        with self._lock:
+            self._drop_stale(key[0], key[1])
+            entry = self._entries.get(key)
+            if entry is None:
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry[0]
+
+    def put(self, key: tuple, value: Any, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if not self._drop_stale(key[0], key[1]):
+                return
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._entries and (
+                len(self._entries) > self.max_entries or self._bytes > self.max_bytes
+            ):
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self._evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._versions.clear()
+            self._bytes = 0
+
+    def stats(self) -> CacheStats:
+        with self._lock:
+            return CacheStats(
+                hits=self._hits,
+                misses=self._misses,
+                evictions=self._evictions,
+                invalidations=self._invalidations,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                max_entries=self.max_entries,
+                max_bytes=self.max_bytes,
+            )
+
+
+result_cache = ResultCache(
+    max_entries=settings.RESULT_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RESULT_CACHE_MAX_BYTES,
+)
+
+
+def _cache_key(conn: sqlite3.Connection, query: str, *extra: Hashable) -> Optional[tuple]:
+    normalized = normalize_sql(query)
+    if not normalized.startswith(_CACHEABLE) or _NONDETERMINISTIC.search(normalized):
+        return None
+    path, epoch = data_version(conn)
+    return (path, epoch, normalized, *extra)
+
+
+def result_cache_stats() -> CacheStats:
+    return result_cache.stats()
+
+
+def run_query(
+    conn: sqlite3.Connection,
+    query: str,
+    budget: Optional[QueryBudget] = None,
+    use_cache: bool = True,
+) -> pd.DataFrame:
     """
     Execute a SQL query and return a pandas DataFrame.
+    Read-only queries are served from ``result_cache`` while the data is
+    unchanged; treat the returned frame as read-only.
     """
-    return pd.read_sql_query(query, conn)
+    key = _cache_key(conn, query, "full") if use_cache else None
+    if key is not None:
+        cached = result_cache.get(key)
+        if cached is not None:
+            return cached.copy(deep=False)
+
+    with query_budget(conn, budget):
+        df = pd.read_sql_query(query, conn)
+
+    if key is not None:
+        result_cache.put(key, df, _frame_bytes(df))
+        df = df.copy(deep=False)
+    return df
+
+
+@dataclass
+class QueryPage:
+    df: pd.DataFrame
+    page: int
+    offset: int
+    # Row offset where the next page starts: pass it back as ``offset``.
+    next_offset: int
+    has_more: bool
+    # Keyset position to pass as ``after_key`` for the next page (None = OFFSET paging).
+    next_key: Optional[Any]
+    total_estimate: Optional[int]
+    total_is_exact: bool
+    # True when max_rows/max_bytes stopped the page early.
+    truncated: bool
+    bytes_used: int
+
+
+_KEY_COLUMN = "__pagina_rowid"
+
+# SELECT <cols> FROM <table> [WHERE <cond>] with nothing else: safe for keyset paging.
+_SIMPLE_SELECT = re.compile(
+    r"^\s*select\s+(?P<cols>.+?)\s+from\s+(?P<table>[A-Za-z_][A-Za-z0-9_]*)"
+    r"(?:\s+(?:as\s+)?(?P<alias>[A-Za-z_][A-Za-z0-9_]*))?"
+    r"(?:\s+where\s+(?P<where>.+))?\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+_NOT_SIMPLE = re.compile(
+    r"\b(join|group|order|limit|union|intersect|except|having|distinct|window|over|from)\b",
+    re.IGNORECASE,
+)
+_AGGREGATE = re.compile(r"\b(count|sum|avg|min|max|total|group_concat)\s*\(", re.IGNORECASE)
+
+
+# Literals/quoted identifiers (kept) or comments (dropped), in one scan.
+_LITERAL_OR_COMMENT = re.compile(
+    r"('(?:[^']|'')*'|\"(?:[^\"]|\"\")*\"|`[^`]*`|\[[^\]]*\])|--[^\n]*|/\*.*?(?:\*/|$)",
+    re.DOTALL,
+)
+
+
+def clean_sql(query: str) -> str:
+    """
+    Drop comments, surrounding whitespace and trailing semicolons so the
+    query can be wrapped in a subquery (a trailing ``-- comment`` would
+    otherwise swallow the wrapper's closing parenthesis).
+    """
+    without_comments = _LITERAL_OR_COMMENT.sub(lambda m: m.group(1) or " ", query)
+    return without_comments.strip().rstrip("; \t\r\n")
+
+
+def _keyset_plan(conn: sqlite3.Connection, query: str) -> Optional[Tuple[str, str]]:
+    """
+    Return ``(sql_with_key, count_table)`` when the query is a plain scan of a
+    rowid table, so pages can seek on rowid instead of using OFFSET.
+    """
+    match = _SIMPLE_SELECT.match(query)
+    if not match:
+        return None
+    cols, table, alias, where = match.group("cols", "table", "alias", "where")
+    if alias and alias.lower() == "where":
+        return None
+    if _NOT_SIMPLE.search(cols) or _AGGREGATE.search(cols):
+        return None
+    if where and _NOT_SIMPLE.search(where):
+        return None
+    row = conn.execute(
+        "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = ? COLLATE NOCASE;", (table,)
+    ).fetchone()
+    if not row or "without rowid" in (row[0] or "").lower():
+        return None
+
+    ref = alias or table
+    condition = f"({where}) AND " if where else ""
+    sql = (
+        f"SELECT {ref}.rowid AS {_KEY_COLUMN}, {cols} FROM {table}"
+        f"{' AS ' + alias if alias else ''} "
+        f"WHERE {condition}{ref}.rowid > ? ORDER BY {ref}.rowid LIMIT ?"
+    )
+    return sql, (table if not where else "")
+
+
+def _row_bytes(row: tuple) -> int:
+    size = 0
+    for value in row:
+        if isinstance(value, (str, bytes)):
+            size += len(value)
+        else:
+            size += 8
+    return size
+
+
+def estimate_total(conn: sqlite3.Connection, query: str, table: str = "", cap: int = 0) -> Tuple[int, bool]:
+    """
+    Cheap row-count estimate: sqlite_stat1 for whole-table scans, otherwise
+    a COUNT bounded by ``cap`` so the estimate never costs more than ``cap`` rows.
+    Returns ``(estimate, is_exact)``.
+    """
+    cap = cap or settings.QUERY_COUNT_CAP
+    if table:
+        try:
+            # The first number of every stat row for a table is its row count.
+            row = conn.execute(
+                "SELECT stat FROM sqlite_stat1 WHERE tbl = ? COLLATE NOCASE LIMIT 1;", (table,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            row = None
+        if row:
+            return int(str(row[0]).split()[0]), False
+    count = conn.execute(
+        f"SELECT COUNT(*) FROM (SELECT 1 FROM (\n{query}\n) LIMIT ?);", (cap + 1,)
+    ).fetchone()[0]
+    if count > cap:
+        return cap, False
+    return count, True
+
+
+def run_query_page(
+    conn: sqlite3.Connection,
+    query: str,
+    page: int = 0,
+    after_key: Optional[Any] = None,
+    offset: Optional[int] = None,
+    page_size: Optional[int] = None,
+    max_rows: Optional[int] = None,
+    max_bytes: Optional[int] = None,
+    with_total: bool = True,
+    budget: Optional[QueryBudget] = None,
+    use_cache: bool = True,
+) -> QueryPage:
+    """
+    Execute ``query`` and materialize only one page of it.
+
+    Plain table scans page by rowid (pass the previous page's ``next_key`` as
+    ``after_key``); anything else falls back to LIMIT/OFFSET from ``offset``
+    (the previous page's ``next_offset``; ``page * page_size`` if omitted,
+    which is only right while no page was truncated). Rows are pulled
+    from the cursor in chunks and the page stops early once ``max_rows`` or
+    ``max_bytes`` is reached. ``budget`` bounds execution and fetching.
+    """
+    key = None
+    if use_cache:
+        key = _cache_key(
+            conn, query, "page", page, after_key, offset, page_size, max_rows, max_bytes, with_total
+        )
+        cached = result_cache.get(key) if key is not None else None
+        if cached is not None:
+            return replace(cached, df=cached.df.copy(deep=False))
+
+    with query_budget(conn, budget):
+        result = _run_query_page(
+            conn, query, page, after_key, offset, page_size, max_rows, max_bytes, with_total
+        )
+
+    if key is not None:
+        result_cache.put(key, result, result.bytes_used or _frame_bytes(result.df))
+        result = replace(result, df=result.df.copy(deep=False))
+    return result
+
+
+def _run_query_page(
+    conn: sqlite3.Connection,
+    query: str,
+    page: int,
+    after_key: Optional[Any],
+    offset: Optional[int],
+    page_size: Optional[int],
+    max_rows: Optional[int],
+    max_bytes: Optional[int],
+    with_total: bool,
+) -> QueryPage:
+    page_size = page_size or settings.QUERY_PAGE_SIZE
+    max_rows = max_rows or settings.QUERY_MAX_ROWS
+    max_bytes = max_bytes or settings.QUERY_MAX_BYTES
+    limit = min(page_size, max_rows)
+    sql = clean_sql(query)
+    offset = page * limit if offset is None else offset
+
+    # PRAGMA/EXPLAIN cannot be wrapped in a subquery: stream them as-is.
+    wrappable = sql.lower().startswith(("select", "with", "values"))
+    plan = _keyset_plan(conn, sql) if wrappable else None
+    use_keyset = plan is not None and (after_key is not None or page == 0)
+    cur = conn.cursor()
+    if use_keyset:
+        cur.execute(plan[0], (after_key if after_key is not None else -(2**63), limit + 1))
+    elif wrappable:
+        cur.execute(f"SELECT * FROM (\n{sql}\n) LIMIT ? OFFSET ?", (limit + 1, offset))
+    else:
+        cur.execute(sql)
+        for _ in range(offset):
+            if cur.fetchone() is None:
+                break
+
+    columns = [d[0] for d in cur.description or []]
+    rows: List[tuple] = []
+    used = 0
+    truncated = False
+    has_more = False
+    while True:
+        chunk = cur.fetchmany(min(1000, limit + 1))
+        if not chunk:
+            break
+        for row in chunk:
+            if len(rows) == limit:
+                has_more = True
+                break
+            used += _row_bytes(row)
+            if used > max_bytes and rows:
+                truncated = True
+                has_more = True
+                break
+            rows.append(row)
+        if has_more:
+            break
+    cur.close()
+
+    next_key = None
+    if use_keyset:
+        if rows:
+            next_key = rows[-1][0]
+        rows = [r[1:] for r in rows]
+        columns = columns[1:]
+
+    total, exact = None, False
+    if with_total:
+        if page == 0 and not has_more:
+            total, exact = len(rows), True
+        elif wrappable:
+            total, exact = estimate_total(conn, sql, table=plan[1] if plan else "")
+
+    return QueryPage(
+        df=pd.DataFrame.from_records(rows, columns=columns),
+        page=page,
+        offset=offset,
+        next_offset=offset + len(rows),
+        has_more=has_more,
+        next_key=next_key,
+        total_estimate=total,
+        total_is_exact=exact,
+        truncated=truncated,
+        bytes_used=used,
+    )
@@ -0,0 +1,255 @@
+"""
+Offline grading of classroom submissions across a process pool.
+
+Submissions are either a directory of ``.sql`` files, laid out as
+``<aluno>/<desafio>.sql`` (e.g. ``maria/desafio_2.sql``) or flat as
+``<aluno>_<desafio>.sql``, or a JSONL file with ``student``, ``challenge``
+and ``query`` fields.
+
+Usage:
+    python -m grading.batch submissions/ --out results.csv --workers 8
+"""
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import numpy as np
+
+from config.settings import settings
+from db.connection import connect_readonly
+from db.queries import QueryBudget
+from utils.answer_keys import AnswerKey, get_answer_key
+from utils.challenges import get_challenges
+from utils.validators import grade
+
+
+@dataclass
+class Submission:
+    student: str
+    challenge: Any
+    query: str
+    source: str
+    # Set when the submission could not be read; it is reported, not graded.
+    error: Optional[str] = None
+
+
+@dataclass
+class GradeResult:
+    student: str
+    challenge: Any
+    source: str
+    ok: bool
+    error: Optional[str]
+    detail: Optional[str]
+    ms: float
+
+
+@dataclass
+class BatchReport:
+    submissions: int
+    correct: int
+    errors: int
+    seconds: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+
+    @property
+    def per_second(self) -> float:
+        return self.submissions / self.seconds if self.seconds else 0.0
+
+
+# ----------------------------------------------------------------------
+# Loading submissions
+# ----------------------------------------------------------------------
+_TRAILING_ID = re.compile(r"^(?P<prefix>.*?)[_\-\s]*(?P<id>\d+)$")
+
+
+def _from_directory(root: Path) -> Iterator[Submission]:
+    for path in sorted(root.rglob("*.sql")):
+        match = _TRAILING_ID.match(path.stem)
+        if not match:
+            continue
+        relative = path.parent.relative_to(root)
+        if relative.parts:
+            student = "/".join(relative.parts)
+        else:
+            student = re.sub(r"[_\-\s]*desafio$", "", match.group("prefix"), flags=re.I)
+        submission = Submission(student=student, challenge=int(match.group("id")), query="", source=str(path))
+        try:
+            submission.query = path.read_text(encoding="utf-8")
+        except (OSError, UnicodeDecodeError) as e:
+            submission.error = f"Arquivo ilegível (use UTF-8): {e}"
+        yield submission
+
+
+def _challenge_id(value: Any) -> Any:
+    """Challenge ids are ints; JSONL exports often carry them as strings."""
+    try:
+        return int(str(value).strip())
+    except ValueError:
+        return value
+
+
+def _from_jsonl(path: Path) -> Iterator[Submission]:
+    # errors="replace": one bad byte only spoils its own line.
+    with path.open(encoding="utf-8", errors="replace") as f:
+        for n, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            source = f"{path}:{n}"
+            record = None
+            try:
+                record = json.loads(line)
+                yield Submission(
+                    student=str(record["student"]),
+                    challenge=_challenge_id(record["challenge"]),
+                    query=str(record["query"]),
+                    source=source,
+                )
+            except (ValueError, KeyError, TypeError) as e:
+                yield Submission(
+                    student=str(record.get("student", "?")) if isinstance(record, dict) else "?",
+                    challenge=None,
+                    query="",
+                    source=source,
+                    error=f"Linha inválida no JSONL: {e!r}",
+                )
+
+
+def load_submissions(paths: Sequence[str]) -> List[Submission]:
+    submissions: List[Submission] = []
+    for p in map(Path, paths):
+        submissions.extend(_from_directory(p) if p.is_dir() else _from_jsonl(p))
+    return submissions
+
+
+# ----------------------------------------------------------------------
+# Workers
+# ----------------------------------------------------------------------
+# Per-process state, set once by _init_worker.
+_conn: Optional[sqlite3.Connection] = None
+_keys: Dict[Any, AnswerKey] = {}
+_queries: Dict[Any, str] = {}
+
+
+def _init_worker(db_path: str, keys: Dict[Any, AnswerKey], queries: Dict[Any, str]) -> None:
+    global _conn, _keys, _queries
+    _conn = connect_readonly(db_path)
+    _keys, _queries = keys, queries
+
+
+def _grade_one(sub: Submission) -> GradeResult:
+    start = time.perf_counter()
+    if sub.error is not None:
+        return GradeResult(sub.student, sub.challenge, sub.source, False, sub.error, None, 0.0)
+    if sub.challenge not in _queries:
+        return GradeResult(sub.student, sub.challenge, sub.source, False, "Desafio desconhecido.", None, 0.0)
+    try:
+        result = grade(
+            _conn,
+            _queries[sub.challenge],
+            sub.query,
+            QueryBudget.from_settings(),
+            answer_key=_keys[sub.challenge],
+        )
+    except Exception as e:
+        # One pathological submission must not abort the whole batch.
+        return GradeResult(sub.student, sub.challenge, sub.source, False, str(e), None, 0.0)
+    return GradeResult(
+        student=sub.student,
+        challenge=sub.challenge,
+        source=sub.source,
+        ok=result.ok,
+        error=result.error,
+        detail=result.detail,
+        ms=round((time.perf_counter() - start) * 1000, 3),
+    )
+
+
+def grade_submissions(
+    submissions: Sequence[Submission],
+    db_path: Optional[str] = None,
+    workers: Optional[int] = None,
+) -> tuple[List[GradeResult], BatchReport]:
+    """
+    Grade ``submissions`` in parallel. Answer keys are computed once here
+    and shipped to every worker, which then only runs students' queries on
+    its own read-only connection.
+    """
+    db_path = db_path or settings.DB_PATH
+    challenges = get_challenges()
+    conn = connect_readonly(db_path)
+    try:
+        keys = {c["id"]: get_answer_key(conn, c) for c in challenges}
+    finally:
+        conn.close()
+    queries = {c["id"]: c["expected_query"] for c in challenges}
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, min(64, len(submissions) // (workers * 4)))
+    start = time.perf_counter()
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_worker,
+        initargs=(db_path, keys, queries),
+    ) as pool:
+        results = list(pool.map(_grade_one, submissions, chunksize=chunksize))
+    seconds = time.perf_counter() - start
+
+    latencies = np.array([r.ms for r in results]) if results else np.zeros(1)
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    report = BatchReport(
+        submissions=len(results),
+        correct=sum(r.ok for r in results),
+        errors=sum(r.error is not None for r in results),
+        seconds=seconds,
+        p50_ms=float(p50),
+        p95_ms=float(p95),
+        p99_ms=float(p99),
+    )
+    return results, report
+
+
+def write_results(results: Sequence[GradeResult], path: str) -> None:
+    """CSV when ``path`` ends in .csv, JSONL otherwise."""
+    rows = [asdict(r) for r in results]
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            writer = csv.DictWriter(f, fieldnames=[f for f in GradeResult.__dataclass_fields__])
+            writer.writeheader()
+            writer.writerows(rows)
+        else:
+            for row in rows:
+                f.write(json.dumps(row, ensure_ascii=False) + "\n")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Correção em lote das submissões dos desafios.")
+    parser.add_argument("entradas", nargs="+", help="diretórios de .sql ou arquivos JSONL")
+    parser.add_argument("--db", default=settings.DB_PATH)
+    parser.add_argument("--out", default="resultados.csv")
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    submissions = load_submissions(args.entradas)
+    results, r = grade_submissions(submissions, db_path=args.db, workers=args.workers)
+    write_results(results, args.out)
+    print(
+        f"{r.submissions:,} submissões em {r.seconds:.2f}s ({r.per_second:,.1f}/s): "
+        f"{r.correct:,} corretas, {r.errors:,} com erro. "
+        f"Latência p50 {r.p50_ms:.1f} ms, p95 {r.p95_ms:.1f} ms, p99 {r.p99_ms:.1f} ms. "
+        f"Resultados em {args.out}."
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,323 @@
+"""
+Streaming bronze -> silver -> gold ingestion for campaign exports.
+
+Usage:
+    python -m ingest.pipeline exports/*.csv exports/meta.jsonl --chunk-size 50000
+"""
+import argparse
+import hashlib
+import os
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+from config.settings import settings
+from db.dim_tempo import ensure_calendar
+from db.gold import rebuild_gold, refresh_gold
+from ingest.readers import BRONZE_COLUMNS, detect_format, iter_chunks
+
+
+_INSERT_BRONZE = (
+    f"INSERT INTO bronze_marketing (id_carga, linha, {', '.join(BRONZE_COLUMNS)}) "
+    f"VALUES (?, ?, {', '.join('?' for _ in BRONZE_COLUMNS)});"
+)
+
+# Typed, trimmed view of one load's bronze rows; invalid rows have NULL keys.
+_CLEAN_BRONZE = """
+SELECT
+    id,
+    CASE
+        WHEN trim(data) GLOB '[0-9][0-9][0-9][0-9]-[0-9][0-9]-[0-9][0-9]*'
+            THEN date(substr(trim(data), 1, 10))
+        WHEN trim(data) GLOB '[0-9][0-9]/[0-9][0-9]/[0-9][0-9][0-9][0-9]*'
+            THEN date(substr(trim(data), 7, 4) || '-' || substr(trim(data), 4, 2)
+                      || '-' || substr(trim(data), 1, 2))
+    END AS data,
+    NULLIF(trim(nome_produto), '') AS nome_produto,
+    NULLIF(trim(categoria), '') AS categoria,
+    CAST(replace(NULLIF(trim(preco), ''), ',', '.') AS REAL) AS preco,
+    NULLIF(trim(canal), '') AS canal,
+    COALESCE(NULLIF(trim(objetivo), ''), 'Não informado') AS objetivo,
+    CAST(CAST(replace(NULLIF(trim(impressoes), ''), ',', '.') AS REAL) AS INTEGER) AS impressoes,
+    CAST(CAST(replace(NULLIF(trim(cliques), ''), ',', '.') AS REAL) AS INTEGER) AS cliques,
+    CAST(replace(NULLIF(trim(gastos), ''), ',', '.') AS REAL) AS gastos,
+    CAST(CAST(replace(NULLIF(trim(vendas), ''), ',', '.') AS REAL) AS INTEGER) AS vendas
+FROM bronze_marketing
+WHERE id_carga = :carga
+"""
+
+_VALID = "b.data IS NOT NULL AND b.nome_produto IS NOT NULL AND b.canal IS NOT NULL"
+
+# Later rows win: ORDER BY id makes the upsert apply rows in file order.
+_BRONZE_TO_SILVER = f"""
+INSERT INTO silver_marketing (
+    id_tempo, nome_produto, canal, objetivo, data, categoria, preco,
+    impressoes, cliques, gastos, vendas, id_carga
+)
+SELECT CAST(strftime('%Y%m%d', b.data) AS INTEGER), b.nome_produto, b.canal, b.objetivo,
+       b.data, b.categoria, b.preco,
+       COALESCE(b.impressoes, 0), COALESCE(b.cliques, 0), COALESCE(b.gastos, 0),
+       COALESCE(b.vendas, 0), :carga
+FROM ({_CLEAN_BRONZE}) AS b
+WHERE {_VALID}
+ORDER BY b.id
+ON CONFLICT (id_tempo, nome_produto, canal, objetivo) DO UPDATE SET
+    categoria = COALESCE(excluded.categoria, categoria),
+    preco = COALESCE(excluded.preco, preco),
+    impressoes = excluded.impressoes,
+    cliques = excluded.cliques,
+    gastos = excluded.gastos,
+    vendas = excluded.vendas,
+    id_carga = excluded.id_carga;
+"""
+
+_NEW_PRODUCTS = """
+INSERT INTO dim_produto (nome_produto, categoria, preco)
+SELECT s.nome_produto, MAX(s.categoria), MAX(s.preco)
+FROM silver_marketing s
+WHERE s.id_carga = :carga
+  AND NOT EXISTS (SELECT 1 FROM dim_produto p WHERE p.nome_produto = s.nome_produto)
+GROUP BY s.nome_produto;
+"""
+
+_NEW_CAMPAIGNS = """
+INSERT INTO dim_campanha (canal, objetivo)
+SELECT DISTINCT s.canal, s.objetivo
+FROM silver_marketing s
+WHERE s.id_carga = :carga
+  AND NOT EXISTS (
+      SELECT 1 FROM dim_campanha c WHERE c.canal = s.canal AND c.objetivo = s.objetivo
+  );
+"""
+
+# Resolve surrogate keys and the matching existing fact (if any) once.
+_STAGE_FACTS = """
+CREATE TEMP TABLE _ingest_fatos AS
+SELECT k.*,
+       (SELECT f.id_fato FROM fato_marketing f
+        WHERE f.id_tempo = k.id_tempo AND f.id_produto = k.id_produto
+          AND f.id_campanha = k.id_campanha
+        LIMIT 1) AS id_fato
+FROM (
+    SELECT (SELECT MIN(p.id_produto) FROM dim_produto p
+            WHERE p.nome_produto = s.nome_produto) AS id_produto,
+           (SELECT MIN(c.id_campanha) FROM dim_campanha c
+            WHERE c.canal = s.canal AND c.objetivo = s.objetivo) AS id_campanha,
+           s.id_tempo, s.data, s.impressoes, s.cliques, s.gastos, s.vendas
+    FROM silver_marketing s
+    WHERE s.id_carga = :carga
+) AS k;
+"""
+
+_UPDATE_FACTS = """
+UPDATE fato_marketing
+SET impressoes = t.impressoes, cliques = t.cliques, gastos = t.gastos, vendas = t.vendas
+FROM _ingest_fatos t
+WHERE fato_marketing.id_fato = t.id_fato
+  AND (fato_marketing.impressoes IS NOT t.impressoes OR fato_marketing.cliques IS NOT t.cliques
+       OR fato_marketing.gastos IS NOT t.gastos OR fato_marketing.vendas IS NOT t.vendas);
+"""
+
+_INSERT_FACTS = """
+INSERT INTO fato_marketing (
+    id_produto, id_campanha, data, id_tempo, impressoes, cliques, gastos, vendas
+)
+SELECT id_produto, id_campanha, data, id_tempo, impressoes, cliques, gastos, vendas
+FROM _ingest_fatos
+WHERE id_fato IS NULL
+ORDER BY id_tempo;
+"""
+
+
+@dataclass
+class IngestReport:
+    arquivo: str
+    id_carga: int
+    rows_read: int = 0
+    rows_resumed: int = 0
+    rows_rejected: int = 0
+    rows_silver: int = 0
+    products_new: int = 0
+    campaigns_new: int = 0
+    facts_inserted: int = 0
+    facts_updated: int = 0
+    already_loaded: bool = False
+    timings: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def seconds(self) -> float:
+        return sum(self.timings.values())
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows_read / self.seconds if self.seconds > 0 else 0.0
+
+
+def file_fingerprint(path: str, block_size: int = 1 << 20) -> str:
+    """
+    SHA-256 of the whole file. Any changed byte makes a new load, so a
+    corrected re-export of the same size is never taken for one already
+    loaded, and a resume only continues the exact file it started.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for block in iter(lambda: fh.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _open_load(conn: sqlite3.Connection, path: str, fmt: str) -> tuple:
+    fingerprint = file_fingerprint(path)
+    row = conn.execute(
+        "SELECT id_carga, linhas_lidas, status FROM ingest_carga WHERE fingerprint = ?;",
+        (fingerprint,),
+    ).fetchone()
+    if row:
+        return row
+    cur = conn.execute(
+        "INSERT INTO ingest_carga (arquivo, fingerprint, formato) VALUES (?, ?, ?);",
+        (os.path.abspath(path), fingerprint, fmt),
+    )
+    conn.commit()
+    return cur.lastrowid, 0, "bronze"
+
+
+def _load_bronze(
+    conn: sqlite3.Connection,
+    path: str,
+    fmt: str,
+    id_carga: int,
+    skip: int,
+    chunk_size: int,
+    report: IngestReport,
+) -> None:
+    """Append chunks to bronze; each commit also records the resume position."""
+    done = skip
+    for chunk in iter_chunks(path, chunk_size, skip=skip, fmt=fmt):
+        conn.execute("BEGIN;")
+        conn.executemany(_INSERT_BRONZE, [(id_carga, *row) for row in chunk])
+        done += len(chunk)
+        conn.execute(
+            "UPDATE ingest_carga SET linhas_lidas = ? WHERE id_carga = ?;", (done, id_carga)
+        )
+        conn.commit()
+        report.rows_read += len(chunk)
+
+
+def _promote(conn: sqlite3.Connection, id_carga: int, report: IngestReport) -> None:
+    """bronze -> silver -> dims/fato -> gold, in one transaction."""
+    params = {"carga": id_carga}
+    conn.execute("BEGIN;")
+    try:
+        total, valid = conn.execute(
+            f"SELECT COUNT(*), COALESCE(SUM({_VALID}), 0) FROM ({_CLEAN_BRONZE}) AS b;", params
+        ).fetchone()
+        report.rows_rejected = total - valid
+
+        report.rows_silver = conn.execute(_BRONZE_TO_SILVER, params).rowcount
+        low, high = conn.execute(
+            "SELECT MIN(data), MAX(data) FROM silver_marketing WHERE id_carga = :carga;", params
+        ).fetchone()
+        if low and high:
+            ensure_calendar(conn, date.fromisoformat(low), date.fromisoformat(high))
+
+        report.products_new = conn.execute(_NEW_PRODUCTS, params).rowcount
+        report.campaigns_new = conn.execute(_NEW_CAMPAIGNS, params).rowcount
+
+        conn.execute("DROP TABLE IF EXISTS temp._ingest_fatos;")
+        conn.execute(_STAGE_FACTS, params)
+        report.facts_updated = conn.execute(_UPDATE_FACTS).rowcount
+        report.facts_inserted = conn.execute(_INSERT_FACTS).rowcount
+        conn.execute("DROP TABLE temp._ingest_fatos;")
+
+        # Updated facts sit below the watermark, so only a rebuild sees them.
+        if report.facts_updated:
+            rebuild_gold(conn)
+        else:
+            refresh_gold(conn)
+
+        conn.execute(
+            "UPDATE ingest_carga SET status = 'concluida', concluida_em = datetime('now') "
+            "WHERE id_carga = ?;",
+            (id_carga,),
+        )
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def ingest_file(
+    conn: sqlite3.Connection,
+    path: str,
+    chunk_size: int = 50_000,
+    fmt: Optional[str] = None,
+    keep_bronze: bool = True,
+) -> IngestReport:
+    """
+    Stream one export into bronze in fixed-size chunks, then promote it.
+    Interrupted loads resume from the last committed chunk.
+    """
+    fmt = fmt or detect_format(path)
+    if conn.in_transaction:
+        conn.commit()
+    id_carga, resumed, status = _open_load(conn, path, fmt)
+    report = IngestReport(arquivo=path, id_carga=id_carga, rows_resumed=resumed)
+    if status == "concluida":
+        report.already_loaded = True
+        return report
+
+    start = time.perf_counter()
+    _load_bronze(conn, path, fmt, id_carga, resumed, chunk_size, report)
+    report.timings["bronze"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _promote(conn, id_carga, report)
+    report.timings["silver_ouro"] = time.perf_counter() - start
+
+    if not keep_bronze:
+        conn.execute("DELETE FROM bronze_marketing WHERE id_carga = ?;", (id_carga,))
+        conn.commit()
+    return report
+
+
+def ingest_files(
+    conn: sqlite3.Connection,
+    paths: Sequence[str],
+    chunk_size: int = 50_000,
+    keep_bronze: bool = True,
+) -> List[IngestReport]:
+    return [ingest_file(conn, p, chunk_size=chunk_size, keep_bronze=keep_bronze) for p in paths]
+
+
+def main() -> None:
+    from db.init_db import bootstrap_database
+
+    parser = argparse.ArgumentParser(description="Ingestão de exportações de campanhas (CSV/JSONL).")
+    parser.add_argument("arquivos", nargs="+")
+    parser.add_argument("--db", default=settings.DB_PATH)
+    parser.add_argument("--chunk-size", type=int, default=50_000)
+    parser.add_argument("--purge-bronze", action="store_true", help="remove a carga da bronze ao final")
+    args = parser.parse_args()
+
+    pool = bootstrap_database(args.db)
+    with pool.write() as conn:
+        for path in args.arquivos:
+            r = ingest_file(conn, path, chunk_size=args.chunk_size, keep_bronze=not args.purge_bronze)
+            if r.already_loaded:
+                print(f"{path}: já carregado (carga {r.id_carga}), ignorado.")
+                continue
+            print(
+                f"{path}: {r.rows_read:,} linhas lidas"
+                + (f" (retomado após {r.rows_resumed:,})" if r.rows_resumed else "")
+                + f", {r.rows_rejected:,} rejeitadas, {r.rows_silver:,} na prata, "
+                f"{r.facts_inserted:,} fatos novos, {r.facts_updated:,} atualizados, "
+                f"{r.products_new} produtos e {r.campaigns_new} campanhas novos — "
+                f"{r.seconds:.2f}s ({r.rows_per_second:,.0f} linhas/s)"
+            )
+
+
+if __name__ == "__main__":
+    main()
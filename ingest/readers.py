@@ -0,0 +1,109 @@
+import csv
+import json
+import os
+import unicodedata
+from itertools import islice
+from typing import Dict, Iterator, List, Optional
+
+
+# Columns of bronze_marketing, in insert order.
+BRONZE_COLUMNS = (
+    "data", "nome_produto", "categoria", "preco", "canal", "objetivo",
+    "impressoes", "cliques", "gastos", "vendas",
+)
+
+# Header spellings seen in ad-platform exports, mapped to bronze columns.
+ALIASES = {
+    "date": "data", "dia": "data", "day": "data",
+    "produto": "nome_produto", "product": "nome_produto", "product_name": "nome_produto",
+    "category": "categoria",
+    "price": "preco", "preco_unitario": "preco",
+    "channel": "canal", "plataforma": "canal", "platform": "canal",
+    "objective": "objetivo", "goal": "objetivo",
+    "impressions": "impressoes", "impressao": "impressoes",
+    "clicks": "cliques", "clique": "cliques",
+    "spend": "gastos", "cost": "gastos", "custo": "gastos", "gasto": "gastos",
+    "sales": "vendas", "conversions": "vendas", "conversoes": "vendas", "venda": "vendas",
+}
+
+
+def _normalize_header(name: str) -> str:
+    key = unicodedata.normalize("NFKD", name).encode("ascii", "ignore").decode()
+    key = key.strip().lower().replace(" ", "_").replace("-", "_")
+    return ALIASES.get(key, key)
+
+
+def detect_format(path: str) -> str:
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".jsonl", ".ndjson", ".json"):
+        return "jsonl"
+    return "csv"
+
+
+def _csv_records(path: str) -> Iterator[Dict[str, object]]:
+    with open(path, newline="", encoding="utf-8-sig") as fh:
+        sample = fh.read(64 * 1024)
+        fh.seek(0)
+        try:
+            dialect = csv.Sniffer().sniff(sample, delimiters=",;\t|")
+        except csv.Error:
+            dialect = csv.excel
+        reader = csv.reader(fh, dialect)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [_normalize_header(h) for h in header]
+        for row in reader:
+            if not row:
+                continue
+            yield dict(zip(columns, row))
+
+
+def _jsonl_records(path: str) -> Iterator[Dict[str, object]]:
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                obj = json.loads(line)
+            except json.JSONDecodeError:
+                # Keep the line position; the row is rejected in silver.
+                yield {}
+                continue
+            yield {_normalize_header(k): v for k, v in obj.items()} if isinstance(obj, dict) else {}
+
+
+def iter_records(path: str, fmt: Optional[str] = None) -> Iterator[Dict[str, object]]:
+    """Stream records as dicts keyed by bronze column names."""
+    fmt = fmt or detect_format(path)
+    return _jsonl_records(path) if fmt == "jsonl" else _csv_records(path)
+
+
+def _as_text(value: object) -> Optional[str]:
+    if value is None:
+        return None
+    return value if isinstance(value, str) else str(value)
+
+
+def iter_chunks(
+    path: str,
+    chunk_size: int,
+    skip: int = 0,
+    fmt: Optional[str] = None,
+) -> Iterator[List[tuple]]:
+    """
+    Yield lists of ``(linha, *BRONZE_COLUMNS)`` tuples of at most chunk_size,
+    skipping the first ``skip`` records (used to resume a load).
+    """
+    records = enumerate(iter_records(path, fmt), start=1)
+    if skip:
+        records = islice(records, skip, None)
+    while True:
+        chunk = [
+            (linha, *(_as_text(record.get(col)) for col in BRONZE_COLUMNS))
+            for linha, record in islice(records, chunk_size)
+        ]
+        if not chunk:
+            return
+        yield chunk
@@ -0,0 +1,51 @@
+INGEST_SCHEMA = """
+CREATE TABLE IF NOT EXISTS ingest_carga (
+    id_carga INTEGER PRIMARY KEY,
+    arquivo TEXT NOT NULL,
+    fingerprint TEXT NOT NULL UNIQUE,
+    formato TEXT NOT NULL,
+    linhas_lidas INTEGER NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'bronze',   -- bronze -> concluida
+    iniciada_em TEXT NOT NULL DEFAULT (datetime('now')),
+    concluida_em TEXT
+);
+
+-- Bronze: raw text exactly as it arrived.
+CREATE TABLE IF NOT EXISTS bronze_marketing (
+    id INTEGER PRIMARY KEY,
+    id_carga INTEGER NOT NULL REFERENCES ingest_carga(id_carga),
+    linha INTEGER NOT NULL,
+    data TEXT,
+    nome_produto TEXT,
+    categoria TEXT,
+    preco TEXT,
+    canal TEXT,
+    objetivo TEXT,
+    impressoes TEXT,
+    cliques TEXT,
+    gastos TEXT,
+    vendas TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_bronze_carga ON bronze_marketing (id_carga, id);
+
+-- Silver: typed, trimmed and deduplicated on the natural key.
+CREATE TABLE IF NOT EXISTS silver_marketing (
+    id_tempo INTEGER NOT NULL,
+    nome_produto TEXT NOT NULL,
+    canal TEXT NOT NULL,
+    objetivo TEXT NOT NULL,
+    data TEXT NOT NULL,
+    categoria TEXT,
+    preco REAL,
+    impressoes INTEGER,
+    cliques INTEGER,
+    gastos REAL,
+    vendas INTEGER,
+    id_carga INTEGER NOT NULL,
+    PRIMARY KEY (id_tempo, nome_produto, canal, objetivo)
+);
+
+-- Natural-key lookups used by the dimension upserts.
+CREATE INDEX IF NOT EXISTS idx_produto_nome ON dim_produto (nome_produto);
+CREATE INDEX IF NOT EXISTS idx_campanha_canal ON dim_campanha (canal, objetivo);
+"""
@@ -0,0 +1,44 @@
+import pandas as pd
+import pytest
+
+from utils.fingerprint import FingerprintBuilder, fingerprint_frame
+
+
+def _same(a: dict, b: dict) -> bool:
+    return fingerprint_frame(pd.DataFrame(a)) == fingerprint_frame(pd.DataFrame(b))
+
+
+def test_integers_compare_exactly():
+    assert not _same({"total": [123456789012]}, {"total": [123456789049]})
+    assert not _same({"total": [2**60 + 1]}, {"total": [2**60]})
+
+
+def test_whole_floats_compare_like_integers():
+    assert _same({"total": [150]}, {"total": [150.0]})
+    assert _same({"total": [150]}, {"total": [150.0000000001]})
+    # An integer column with NULLs arrives as float64.
+    assert not _same({"total": [123456789012.0, None]}, {"total": [123456789049.0, None]})
+    assert _same({"total": pd.Series([5, None], dtype=object)}, {"total": [5.0, None]})
+
+
+def test_floats_tolerate_rounding_noise():
+    assert _same({"media": [0.1 + 0.2]}, {"media": [0.3]})
+    assert _same({"media": [1234.56789012345]}, {"media": [1234.56789012]})
+    assert not _same({"media": [0.3]}, {"media": [0.31]})
+
+
+def test_order_and_column_order_do_not_matter():
+    assert _same({"a": [1, 2], "b": ["x", "y"]}, {"b": ["y", "x"], "a": [2, 1]})
+
+
+def test_duplicates_count():
+    assert not _same({"a": [1, 1, 2]}, {"a": [1, 2, 2]})
+
+
+@pytest.mark.parametrize("split", [1, 2, 3])
+def test_chunks_add_up_to_the_whole(split):
+    df = pd.DataFrame({"a": [1, 2, None, 4], "b": [0.5, None, 2.5, 3.5]})
+    builder = FingerprintBuilder()
+    for start in range(0, len(df), split):
+        assert builder.add(df.iloc[start:start + split]) is None
+    assert builder.result() == fingerprint_frame(df)
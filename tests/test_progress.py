@@ -0,0 +1,29 @@
+import sqlite3
+
+from db.connection import get_pool
+from db.migrations import run_script
+from db.progress import PROGRESS_MIGRATIONS, ProgressStore
+
+
+def test_upgrade_installs_per_challenge_trigger(tmp_path):
+    # A store from before the cohort tables: version 1 schema, no schema_version.
+    path = str(tmp_path / "progress.db")
+    conn = sqlite3.connect(path)
+    run_script(conn, PROGRESS_MIGRATIONS[0].apply)
+    conn.execute("INSERT INTO progress_event (student_id, challenge_id, xp) VALUES ('a', 1, 10);")
+    conn.commit()
+    conn.close()
+
+    store = ProgressStore(get_pool(path))
+    store.record("b", 1, 10)
+    store.record("c", 2, 20)
+    assert store.flush()
+
+    cohort = store.cohort()
+    assert cohort.completions == {1: 2, 2: 1}
+    assert cohort.xp_histogram == {10: 2, 20: 1}
+    assert store.rank("c").position == 1
+
+    # Opening the store again must not rebuild or double-count anything.
+    again = ProgressStore(get_pool(path))
+    assert again.cohort() == cohort
@@ -0,0 +1,31 @@
+import sqlite3
+
+import pytest
+
+from db.queries import result_cache_stats, run_query
+
+
+@pytest.mark.parametrize(
+    "query",
+    [
+        "SELECT random() AS v",
+        "SELECT hex(randomblob(8)) AS v",
+        "SELECT strftime('%f', 'now') AS v",
+        "select julianday('NOW') as v",
+    ],
+)
+def test_nondeterministic_queries_are_not_cached(query):
+    conn = sqlite3.connect(":memory:")
+    before = result_cache_stats()
+    run_query(conn, query)
+    run_query(conn, query)
+    after = result_cache_stats()
+    assert (after.hits, after.entries) == (before.hits, before.entries)
+
+
+def test_deterministic_queries_are_cached():
+    conn = sqlite3.connect(":memory:")
+    run_query(conn, "SELECT 1 AS v")
+    before = result_cache_stats()
+    run_query(conn, "select 1 as v")
+    assert result_cache_stats().hits == before.hits + 1
@@ -0,0 +1,56 @@
+import sqlite3
+
+import pytest
+
+from utils.validators import validate_answer, validate_answer_in_db
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    conn.executescript(
+        """
+        CREATE TABLE t (id INTEGER, total INTEGER, media REAL, nome TEXT);
+        INSERT INTO t VALUES
+            (1, 123456789012, 0.3, 'a'),
+            (2, 150, NULL, 'b'),
+            (2, 150, NULL, 'b'),
+            (3, NULL, 2.5, NULL);
+        """
+    )
+    yield conn
+    conn.close()
+
+
+EXPECTED = "SELECT id, total, media, nome FROM t"
+
+CASES = [
+    # (student query, should pass)
+    (EXPECTED, True),
+    ("SELECT nome, media, total, id FROM t ORDER BY id DESC", True),
+    ("SELECT id, total, media, nome FROM t -- comentário", True),
+    ("SELECT id, total * 1.0 AS total, media, nome FROM t", True),
+    ("SELECT id, total, CASE WHEN id = 1 THEN 0.1 + 0.2 ELSE media END AS media, nome FROM t", True),
+    ("SELECT id, CASE WHEN id = 1 THEN 123456789049 ELSE total END AS total, media, nome FROM t", False),
+    ("SELECT id, CASE WHEN id = 1 THEN 123456789012.5 ELSE total END AS total, media, nome FROM t", False),
+    ("SELECT id, total, media, nome FROM t WHERE id <> 1", False),
+    ("SELECT DISTINCT id, total, media, nome FROM t", False),
+    ("SELECT id, total, media, nome FROM t UNION ALL SELECT 2, 150, NULL, 'b'", False),
+    ("SELECT id, total, COALESCE(media, 0) AS media, nome FROM t", False),
+    ("SELECT id, total, media, COALESCE(nome, '') AS nome FROM t", False),
+]
+
+
+@pytest.mark.parametrize("user_query,ok", CASES)
+def test_hash_and_in_db_grading_agree(conn, user_query, ok):
+    by_hash = validate_answer(conn, EXPECTED, user_query)
+    in_db = validate_answer_in_db(conn, EXPECTED, user_query)
+    assert by_hash.error is None and in_db.error is None
+    assert by_hash.ok == in_db.ok == ok
+
+
+def test_in_db_detail_counts_every_missing_occurrence(conn):
+    result = validate_answer_in_db(conn, EXPECTED, "SELECT id, total, media, nome FROM t WHERE id <> 2")
+    assert not result.ok
+    assert result.detail == "2 linha(s) faltando e 0 linha(s) a mais."
+    assert result.df_missing["vezes"].tolist() == [2]
@@ -1,27 +1,38 @@
+import logging
+
 import streamlit as st
 import pandas as pd
 import sqlite3
 
-from agent.agent import answer_question
-from db.connection import get_connection
-from db.queries import run_query
+from agent.guardrail import get_guardrail
+from agent.prompt_builder import Conversation
+from agent.service import AgentUnavailable, get_agent_service
+from config.settings import settings
+from db.connection import get_pool
+from db.queries import QueryBudget, QueryPage, run_query_page
 
 
-# -----------------------
-# 🔒 Lista de temas proibidos
-# -----------------------
-FORBIDDEN_TOPICS = [
-    "ignore", "jailbreak", "prompt", "regras", "system prompt",
-    "prisão", "hacker", "hackear", "burlar", "bypass", "desobedecer",
-    "modificar instruções", "exploit", "conteúdo adulto", "política",
-    "religião", "violência"
-]
+logger = logging.getLogger(__name__)
 
 
+# -----------------------
+# 🔒 Temas proibidos: regras em config/guardrail_rules.txt
+# -----------------------
 def is_forbidden(message: str) -> bool:
     """Detecta tentativas de jailbreak ou assuntos proibidos."""
-    msg = message.lower()
-    return any(word in msg for word in FORBIDDEN_TOPICS)
+    match = get_guardrail().check(message)
+    if match is not None:
+        logger.info("Mensagem bloqueada pelo guardrail (%s: %r).", match.rule.category, match.text)
+    return match is not None
+
+
+def _page_caption(result: QueryPage) -> str:
+    text = f"Query executada com sucesso! {len(result.df)} linha(s) exibidas"
+    if result.has_more:
+        total = result.total_estimate
+        text += f" de ~{total}+" if not result.total_is_exact else f" de {total}"
+        text += " — use a aba Sandbox para paginar o resultado completo"
+    return text + "."
 
 
 # ------------------------------------------------------------
@@ -53,12 +64,16 @@ O agente está autorizado **somente** a responder sobre:
     # --------------------------------------------
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
+    # O que o agente "lembra": resumo das mensagens antigas + as mais recentes
+    if "conversation" not in st.session_state:
+        st.session_state.conversation = Conversation()
 
     # --------------------------------------------
     # Botão de nova conversa
     # --------------------------------------------
     if st.button("🧹 Nova conversa"):
         st.session_state.chat_history = []
+        st.session_state.conversation = Conversation()
         st.success("Conversa reiniciada!")
         st.experimental_rerun()
 
@@ -67,6 +82,11 @@ O agente está autorizado **somente** a responder sobre:
     # --------------------------------------------
     # Apresentação do histórico do chat
     # --------------------------------------------
+    conversation = st.session_state.conversation
+    if conversation.folded:
+        with st.expander(f"🗂️ {conversation.folded} mensagem(ns) anterior(es) resumida(s)"):
+            st.markdown("\n".join(f"- {line}" for line in conversation.summary_lines))
+
     for sender, text in st.session_state.chat_history:
         if sender == "user":
             avatar = "🧑‍💻"
@@ -107,8 +127,6 @@ O agente está autorizado **somente** a responder sobre:
     # --------------------------------------------
     uploaded_file = st.file_uploader("Envie um arquivo .sql para análise opcional", type=["sql"])
 
-    conn = get_connection()
-
     if st.button("Enviar", type="primary"):
 
         # Caso o aluno tenha enviado um arquivo .sql
@@ -119,9 +137,10 @@ O agente está autorizado **somente** a responder sobre:
             st.code(sql_query, language="sql")
 
             try:
-                df = run_query(conn, sql_query)
-                st.success("Query executada com sucesso!")
-                st.dataframe(df)
+                with get_pool().read() as conn:
+                    result = run_query_page(conn, sql_query, budget=QueryBudget.from_settings())
+                st.success(_page_caption(result))
+                st.dataframe(result.df)
             except Exception as e:
                 st.error(f"Erro ao executar SQL do arquivo: {e}")
 
@@ -141,18 +160,31 @@ O agente está autorizado **somente** a responder sobre:
             # Se for SQL, tenta executar
             if user_message.lower().startswith(("select", "with", "pragma")):
                 try:
-                    df = run_query(conn, user_message)
-                    st.success("Query executada com sucesso!")
-                    st.dataframe(df)
+                    with get_pool().read() as conn:
+                        result = run_query_page(conn, user_message, budget=QueryBudget.from_settings())
+                    st.success(_page_caption(result))
+                    st.dataframe(result.df)
                 except Exception as e:
                     st.error(f"Erro na query SQL:\n{e}")
 
-            # Gera resposta do agente
-            with st.spinner("O agente está pensando..."):
-                bot_response = answer_question(user_message)
-
-            # Salva histórico da conversa
+            # Gera resposta do agente, exibindo os trechos conforme chegam
+            placeholder = st.empty()
+            placeholder.markdown("🤖 _O agente está pensando..._")
+            parts = []
+            try:
+                for piece in get_agent_service().stream(user_message, conversation):
+                    parts.append(piece)
+                    placeholder.markdown("🤖 " + "".join(parts) + "▌")
+            except AgentUnavailable as e:
+                parts.append(f"\n\n⚠️ O agente não conseguiu concluir a resposta ({e}). Tente novamente.")
+            bot_response = "".join(parts)
+            placeholder.markdown("🤖 " + bot_response)
+
+            # Salva histórico da conversa (a tela mostra só as últimas mensagens)
             st.session_state.chat_history.append(("user", user_message))
             st.session_state.chat_history.append(("agent", bot_response))
+            del st.session_state.chat_history[: -settings.CHAT_HISTORY_MAX_MESSAGES]
+            conversation.add("user", user_message)
+            conversation.add("agent", bot_response)
 
             st.experimental_rerun()
@@ -1,9 +1,13 @@
 from typing import Dict, Any, List
 
 import streamlit as st
-import sqlite3
 
-from utils.validators import validate_answer
+from db.connection import ConnectionPool, PoolTimeout
+from db.queries import QueryBudget
+from ui.query_runner import run_cancellable
+from utils.answer_keys import get_answer_key
+from utils.challenges import get_challenges
+from utils.validators import ValidationResult, grade
 from utils.xp import add_xp
 
 
@@ -11,47 +15,14 @@ def _get_challenges() -> List[Dict[str, Any]]:
     """
     Returns the list of challenges and their expected queries.
     """
-    return [
-        {
-            "id": 1,
-            "titulo": "Vendas por produto",
-            "descricao": "Liste o total de vendas por produto.",
-            "dica": "Use SUM(vendas) e GROUP BY nome_produto.",
-            "expected_query": """
-                SELECT p.nome_produto, SUM(f.vendas) AS total_vendas
-                FROM fato_marketing f
-                JOIN dim_produto p ON f.id_produto = p.id_produto
-                GROUP BY p.nome_produto
-            """,
-        },
-        {
-            "id": 2,
-            "titulo": "Gasto total por canal",
-            "descricao": "Calcule quanto foi gasto em cada canal de campanha.",
-            "dica": "Use SUM(gastos) e agrupe por canal.",
-            "expected_query": """
-                SELECT c.canal, SUM(f.gastos) AS total_gasto
-                FROM fato_marketing f
-                JOIN dim_campanha c ON f.id_campanha = c.id_campanha
-                GROUP BY c.canal
-            """,
-        },
-        {
-            "id": 3,
-            "titulo": "Maior número de cliques por canal",
-            "descricao": "Mostre o maior número de cliques registrado por canal.",
-            "dica": "Use MAX(cliques) e GROUP BY canal.",
-            "expected_query": """
-                SELECT c.canal, MAX(f.cliques) AS max_cliques
-                FROM fato_marketing f
-                JOIN dim_campanha c ON f.id_campanha = c.id_campanha
-                GROUP BY c.canal
-            """,
-        },
-    ]
-
-
-def render_challenges_tab(conn: sqlite3.Connection) -> None:
+    return get_challenges()
+
+
+def _mark_cancelled() -> None:
+    st.session_state["challenge_cancelled"] = True
+
+
+def render_challenges_tab(pool: ConnectionPool) -> None:
     st.header("🎮 Desafios Gamificados")
     st.write(
         "Responda aos desafios escrevendo queries SQL. "
@@ -76,12 +47,33 @@ def render_challenges_tab(conn: sqlite3.Connection) -> None:
         key=f"challenge_sql_{challenge['id']}",
     )
 
+    if st.session_state.pop("challenge_cancelled", False):
+        st.warning("Validação cancelada.")
+
     if st.button("Validar resposta", type="primary", key=f"validate_{challenge['id']}"):
         if not user_sql.strip():
             st.warning("Digite uma query antes de validar.")
             return
 
-        result = validate_answer(conn, challenge["expected_query"], user_sql)
+        def validate(budget: QueryBudget) -> ValidationResult:
+            with pool.read() as conn:
+                try:
+                    answer_key = get_answer_key(conn, challenge, budget)
+                except Exception as e:
+                    # Se der erro aqui, é problema no gabarito
+                    return ValidationResult(
+                        ok=False,
+                        error=f"Erro ao executar query esperada (gabarito): {e}",
+                        df_user=None,
+                        df_expected=None,
+                    )
+                return grade(conn, challenge["expected_query"], user_sql, budget, answer_key=answer_key)
+
+        try:
+            result = run_cancellable(validate, key=f"challenge_{challenge['id']}", on_cancel=_mark_cancelled)
+        except PoolTimeout:
+            st.warning("O banco está ocupado com muitas consultas agora. Tente validar novamente em instantes.")
+            return
 
         if result.error:
             st.error(f"Erro na execução da sua query:\n\n{result.error}")
@@ -93,6 +85,14 @@ def render_challenges_tab(conn: sqlite3.Connection) -> None:
                 "A query executou, mas o resultado é diferente do esperado. "
                 "Compare abaixo e ajuste sua resposta."
             )
+            if result.detail:
+                st.info(result.detail)
+            if result.df_missing is not None and len(result.df_missing):
+                st.markdown("#### ➖ Linhas esperadas que faltam no seu resultado")
+                st.dataframe(result.df_missing, use_container_width=True)
+            if result.df_extra is not None and len(result.df_extra):
+                st.markdown("#### ➕ Linhas a mais no seu resultado")
+                st.dataframe(result.df_extra, use_container_width=True)
             if result.df_user is not None:
                 st.markdown("#### 🔎 Seu resultado")
                 st.dataframe(result.df_user, use_container_width=True)
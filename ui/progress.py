@@ -1,6 +1,67 @@
+import pandas as pd
 import streamlit as st
 
-from utils.xp import get_xp, get_level, get_completed_challenges, get_total_challenges
+from db.progress import get_progress_store
+from utils.challenges import get_challenges
+from utils.xp import (
+    get_completed_challenges,
+    get_level,
+    get_student_id,
+    get_total_challenges,
+    get_xp,
+    sync_progress,
+)
+
+
+def _render_leaderboard() -> None:
+    store = get_progress_store()
+    student_id = get_student_id()
+
+    st.markdown("### 🏆 Ranking da turma")
+    rank = store.rank(student_id)
+    if rank is None:
+        st.write("Conclua um desafio para entrar no ranking.")
+    else:
+        col1, col2 = st.columns(2)
+        col1.metric("Sua posição", f"{rank.position}º de {rank.students}")
+        col2.metric("Percentil", f"{rank.percentile:.0f}%", help="Parcela da turma com menos XP que você.")
+
+    top = store.leaderboard(limit=10)
+    if top:
+        st.dataframe(
+            pd.DataFrame(
+                {
+                    "Posição": [e.position for e in top],
+                    "Aluno": [e.student_id + (" (você)" if e.student_id == student_id else "") for e in top],
+                    "XP": [e.xp for e in top],
+                    "Desafios": [e.completed for e in top],
+                }
+            ),
+            hide_index=True,
+            use_container_width=True,
+        )
+
+    cohort = store.cohort()
+    if not cohort.students:
+        return
+
+    st.markdown("### 📊 Visão da turma")
+    st.caption(f"{cohort.students} aluno(s) com ao menos um desafio concluído.")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Taxa de conclusão por desafio**")
+        rates = {
+            f"Desafio {c['id']}": 100.0 * cohort.completions.get(c["id"], 0) / cohort.students
+            for c in get_challenges()
+        }
+        st.bar_chart(pd.Series(rates, name="% da turma"))
+    with col2:
+        st.markdown("**Distribuição de níveis**")
+        levels: dict = {}
+        for xp in sorted(cohort.xp_histogram):
+            level = get_level(xp)
+            levels[level] = levels.get(level, 0) + cohort.xp_histogram[xp]
+        st.bar_chart(pd.Series(levels, name="alunos"))
 
 
 def render_progress_tab() -> None:
@@ -24,6 +85,10 @@ def render_progress_tab() -> None:
     else:
         st.write("Você ainda não concluiu nenhum desafio. Vá na aba **Desafios Gamificados** para começar.")
 
+    st.markdown("---")
+    sync_progress()
+    _render_leaderboard()
+
     st.markdown("---")
     st.markdown("### Próximos passos sugeridos")
     st.write(
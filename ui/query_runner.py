@@ -0,0 +1,52 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout, wait
+from typing import Callable, Optional, TypeVar
+
+import streamlit as st
+
+from db.queries import QueryBudget
+
+
+T = TypeVar("T")
+
+# Queries run here while the script thread keeps polling (and stays interruptible).
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="sql-query")
+
+
+def run_cancellable(
+    fn: Callable[[QueryBudget], T],
+    key: str,
+    on_cancel: Optional[Callable[[], None]] = None,
+) -> T:
+    """
+    Run ``fn(budget)`` in a worker thread and show a cancel button meanwhile.
+
+    Clicking the button (or any other widget) makes Streamlit stop this run at
+    the next UI update in the polling loop; the ``finally`` block then sets the
+    cancel event, which the query's progress handler turns into an interrupt.
+    We wait for the worker before returning so a query never outlives the run
+    that started it. ``fn`` should borrow its pooled connection itself, so
+    the connection is held only while the query runs.
+    """
+    cancel = threading.Event()
+    budget = QueryBudget.from_settings(cancel_event=cancel)
+
+    status = st.empty()
+    button = st.empty()
+    button.button("⏹ Cancelar consulta", key=f"{key}_cancel", on_click=on_cancel)
+
+    future = _executor.submit(fn, budget)
+    started = time.perf_counter()
+    try:
+        while True:
+            try:
+                return future.result(timeout=0.1)
+            except FutureTimeout:
+                status.caption(f"⏳ Executando... {time.perf_counter() - started:.1f}s")
+    finally:
+        if not future.done():
+            cancel.set()
+            wait([future])
+        status.empty()
+        button.empty()
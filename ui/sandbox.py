@@ -1,10 +1,79 @@
 import streamlit as st
-import sqlite3
 
-from db.queries import run_query
+from db.connection import ConnectionPool, PoolTimeout
+from db.queries import QueryBudget, QueryPage, run_query_page
+from ui.query_runner import run_cancellable
 
 
-def render_sandbox_tab(conn: sqlite3.Connection) -> None:
+def _start_pager() -> None:
+    st.session_state["sandbox_pager"] = {
+        "query": st.session_state.get("sandbox_query", ""),
+        "page": 0,
+        "keys": [None],  # keys[i] = keyset position where page i starts
+        "offsets": [0],  # offsets[i] = row where page i starts (pages may be cut short)
+        "total": None,
+        "exact": False,
+    }
+
+
+def _cancel_pager() -> None:
+    st.session_state["sandbox_pager"] = None
+    st.session_state["sandbox_cancelled"] = True
+
+
+def _move_page(step: int) -> None:
+    pager = st.session_state["sandbox_pager"]
+    pager["page"] = max(0, pager["page"] + step)
+
+
+def _render_page(pool: ConnectionPool, pager: dict) -> None:
+    page = pager["page"]
+    after_key = pager["keys"][page] if page < len(pager["keys"]) else None
+    offset = pager["offsets"][page] if page < len(pager["offsets"]) else None
+
+    def fetch(budget: QueryBudget) -> QueryPage:
+        with pool.read() as conn:
+            return run_query_page(
+                conn,
+                pager["query"],
+                page=page,
+                after_key=after_key,
+                offset=offset,
+                with_total=pager["total"] is None,
+                budget=budget,
+            )
+
+    result = run_cancellable(fetch, key="sandbox", on_cancel=_cancel_pager)
+
+    if result.next_key is not None:
+        del pager["keys"][page + 1:]
+        pager["keys"].append(result.next_key)
+    del pager["offsets"][page + 1:]
+    pager["offsets"].append(result.next_offset)
+    if result.total_estimate is not None:
+        pager["total"], pager["exact"] = result.total_estimate, result.total_is_exact
+
+    first = result.offset + 1 if len(result.df) else 0
+    last = result.offset + len(result.df)
+    total = pager["total"]
+    if total is None:
+        total_text = ""
+    elif pager["exact"]:
+        total_text = f" de {total}"
+    else:
+        total_text = f" de ~{total}+"
+    st.success(f"Consulta executada com sucesso! Linhas {first}–{last}{total_text}.")
+    if result.truncated:
+        st.info("A página foi cortada pelo limite de memória por consulta. Refine a query com colunas ou filtros.")
+    st.dataframe(result.df, use_container_width=True)
+
+    nav_prev, nav_page, nav_next = st.columns([1, 2, 1])
+    nav_prev.button("◀ Anterior", disabled=page == 0, on_click=_move_page, args=(-1,))
+    nav_page.caption(f"Página {page + 1}")
+    nav_next.button("Próxima ▶", disabled=not result.has_more, on_click=_move_page, args=(1,))
+
+
+def render_sandbox_tab(pool: ConnectionPool) -> None:
     st.header("🧪 Sandbox SQL")
     st.write("Digite qualquer comando `SELECT` para explorar o banco de dados.")
 
@@ -12,19 +81,28 @@ def render_sandbox_tab(conn: sqlite3.Connection) -> None:
 
     with col1:
         default_query = "SELECT * FROM dim_produto;"
-        user_query = st.text_area(
+        st.text_area(
             "Sua query SQL:",
             value=default_query,
             height=150,
             key="sandbox_query",
         )
 
-        if st.button("Executar consulta", type="primary"):
+        st.button("Executar consulta", type="primary", on_click=_start_pager)
+
+        if st.session_state.pop("sandbox_cancelled", False):
+            st.warning("Consulta cancelada.")
+
+        pager = st.session_state.get("sandbox_pager")
+        if pager:
             try:
-                df = run_query(conn, user_query)
-                st.success(f"Consulta executada com sucesso! {len(df)} linha(s) retornadas.")
-                st.dataframe(df, use_container_width=True)
+                _render_page(pool, pager)
+            except PoolTimeout:
+                # Keep the pager: the next rerun tries again.
+                st.warning("O banco está ocupado com muitas consultas agora. Tente novamente em instantes.")
             except Exception as e:
+                # Do not re-run a failing/timed-out query on every rerun.
+                st.session_state["sandbox_pager"] = None
                 st.error(f"Erro ao executar a query:\n\n{e}")
 
     with col2:
@@ -32,5 +110,6 @@ def render_sandbox_tab(conn: sqlite3.Connection) -> None:
         st.markdown("- `SELECT * FROM dim_produto;`")
         st.markdown("- `SELECT * FROM dim_campanha;`")
         st.markdown("- `SELECT * FROM fato_marketing;`")
+        st.markdown("- `SELECT * FROM vw_gold_canal;` (camada Ouro com CTR, CPC e ROAS)")
         st.markdown("- Use `WHERE` para filtrar (`WHERE canal = 'Instagram'`).")
         st.markdown("- Use `GROUP BY` para agrupar (`GROUP BY canal`).")
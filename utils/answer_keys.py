@@ -0,0 +1,59 @@
+import hashlib
+import sqlite3
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+
+import pandas as pd
+
+from db.connection import data_version
+from db.queries import QueryBudget
+from utils.compare import stream_fingerprint
+from utils.fingerprint import ResultFingerprint
+
+
+@dataclass(frozen=True)
+class AnswerKey:
+    challenge_id: Any
+    data_version: Tuple[str, int]
+    fingerprint: ResultFingerprint
+    # First rows of the expected result (all of it for typical challenges).
+    df_expected: pd.DataFrame
+
+
+_keys: Dict[Tuple[Any, str], AnswerKey] = {}
+_lock = threading.Lock()
+
+
+def _query_id(expected_query: str) -> str:
+    return hashlib.sha1(" ".join(expected_query.split()).encode()).hexdigest()
+
+
+def get_answer_key(
+    conn: sqlite3.Connection,
+    challenge: Dict[str, Any],
+    budget: Optional[QueryBudget] = None,
+) -> AnswerKey:
+    """
+    Return the challenge's answer key, computing it only when the data
+    version (or the expected query itself) changed since the last call.
+    ``budget`` bounds that computation (so a cancel button can stop it).
+    """
+    version = data_version(conn)
+    cache_key = (challenge["id"], _query_id(challenge["expected_query"]))
+    key = _keys.get(cache_key)
+    if key is not None and key.data_version == version:
+        return key
+
+    expected = stream_fingerprint(conn, challenge["expected_query"], budget=budget)
+    key = AnswerKey(
+        challenge_id=challenge["id"],
+        data_version=version,
+        fingerprint=expected.fingerprint,
+        df_expected=expected.preview,
+    )
+    with _lock:
+        current = _keys.get(cache_key)
+        if current is None or current.data_version[1] <= version[1]:
+            _keys[cache_key] = key
+    return key
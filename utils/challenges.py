@@ -0,0 +1,45 @@
+from typing import Any, Dict, List
+
+
+def get_challenges() -> List[Dict[str, Any]]:
+    """
+    Returns the list of challenges and their expected queries.
+    """
+    return [
+        {
+            "id": 1,
+            "titulo": "Vendas por produto",
+            "descricao": "Liste o total de vendas por produto.",
+            "dica": "Use SUM(vendas) e GROUP BY nome_produto.",
+            "expected_query": """
+                SELECT p.nome_produto, SUM(f.vendas) AS total_vendas
+                FROM fato_marketing f
+                JOIN dim_produto p ON f.id_produto = p.id_produto
+                GROUP BY p.nome_produto
+            """,
+        },
+        {
+            "id": 2,
+            "titulo": "Gasto total por canal",
+            "descricao": "Calcule quanto foi gasto em cada canal de campanha.",
+            "dica": "Use SUM(gastos) e agrupe por canal.",
+            "expected_query": """
+                SELECT c.canal, SUM(f.gastos) AS total_gasto
+                FROM fato_marketing f
+                JOIN dim_campanha c ON f.id_campanha = c.id_campanha
+                GROUP BY c.canal
+            """,
+        },
+        {
+            "id": 3,
+            "titulo": "Maior número de cliques por canal",
+            "descricao": "Mostre o maior número de cliques registrado por canal.",
+            "dica": "Use MAX(cliques) e GROUP BY canal.",
+            "expected_query": """
+                SELECT c.canal, MAX(f.cliques) AS max_cliques
+                FROM fato_marketing f
+                JOIN dim_campanha c ON f.id_campanha = c.id_campanha
+                GROUP BY c.canal
+            """,
+        },
+    ]
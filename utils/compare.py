@@ -0,0 +1,68 @@
+import sqlite3
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from config.settings import settings
+from db.queries import QueryBudget, query_budget
+from utils.fingerprint import FingerprintBuilder, ResultFingerprint
+
+
+@dataclass
+class Comparison:
+    ok: bool
+    # Why the result differs (None when it matches or nothing was expected).
+    detail: Optional[str]
+    fingerprint: ResultFingerprint
+    # First rows of the result, for display only.
+    preview: pd.DataFrame
+    # False when the comparison stopped before reading every row.
+    complete: bool
+
+
+def stream_fingerprint(
+    conn: sqlite3.Connection,
+    query: str,
+    expected: Optional[ResultFingerprint] = None,
+    budget: Optional[QueryBudget] = None,
+    chunk_size: int = 5_000,
+    preview_rows: Optional[int] = None,
+) -> Comparison:
+    """
+    Execute ``query`` and fold its rows into a fingerprint chunk by chunk,
+    keeping only ``preview_rows`` rows in memory. Against ``expected`` it
+    stops early on a column mismatch or once there are too many rows.
+    """
+    preview_rows = settings.QUERY_PAGE_SIZE if preview_rows is None else preview_rows
+    builder = FingerprintBuilder(expected=expected)
+    preview = []
+    complete = True
+    problem: Optional[str] = None
+
+    with query_budget(conn, budget):
+        cur = conn.cursor()
+        try:
+            cur.execute(query)
+            columns = [d[0] for d in cur.description or []]
+            problem = builder.set_columns(columns)
+            while problem is None:
+                rows = cur.fetchmany(chunk_size)
+                if not rows:
+                    break
+                if len(preview) < preview_rows:
+                    preview.extend(rows[: preview_rows - len(preview)])
+                problem = builder.add(pd.DataFrame.from_records(rows, columns=columns))
+            if problem is not None:
+                complete = cur.fetchone() is None
+        finally:
+            cur.close()
+
+    problem = problem or builder.mismatch()
+    return Comparison(
+        ok=expected is not None and problem is None,
+        detail=problem,
+        fingerprint=builder.result(),
+        preview=pd.DataFrame.from_records(preview, columns=columns),
+        complete=complete,
+    )
@@ -0,0 +1,253 @@
+from typing import Any, Dict, List
+
+
+# Block kinds: "texto" (markdown), "subtitulo", "titulo" (### heading) and
+# "codigo". Headings open a new section for the RAG chunker.
+def get_course_modules() -> List[Dict[str, Any]]:
+    """
+    Returns the course modules, rendered by ui.course and indexed by the agent.
+    """
+    return [
+        {
+            "id": 1,
+            "titulo": "Módulo 1 - O que é um banco de dados?",
+            "blocos": [
+                (
+                    "texto",
+                    """
+Um **banco de dados** é um lugar organizado onde guardamos informações
+para consultá-las e analisá-las depois.
+
+No marketing digital, bancos de dados são essenciais para armazenar:
+
+- Informações de campanhas (Instagram, Facebook, Google Ads)
+- Leads e clientes
+- Métricas como CPC, CTR, ROAS
+- Vendas e conversões
+""",
+                ),
+            ],
+        },
+        {
+            "id": 2,
+            "titulo": "Módulo 2 - Tipos de dados e bancos (estruturados vs. não estruturados)",
+            "blocos": [
+                ("subtitulo", "📌 Dados Estruturados"),
+                (
+                    "texto",
+                    """
+Dados organizados em colunas, linhas e formatos previsíveis.
+
+**Exemplos:**
+
+- Tabela de leads (nome, email, telefone)
+- Base de produtos (nome, categoria, preço)
+- Métricas de campanha (data, cliques, gastos)
+""",
+                ),
+                ("subtitulo", "📌 Dados Semiestruturados"),
+                (
+                    "texto",
+                    """
+Dados que têm estrutura, mas não necessariamente tabular.
+
+**Exemplos:**
+
+- JSON da API do Instagram
+- XML de integrações
+- Logs de servidores organizados
+""",
+                ),
+                ("subtitulo", "📌 Dados Não Estruturados"),
+                (
+                    "texto",
+                    """
+Dados sem formato fixo.
+
+**Exemplos:**
+
+- Fotos e vídeos de campanhas
+- Comentários em redes sociais
+- Áudios e PDFs diversos
+""",
+                ),
+                (
+                    "texto",
+                    """
+**Bancos relacionais (SQL)** lidam muito bem com dados estruturados.
+
+**Bancos não relacionais (NoSQL)** são mais flexíveis para dados semi ou não estruturados.
+""",
+                ),
+            ],
+        },
+        {
+            "id": 3,
+            "titulo": "Módulo 3 - Tipos de linguagens SQL",
+            "blocos": [
+                ("titulo", "📌 DDL — Data Definition Language"),
+                (
+                    "codigo",
+                    (
+                        "CREATE TABLE produtos (...);\n"
+                        "ALTER TABLE produtos ADD COLUMN preco DECIMAL;"
+                    ),
+                ),
+                ("titulo", "📌 DML — Data Manipulation Language"),
+                (
+                    "codigo",
+                    (
+                        "INSERT INTO produtos VALUES (...);\n"
+                        "UPDATE produtos SET preco = 10.0 WHERE id = 1;"
+                    ),
+                ),
+                ("titulo", "📌 DQL — Data Query Language"),
+                ("codigo", "SELECT * FROM produtos;"),
+                ("titulo", "📌 DCL — Data Control Language"),
+                (
+                    "codigo",
+                    (
+                        "GRANT SELECT ON tabela TO usuario;\n"
+                        "REVOKE INSERT ON tabela FROM usuario;"
+                    ),
+                ),
+                ("titulo", "📌 TCL — Transaction Control Language"),
+                (
+                    "codigo",
+                    (
+                        "BEGIN TRANSACTION;\n"
+                        "UPDATE contas SET saldo = saldo - 50 WHERE id = 1;\n"
+                        "UPDATE contas SET saldo = saldo + 50 WHERE id = 2;\n"
+                        "COMMIT;\n"
+                        "-- ou ROLLBACK para desfazer\n"
+                    ),
+                ),
+            ],
+        },
+        {
+            "id": 4,
+            "titulo": "Módulo 4 - Arquitetura Medalhão, Star Schema e Snowflake",
+            "blocos": [
+                ("subtitulo", "🏅 Arquitetura Medalhão"),
+                (
+                    "texto",
+                    """
+A **Arquitetura Medalhão** é um modelo moderno de organização de dados em camadas
+(Bronze, Prata e Ouro), em que os dados chegam brutos na camada Bronze,
+são limpos e padronizados na camada Prata e se tornam modelos analíticos prontos
+para decisão na camada Ouro.
+""",
+                ),
+                ("titulo", "🥉 Camada Bronze — Dados crus"),
+                (
+                    "texto",
+                    """
+Dados exatamente como chegam das fontes:
+
+- CSVs
+- APIs brutas
+- Logs crus
+""",
+                ),
+                ("titulo", "🥈 Camada Prata — Dados tratados"),
+                (
+                    "texto",
+                    """
+Dados limpos e padronizados:
+
+- Tipos corrigidos
+- Datas ajustadas
+- Remoção de duplicados
+""",
+                ),
+                ("titulo", "🥇 Camada Ouro — Dados para negócio"),
+                (
+                    "texto",
+                    """
+Dados modelados para análise:
+
+- Indicadores calculados (CTR, CPC, ROAS)
+- Modelos dimensionais para dashboards
+""",
+                ),
+                ("subtitulo", "⭐ Star Schema"),
+                (
+                    "texto",
+                    """
+Star Schema é um modelo dimensional com uma tabela fato central ligada
+a várias tabelas dimensão ao redor. É simples, intuitivo e muito usado em BI.
+""",
+                ),
+                ("subtitulo", "❄ Snowflake Schema"),
+                (
+                    "texto",
+                    """
+Snowflake Schema normaliza as dimensões em múltiplas tabelas.
+Reduz redundância, mas torna as consultas um pouco mais complexas.
+""",
+                ),
+            ],
+        },
+        {
+            "id": 5,
+            "titulo": "Módulo 5 - Tabelas fato e dimensão (explicação didática)",
+            "blocos": [
+                (
+                    "texto",
+                    """
+Imagine que você é o analista da empresa **Bebidas Tropicais™**.
+
+Para analisar campanhas, criamos dimensões e fatos.
+""",
+                ),
+                ("subtitulo", "📗 Dimensão Produto — O cardápio da empresa"),
+                (
+                    "texto",
+                    """
+Aqui ficam informações que mudam pouco:
+
+- nome do produto
+- categoria
+- preço
+
+Ela responde:
+
+➡ **O que estamos anunciando?**
+""",
+                ),
+                ("subtitulo", "📣 Dimensão Campanha — Os canais de marketing"),
+                (
+                    "texto",
+                    """
+Aqui ficam informações sobre o canal:
+
+- Instagram, Facebook, Google Ads
+- Objetivo (Alcance, Cliques, Conversão)
+
+Ela responde:
+
+➡ **Onde estamos anunciando?**
+""",
+                ),
+                ("subtitulo", "🎯 Tabela Fato — O resultado das campanhas"),
+                (
+                    "texto",
+                    """
+Aqui ficam os números reais:
+
+- impressões
+- cliques
+- gastos
+- vendas
+
+Ela responde:
+
+➡ **O que aconteceu?**
+
+Se as dimensões são o *contexto*,
+a fato é a **história acontecendo**.
+""",
+                ),
+            ],
+        },
+    ]
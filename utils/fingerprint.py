@@ -0,0 +1,226 @@
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# Floats are compared after rounding to this many significant digits and
+# decimals, which absorbs floating-point noise from SUM()/AVG() ordering.
+# Integers are compared exactly.
+FLOAT_SIGNIFICANT = 10
+FLOAT_DECIMALS = 6
+
+# Two independent 64-bit row hashes -> 128-bit multiset signature.
+_HASH_KEYS = ("0123456789abcdef", "fedcba9876543210")
+# Column hash used for NULL regardless of the column's kind.
+_NULL_HASH = np.uint64(0x9E3779B97F4A7C15)
+_MIX = np.uint64(0x100000001B3)
+# Keeps a float's hash apart from an integer's with the same bit pattern.
+_FLOAT_TAG = np.uint64(0xC2B2AE3D27D4EB4F)
+# Whole numbers below 2**53 are exact in float64; int64 bounds the rest.
+_EXACT_LIMIT = 2.0 ** 53
+_INT64_LIMIT = 2 ** 63
+
+
+@dataclass(frozen=True)
+class ResultFingerprint:
+    """
+    Order-insensitive summary of a query result: equal fingerprints mean the
+    same columns and the same multiset of rows (up to hash collisions).
+    """
+
+    row_count: int
+    columns: Tuple[str, ...]
+    kinds: Tuple[str, ...]
+    row_hash: Tuple[int, int]
+
+
+def normalize_name(name: object) -> str:
+    return str(name).strip().lower()
+
+
+def _column_kind(series: pd.Series) -> str:
+    """'num', 'text' or 'null' (all values NULL: compatible with anything)."""
+    non_null = series.dropna()
+    if non_null.empty:
+        return "null"
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+        return "num"
+    if all(isinstance(v, (int, float, np.number)) and not isinstance(v, bool) for v in non_null.head(50)):
+        return "num"
+    return "text"
+
+
+def round_numbers(values: np.ndarray, significant: int, decimals: int) -> np.ndarray:
+    """
+    Floats rounded to the grading tolerance. A value within ``decimals`` of a
+    whole number below 2**53 becomes that whole number exactly, so an integer
+    SUM that came back as a float still compares digit for digit.
+    """
+    values = values.astype("float64", copy=True)
+    near = np.round(values, decimals)
+    whole = np.isfinite(near) & (near == np.trunc(near)) & (np.abs(near) < _EXACT_LIMIT)
+    finite = np.isfinite(values) & (values != 0)
+    magnitude = np.zeros_like(values)
+    magnitude[finite] = np.floor(np.log10(np.abs(values[finite])))
+    factor = 10.0 ** (significant - 1 - magnitude)
+    values[finite] = np.round(values[finite] * factor[finite]) / factor[finite]
+    values = np.round(values, decimals)
+    values[whole] = near[whole]
+    return values + 0.0  # + 0.0 folds -0.0 into 0.0
+
+
+def _number_hashes(series: pd.Series, key: str, significant: int, decimals: int) -> np.ndarray:
+    """
+    Integers hash exactly; floats are rounded first (see round_numbers), and
+    a float that rounds to a whole number hashes like that integer, the way
+    SQLite treats 150 and 150.0 as equal.
+    """
+    if pd.api.types.is_bool_dtype(series) or pd.api.types.is_integer_dtype(series):
+        integers = series.to_numpy(dtype="int64", na_value=0)
+        return pd.util.hash_array(integers, hash_key=key)
+
+    values = series.to_numpy()
+    exact = np.zeros(len(values), dtype=bool)
+    integers = np.zeros(len(values), dtype=np.int64)
+    if values.dtype == object:
+        for i, v in enumerate(values):
+            if isinstance(v, (int, np.integer)) and -_INT64_LIMIT <= v < _INT64_LIMIT:
+                exact[i] = True
+                integers[i] = v
+    floats = pd.to_numeric(series, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    rounded = round_numbers(floats, significant, decimals)
+    whole = ~exact & np.isfinite(rounded) & (rounded == np.trunc(rounded)) & (np.abs(rounded) < _INT64_LIMIT)
+    integers[whole] = rounded[whole].astype(np.int64)
+    exact |= whole
+    return np.where(
+        exact,
+        pd.util.hash_array(integers, hash_key=key),
+        pd.util.hash_array(rounded, hash_key=key) ^ _FLOAT_TAG,
+    )
+
+
+def _column_hashes(series: pd.Series, kind: str, key: str, significant: int, decimals: int) -> np.ndarray:
+    nulls = series.isna().to_numpy()
+    if kind == "num":
+        hashed = _number_hashes(series, key, significant, decimals)
+    elif kind == "text":
+        hashed = pd.util.hash_array(series.astype(object).to_numpy(), hash_key=key, categorize=False)
+    else:
+        hashed = np.zeros(len(series), dtype=np.uint64)
+    hashed = hashed.astype(np.uint64, copy=False)
+    hashed[nulls] = _NULL_HASH
+    return hashed
+
+
+def row_hashes(
+    df: pd.DataFrame,
+    kinds: Sequence[str],
+    key: str,
+    significant: int = FLOAT_SIGNIFICANT,
+    decimals: int = FLOAT_DECIMALS,
+) -> np.ndarray:
+    """
+    One uint64 per row, combined column by column in canonical column order.
+    NULLs hash the same whatever the column's kind, so a column that is all
+    NULL in one chunk still matches its typed counterpart elsewhere.
+    """
+    acc = np.zeros(len(df), dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        for col, kind in zip(df.columns, kinds):
+            acc = acc * _MIX + _column_hashes(df[col], kind, key, significant, decimals)
+    return acc
+
+
+@dataclass
+class FingerprintBuilder:
+    """
+    Accumulate a ResultFingerprint chunk by chunk, so a result never has to be
+    held in memory at once. With ``expected`` set, ``add`` reports a mismatch
+    as soon as the columns differ or there are more rows than expected.
+    """
+
+    expected: Optional[ResultFingerprint] = None
+    significant: int = FLOAT_SIGNIFICANT
+    decimals: int = FLOAT_DECIMALS
+    columns: Optional[Tuple[str, ...]] = None
+    kinds: List[str] = field(default_factory=list)
+    row_count: int = 0
+    sums: List[int] = field(default_factory=lambda: [0, 0])
+    _order: Optional[List[int]] = None
+
+    def set_columns(self, names: Sequence[object]) -> Optional[str]:
+        normalized = [normalize_name(n) for n in names]
+        if len(set(normalized)) != len(normalized):
+            return "O resultado tem colunas com nomes repetidos; use aliases distintos."
+        self._order = sorted(range(len(normalized)), key=lambda i: normalized[i])
+        self.columns = tuple(normalized[i] for i in self._order)
+        self.kinds = ["null"] * len(self.columns)
+        if self.expected is not None and self.columns != self.expected.columns:
+            return (
+                f"Colunas diferentes: esperado {', '.join(self.expected.columns)}; "
+                f"obtido {', '.join(self.columns)}."
+            )
+        return None
+
+    def add(self, chunk: pd.DataFrame) -> Optional[str]:
+        if self.columns is None:
+            problem = self.set_columns(chunk.columns)
+            if problem:
+                return problem
+        frame = chunk.iloc[:, self._order]
+        frame.columns = list(self.columns)
+
+        for i, col in enumerate(frame.columns):
+            kind = _column_kind(frame[col])
+            if kind == "null":
+                continue
+            if self.kinds[i] == "null":
+                self.kinds[i] = kind
+            elif self.kinds[i] != kind:
+                return f"A coluna {col} mistura números e texto."
+        if self.expected is not None:
+            for col, mine, theirs in zip(self.columns, self.kinds, self.expected.kinds):
+                if "null" not in (mine, theirs) and mine != theirs:
+                    return f"Tipo diferente na coluna {col}: esperado {theirs}, obtido {mine}."
+
+        self.row_count += len(frame)
+        if self.expected is not None and self.row_count > self.expected.row_count:
+            return f"Linhas a mais: o resultado esperado tem {self.expected.row_count} linha(s)."
+
+        with np.errstate(over="ignore"):
+            for i, key in enumerate(_HASH_KEYS):
+                hashes = row_hashes(frame, self.kinds, key, self.significant, self.decimals)
+                self.sums[i] = (self.sums[i] + int(hashes.sum(dtype=np.uint64))) % (1 << 64)
+        return None
+
+    def result(self) -> ResultFingerprint:
+        return ResultFingerprint(
+            row_count=self.row_count,
+            columns=self.columns or (),
+            kinds=tuple(self.kinds),
+            row_hash=(self.sums[0], self.sums[1]),
+        )
+
+    def mismatch(self) -> Optional[str]:
+        """Final verdict against ``expected`` once every chunk was added."""
+        if self.expected is None:
+            return None
+        mine = self.result()
+        if mine.row_count != self.expected.row_count:
+            return (
+                f"Número de linhas diferente: esperado {self.expected.row_count}, "
+                f"obtido {mine.row_count}."
+            )
+        if mine.row_hash != self.expected.row_hash:
+            return "Mesmas colunas e número de linhas, mas os valores são diferentes."
+        return None
+
+
+def fingerprint_frame(df: pd.DataFrame) -> ResultFingerprint:
+    builder = FingerprintBuilder()
+    problem = builder.add(df) if len(df.columns) else None
+    if problem:
+        raise ValueError(problem)
+    return builder.result()
@@ -1,10 +1,15 @@
 from dataclasses import dataclass
-from typing import Optional
+from typing import List, Optional
 
+import numpy as np
 import pandas as pd
 import sqlite3
 
-from db.queries import run_query
+from config.settings import settings
+from db.queries import QueryBudget, clean_sql, query_budget
+from utils.answer_keys import AnswerKey
+from utils.compare import stream_fingerprint
+from utils.fingerprint import FLOAT_DECIMALS, FLOAT_SIGNIFICANT, normalize_name, round_numbers
 
 
 @dataclass
@@ -13,59 +18,201 @@ class ValidationResult:
     error: Optional[str]
     df_user: Optional[pd.DataFrame]
     df_expected: Optional[pd.DataFrame]
+    # Why the results differ, when they do.
+    detail: Optional[str] = None
+    # In-database grading: rows missing from / extra in the student's result
+    # (capped), with a "vezes" column counting the surplus occurrences.
+    df_missing: Optional[pd.DataFrame] = None
+    df_extra: Optional[pd.DataFrame] = None
 
 
-def _normalize_df(df: pd.DataFrame | None) -> pd.DataFrame | None:
+def validate_answer(
+    conn: sqlite3.Connection,
+    expected_query: str,
+    user_query: str,
+    budget: Optional[QueryBudget] = None,
+    answer_key: Optional[AnswerKey] = None,
+) -> ValidationResult:
+    """
+    Compare the result of user_query with expected_query.
+
+    Both results are streamed and reduced to order-insensitive fingerprints
+    (see utils.fingerprint); only a preview of each is kept for display.
+    ``budget`` limits the student's query (the answer key runs unbounded).
+    With a precomputed ``answer_key`` only the student's query is executed.
+    """
+    if answer_key is not None:
+        expected_fp, df_expected = answer_key.fingerprint, answer_key.df_expected
+    else:
+        try:
+            expected = stream_fingerprint(conn, expected_query)
+        except Exception as e:
+            # Se der erro aqui, é problema no gabarito
+            return ValidationResult(
+                ok=False,
+                error=f"Erro ao executar query esperada (gabarito): {e}",
+                df_user=None,
+                df_expected=None,
+            )
+        expected_fp, df_expected = expected.fingerprint, expected.preview
+
+    try:
+        comparison = stream_fingerprint(conn, user_query, expected=expected_fp, budget=budget)
+    except Exception as e:
+        return ValidationResult(
+            ok=False,
+            error=str(e),
+            df_user=None,
+            df_expected=df_expected,
+        )
+
+    return ValidationResult(
+        ok=comparison.ok,
+        error=None,
+        df_user=comparison.preview,
+        df_expected=df_expected,
+        detail=comparison.detail,
+    )
+
+
+def _quote(name: str) -> str:
+    return '"' + name.replace('"', '""') + '"'
+
+
+def _grading_round(value):
     """
-    Sort rows and columns so that DataFrames become comparable
-    regardless of ordering.
+    Same tolerance as utils.fingerprint, usable from SQL: floats are rounded,
+    integers are left alone (SQLite already groups 150 and 150.0 together).
     """
-    if df is None or df.empty:
-        return df
-    norm = df.copy()
-    norm = norm.reindex(sorted(norm.columns), axis=1)
-    norm = norm.sort_values(by=list(norm.columns)).reset_index(drop=True)
-    return norm
+    if isinstance(value, float):
+        return float(round_numbers(np.array([value], dtype="float64"), FLOAT_SIGNIFICANT, FLOAT_DECIMALS)[0])
+    return value
 
 
-def validate_answer(
+def _result_columns(conn: sqlite3.Connection, query: str) -> List[str]:
+    cur = conn.execute(f"SELECT * FROM (\n{clean_sql(query)}\n) LIMIT 0")
+    try:
+        return [d[0] for d in cur.description or []]
+    finally:
+        cur.close()
+
+
+def validate_answer_in_db(
     conn: sqlite3.Connection,
     expected_query: str,
     user_query: str,
+    budget: Optional[QueryBudget] = None,
+    max_diff_rows: int = 50,
 ) -> ValidationResult:
     """
-    Compare the result of user_query with expected_query.
-    """
+    Grade inside SQLite with a bag (multiset) difference.
 
+    Both queries become subqueries of one ``UNION ALL`` tagged with which
+    side each row came from; a counted ``GROUP BY`` over every column then
+    keeps only rows whose occurrence counts differ (what ``EXCEPT ALL`` in
+    both directions would return). Only those rows, at most
+    ``max_diff_rows`` of them, reach Python.
+    """
+    expected_sql, user_sql = clean_sql(expected_query), clean_sql(user_query)
     try:
-        df_expected = run_query(conn, expected_query)
+        expected_cols = _result_columns(conn, expected_sql)
     except Exception as e:
-        # Se der erro aqui, é problema no gabarito
         return ValidationResult(
             ok=False,
             error=f"Erro ao executar query esperada (gabarito): {e}",
             df_user=None,
             df_expected=None,
         )
-
     try:
-        df_user = run_query(conn, user_query)
+        user_cols = _result_columns(conn, user_sql)
     except Exception as e:
+        return ValidationResult(ok=False, error=str(e), df_user=None, df_expected=None)
+
+    user_by_name = {normalize_name(c): c for c in user_cols}
+    names = [normalize_name(c) for c in expected_cols]
+    if len(user_by_name) != len(user_cols) or sorted(user_by_name) != sorted(names):
         return ValidationResult(
             ok=False,
-            error=str(e),
+            error=None,
             df_user=None,
-            df_expected=df_expected,
+            df_expected=None,
+            detail=(
+                f"Colunas diferentes: esperado {', '.join(sorted(names))}; "
+                f"obtido {', '.join(sorted(normalize_name(c) for c in user_cols))}."
+            ),
+        )
+
+    aliases = [f"c{i}" for i in range(len(names))]
+    exp_select = ", ".join(
+        f"grading_round({_quote(col)}) AS {a}" for col, a in zip(expected_cols, aliases)
+    )
+    usr_select = ", ".join(
+        f"grading_round({_quote(user_by_name[n])}) AS {a}" for n, a in zip(names, aliases)
+    )
+    group_by = ", ".join(aliases)
+    diff_sql = f"""
+        SELECT {group_by}, SUM(n_esperado) AS n_esperado, SUM(n_obtido) AS n_obtido
+        FROM (
+            SELECT {exp_select}, 1 AS n_esperado, 0 AS n_obtido FROM (
+                {expected_sql}
+            )
+            UNION ALL
+            SELECT {usr_select}, 0 AS n_esperado, 1 AS n_obtido FROM (
+                {user_sql}
+            )
         )
+        GROUP BY {group_by}
+        HAVING SUM(n_esperado) <> SUM(n_obtido)
+        LIMIT ?
+    """
 
-    df_expected_norm = _normalize_df(df_expected)
-    df_user_norm = _normalize_df(df_user)
+    conn.create_function("grading_round", 1, _grading_round, deterministic=True)
+    try:
+        with query_budget(conn, budget):
+            rows = conn.execute(diff_sql, (max_diff_rows + 1,)).fetchall()
+    except Exception as e:
+        return ValidationResult(ok=False, error=str(e), df_user=None, df_expected=None)
 
-    ok = df_expected_norm.equals(df_user_norm)
+    truncated = len(rows) > max_diff_rows
+    rows = rows[:max_diff_rows]
+    missing = [(*r[:-2], r[-2] - r[-1]) for r in rows if r[-2] > r[-1]]
+    extra = [(*r[:-2], r[-1] - r[-2]) for r in rows if r[-1] > r[-2]]
+    columns = names + ["vezes"]
+
+    detail = None
+    if rows:
+        n_missing = sum(r[-1] for r in missing)
+        n_extra = sum(r[-1] for r in extra)
+        detail = f"{n_missing} linha(s) faltando e {n_extra} linha(s) a mais"
+        detail += f" (mostrando as primeiras {max_diff_rows})." if truncated else "."
 
     return ValidationResult(
-        ok=ok,
+        ok=not rows,
         error=None,
-        df_user=df_user,
-        df_expected=df_expected,
+        df_user=None,
+        df_expected=None,
+        detail=detail,
+        df_missing=pd.DataFrame.from_records(missing, columns=columns),
+        df_extra=pd.DataFrame.from_records(extra, columns=columns),
     )
+
+
+def grade(
+    conn: sqlite3.Connection,
+    expected_query: str,
+    user_query: str,
+    budget: Optional[QueryBudget] = None,
+    answer_key: Optional[AnswerKey] = None,
+) -> ValidationResult:
+    """
+    Pick the grading path: fingerprints for typical results, in-database
+    difference once the expected result has GRADING_IN_DB_MIN_ROWS rows or
+    more (or always/never, per GRADING_MODE).
+    """
+    mode = settings.GRADING_MODE
+    if mode == "auto":
+        big = answer_key is not None and answer_key.fingerprint.row_count >= settings.GRADING_IN_DB_MIN_ROWS
+        mode = "sql" if big else "hash"
+    if mode == "sql":
+        return validate_answer_in_db(conn, expected_query, user_query, budget)
+    return validate_answer(conn, expected_query, user_query, budget, answer_key=answer_key)
@@ -1,10 +1,32 @@
+import uuid
+
 import streamlit as st
 
+from db.progress import get_progress_store
+
+
+def _student_id() -> str:
+    """
+    Identify the student by the ``?aluno=`` URL parameter, assigning a new
+    one on first visit so a reload (or a bookmark) keeps the same progress.
+    """
+    student = st.query_params.get("aluno")
+    if not student:
+        student = uuid.uuid4().hex[:12]
+        st.query_params["aluno"] = student
+    return student
+
 
 def _ensure_state() -> None:
     """
-    Ensure XP and challenge state are in session_state.
+    Ensure XP and challenge state are in session_state, loaded from the
+    progress store once per session.
     """
+    if "student_id" not in st.session_state:
+        progress = get_progress_store().load(_student_id())
+        st.session_state["student_id"] = progress.student_id
+        st.session_state["xp"] = progress.xp
+        st.session_state["completed_challenges"] = set(progress.completed)
     if "xp" not in st.session_state:
         st.session_state["xp"] = 0
     if "completed_challenges" not in st.session_state:
@@ -16,7 +38,8 @@ def _ensure_state() -> None:
 
 def add_xp(challenge_id: int, xp_gain: int = 20) -> None:
     """
-    Add XP once per challenge.
+    Add XP once per challenge. The session is updated right away; the
+    event is persisted by the progress store's background writer.
     """
     _ensure_state()
     completed = st.session_state["completed_challenges"]
@@ -24,6 +47,8 @@ def add_xp(challenge_id: int, xp_gain: int = 20) -> None:
         completed.add(challenge_id)
         st.session_state["completed_challenges"] = completed
         st.session_state["xp"] += xp_gain
+        get_progress_store().record(st.session_state["student_id"], challenge_id, xp_gain)
+        st.session_state["progress_pending"] = True
 
 
 def get_xp() -> int:
@@ -31,6 +56,20 @@ def get_xp() -> int:
     return int(st.session_state["xp"])
 
 
+def get_student_id() -> str:
+    _ensure_state()
+    return st.session_state["student_id"]
+
+
+def sync_progress() -> None:
+    """
+    Make this session's completions visible to cohort queries (leaderboard,
+    rank); waits for the background writer only when something is pending.
+    """
+    if st.session_state.pop("progress_pending", False):
+        get_progress_store().flush(timeout=2.0)
+
+
 def get_completed_challenges() -> set:
     _ensure_state()
     return st.session_state["completed_challenges"]